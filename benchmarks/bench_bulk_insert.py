@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк записи в БД: соединение и коммит на каждую строку против add_item на
+долгоживущем соединении и add_items_bulk одной транзакцией (без поиска почти
+дубликатов и с ним - NEAR_DUPLICATE_MODE=thread)
+
+Запуск: python benchmarks/bench_bulk_insert.py --items 10000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DUPLICATES_OFF, DUPLICATES_THREAD, RSSDatabase  # noqa: E402
+
+
+def make_rows(count):
+    """Синтетические элементы ленты (title, description, link, pub_date, category)"""
+    return [(f"Проект {i}", "Описание проекта " * 10, f"https://www.fl.ru/projects/{i}/",
+             "Mon, 01 Jan 2024 00:00:00 +0300", i % 42) for i in range(count)]
+
+
+def insert_per_connection(db, rows):
+    """Прежний add_item: новое соединение и коммит на каждую строку"""
+    for row in rows:
+        with sqlite3.connect(db.db_path) as conn:
+            conn.execute('''
+                INSERT OR IGNORE INTO rss_items (title, description, link, pub_date, category)
+                VALUES (?, ?, ?, ?, ?)
+            ''', row)
+            conn.commit()
+
+
+def insert_add_item(db, rows):
+    """add_item на долгоживущем соединении (коммит на строку)"""
+    for row in rows:
+        db.add_item(*row)
+
+
+def insert_bulk(db, rows):
+    """add_items_bulk: вся лента одной транзакцией"""
+    db.add_items_bulk(rows)
+
+
+def measure(label, func, rows, journal_mode=None, duplicate_mode=DUPLICATES_OFF):
+    """Выполняет вставку в чистую БД и печатает пропускную способность"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = RSSDatabase(os.path.join(tmp, 'bench.db'), duplicate_mode=duplicate_mode)
+        if journal_mode:
+            # Прежний режим журнала по умолчанию
+            db.conn.execute(f'PRAGMA journal_mode={journal_mode}')
+        started = time.perf_counter()
+        func(db, rows)
+        elapsed = time.perf_counter() - started
+        db.close()
+    print(f"{label:<44} {elapsed:7.2f} сек  {len(rows) / elapsed:10.0f} строк/сек")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=10000, help='число вставляемых строк')
+    args = parser.parse_args()
+
+    rows = make_rows(args.items)
+    baseline = measure("Соединение + коммит на строку (DELETE журнал)", insert_per_connection, rows, 'DELETE')
+    measure("add_item, долгоживущее соединение (WAL)", insert_add_item, rows)
+    bulk = measure("add_items_bulk, одна транзакция (WAL)", insert_bulk, rows)
+    print(f"Ускорение add_items_bulk: x{baseline / bulk:.0f}")
+    measure("add_items_bulk с поиском почти дубликатов", insert_bulk, rows, duplicate_mode=DUPLICATES_THREAD)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк дайджест-режима: сообщение на каждый проект против дайджеста
+
+Один проход находит много подходящих проектов для одного чата; оба режима
+отправляют их как парсер: проекты и записи outbox сохраняются пачкой
+(add_items_bulk с маршрутом OutboxSender), затем OutboxSender передаёт их
+через NotificationQueue в локальную заглушку Bot API.
+Главная метрика - проектов, доставленных за один вызов API.
+
+Запуск: python benchmarks/bench_digest.py --projects 100 --urgent 5
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import RSSDatabase  # noqa: E402
+from fake_bot_api import FakeBotAPI  # noqa: E402
+from notification_queue import NotificationQueue  # noqa: E402
+from outbox import OutboxSender  # noqa: E402
+import telegram_bot  # noqa: E402
+
+CHAT_ID = "1000"
+
+
+def projects(count, urgent):
+    """Синтетические подходящие проекты; каждый urgent-й - в срочной категории 5"""
+    description = "Нужно написать python бота для telegram с интеграцией API и базой данных. " * 3
+    result = []
+    for i in range(count):
+        category = 5 if urgent and i % urgent == 0 else 1
+        result.append((f"Проект {i}: python бот", description, f"https://www.fl.ru/projects/{i}/",
+                       "Mon, 01 Jan 2024 12:00:00 GMT", category))
+    return result
+
+
+def run(label, digest, batch, args):
+    with FakeBotAPI(args.latency, args.chat_rate, args.global_rate) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        notifier = telegram_bot.TelegramNotifier("123456:bench", CHAT_ID, base_url=server.base_url)
+        notifier.queue = NotificationQueue(notifier.bot, global_rate_per_second=args.global_rate,
+                                           chat_rate_per_minute=args.chat_rate)
+        db = RSSDatabase(os.path.join(tmp, 'digest.db'))
+        sender = OutboxSender(notifier, db, digest=digest)
+        started = time.perf_counter()
+        db.add_items_bulk(batch, route=sender.route)
+        sender.drain()
+        stats = sender.flush(None)
+        elapsed = time.perf_counter() - started
+        notifier.queue.close()
+        db.close()
+
+    longest = max(len(text) for _, text, _ in server.delivered)
+    print(f"\n{label}")
+    print(f"  проектов:                {stats['items_sent']} из {len(batch)}")
+    print(f"  сообщений:               {stats['sent']} (самое длинное {longest} символов)")
+    print(f"  вызовов API:             {stats['api_calls']} (ответов 429: {server.throttled})")
+    print(f"  проектов на вызов API:   {stats['items_sent'] / stats['api_calls']:.1f}")
+    print(f"  время доставки:          {elapsed:.2f} сек")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--projects', type=int, default=100, help='подходящих проектов за проход')
+    parser.add_argument('--urgent', type=int, default=10, help='каждый N-й проект - срочный (0 - нет)')
+    parser.add_argument('--latency', type=float, default=0.05, help='задержка ответа Bot API, сек')
+    parser.add_argument('--chat-rate', type=int, default=600, help='лимит сообщений в минуту на чат')
+    parser.add_argument('--global-rate', type=int, default=30, help='общий лимит сообщений в секунду')
+    args = parser.parse_args()
+
+    logging.getLogger('telegram_bot').setLevel(logging.ERROR)
+    logging.getLogger('notification_queue').setLevel(logging.ERROR)
+    logging.getLogger('outbox').setLevel(logging.ERROR)
+    logging.getLogger('config_watcher').setLevel(logging.ERROR)
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    batch = projects(args.projects, args.urgent)
+    print(f"Проектов: {args.projects}, срочных: каждый {args.urgent}-й, лимит чата: {args.chat_rate}/мин")
+    run("Сообщение на каждый проект", False, batch, args)
+    run("Дайджест (срочные - отдельно)", True, batch, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк выгрузки: построчное копирование через add_item против INSERT ... SELECT
+
+1. create_filtered_database (ключевое слово встречается в ~10% записей) и
+   create_recent_database (последние 10 дней): прежняя реализация - выборка
+   списка в Python и add_item на каждую запись, новая - ATTACH и
+   INSERT ... SELECT. Сверяются число записей и сохранность created_at.
+2. Потоковая выгрузка всех записей в JSONL и CSV: время и пик памяти
+   Python (tracemalloc) против выборки всего результата в список.
+
+Запуск: python benchmarks/bench_export.py --rows 200000
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import EXPORT_COLUMNS, RSSDatabase  # noqa: E402
+from export import export_items  # noqa: E402
+
+CATEGORIES = 40
+
+
+def fill(db, rows):
+    """rows записей за ~60 дней; в каждой десятой - слово python"""
+    with db.connection() as conn:
+        conn.execute(f'''
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {rows})
+            INSERT INTO rss_items (title, description, link, pub_date, category, created_at)
+            SELECT CASE WHEN i % 10 = 0 THEN 'Бот на Python ' ELSE 'Проект ' END || i,
+                   'Описание проекта номер ' || i, 'https://www.fl.ru/projects/' || i || '/',
+                   '', i % {CATEGORIES} + 1, datetime('now', '-' || (({rows} - i) * 5184000 / {rows}) || ' seconds')
+            FROM n
+        ''')
+
+
+def legacy_copy(items, output_path):
+    """Прежнее копирование: add_item на каждую запись (created_at не переносится)"""
+    new_db = RSSDatabase(output_path)
+    added = 0
+    for item in items:
+        if new_db.add_item(item[1], item[2], item[3], item[4], item[5]):
+            added += 1
+    new_db.close()
+    return added
+
+
+def summary(path):
+    conn = sqlite3.connect(path)
+    count, created = conn.execute('SELECT COUNT(*), GROUP_CONCAT(created_at) FROM '
+                                  '(SELECT created_at FROM rss_items ORDER BY link)').fetchone()
+    conn.close()
+    return count, created
+
+
+def compare_sqlite(db, tmp, source_path):
+    keywords = ['python']
+    cases = [
+        ("по ключевому слову", lambda: db.search_by_keywords(keywords),
+         lambda path: db.create_filtered_database(keywords, path, progress=None),
+         "SELECT created_at FROM rss_items WHERE title LIKE '%Python%' ORDER BY link"),
+        ("за 10 дней", lambda: db.get_recent_items(10),
+         lambda path: db.create_recent_database(10, path, progress=None),
+         "SELECT created_at FROM rss_items WHERE created_at >= datetime('now', '-10 days') ORDER BY link"),
+    ]
+    print("\nВыгрузка в SQLite:")
+    for label, select, export, expected_sql in cases:
+        legacy_path = os.path.join(tmp, f'legacy_{len(os.listdir(tmp))}.db')
+        started = time.perf_counter()
+        legacy_count = legacy_copy(select(), legacy_path)
+        legacy = time.perf_counter() - started
+
+        new_path = os.path.join(tmp, f'new_{len(os.listdir(tmp))}.db')
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            export(new_path)
+        new = time.perf_counter() - started
+
+        count, created = summary(new_path)
+        source = sqlite3.connect(source_path)
+        expected = ','.join(row[0] for row in source.execute(expected_sql))
+        source.close()
+        print(f"  {label}: add_item {legacy:.2f} сек ({legacy_count} записей), "
+              f"INSERT ... SELECT {new:.3f} сек ({count} записей), в {legacy / new:.0f} раз быстрее; "
+              f"created_at {'сохранён' if created == expected else 'НЕ совпадает'} "
+              f"(прежде: {'сохранён' if summary(legacy_path)[1] == expected else 'терялся'})")
+
+
+def measure(function):
+    """Время прогона и пик памяти Python (отдельным прогоном: tracemalloc замедляет выделение памяти)"""
+    started = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def materialized_jsonl(db, path):
+    """Для сравнения: весь результат в списке, затем запись в файл"""
+    with db.connection() as conn:
+        rows = conn.execute(f"SELECT {', '.join(EXPORT_COLUMNS)} FROM rss_items ORDER BY id").fetchall()
+    with open(path, 'w', encoding='utf-8') as file:
+        for row in rows:
+            file.write(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + '\n')
+    return len(rows)
+
+
+def compare_streams(db, tmp, rows):
+    print(f"\nВыгрузка всех {rows} записей в файл (время, пик памяти Python):")
+    cases = [
+        ("JSONL, список в памяти", lambda: materialized_jsonl(db, os.path.join(tmp, 'all_list.jsonl'))),
+        ("JSONL, потоково", lambda: export_items(db, os.path.join(tmp, 'all.jsonl'))),
+        ("CSV, потоково", lambda: export_items(db, os.path.join(tmp, 'all.csv'))),
+    ]
+    for label, function in cases:
+        written, elapsed, peak = measure(function)
+        print(f"  {label + ':':<26} {elapsed:6.2f} сек, {written / elapsed:9.0f} записей/с, "
+              f"пик памяти {peak / 1024 / 1024:7.1f} МБ")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200000, help='записей в базе')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source_path = os.path.join(tmp, 'source.db')
+        db = RSSDatabase(source_path)
+        fill(db, args.rows)
+        print(f"База: {args.rows} записей")
+        compare_sqlite(db, tmp, source_path)
+        compare_streams(db, tmp, args.rows)
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк HTTP-слоя: отдельный requests.get на каждый запрос против общей FeedSession
+
+Запуск: python benchmarks/bench_http_session.py --requests 200 --threads 4
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+from stub_server import StubRSSServer  # noqa: E402
+from http_session import FeedSession  # noqa: E402
+
+
+def run(label, fetch, urls, threads):
+    """Выполняет запросы в пуле потоков и печатает пропускную способность"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        statuses = list(pool.map(fetch, urls))
+    elapsed = time.perf_counter() - started
+    ok = sum(1 for status in statuses if status == 200)
+    print(f"{label:<34} {elapsed:7.2f} сек  {len(urls) / elapsed:8.1f} запр/сек  успешно {ok}/{len(urls)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200, help='число запросов')
+    parser.add_argument('--threads', type=int, default=4, help='параллельных потоков')
+    parser.add_argument('--throttle-every', type=int, default=10,
+                        help='каждый N-й ответ заглушки - 429 (0 - без ограничений)')
+    args = parser.parse_args()
+
+    with StubRSSServer(throttle_every=args.throttle_every) as server:
+        urls = [f"{server.base_url}{i % 40 + 1}" for i in range(args.requests)]
+
+        run("requests.get (новое соединение)", lambda url: requests.get(url, timeout=10).status_code,
+            urls, args.threads)
+
+        session = FeedSession(pool_size=args.threads, backoff_factor=0.01)
+        run("FeedSession (пул соединений)", lambda url: session.get(url).status_code, urls, args.threads)
+        stats = session.stats()
+        session.close()
+
+    print(f"FeedSession: запросов {stats['requests']}, новых соединений {stats['new_connections']}, "
+          f"переиспользовано {stats['reused_connections']}, повторов {stats['retries']} "
+          f"(по Retry-After: {stats['retry_after_waits']})")
+
+
+if __name__ == '__main__':
+    main()
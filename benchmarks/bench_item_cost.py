@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Регрессионный бенчмарк стоимости обработки одного элемента в зависимости от размера БД
+
+Сравнивает прежний цикл (get_statistics() до и после каждого элемента)
+с подсчётом по ItemStatus, который возвращает process_rss_item.
+
+Запуск: python benchmarks/bench_item_cost.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import RSSDatabase  # noqa: E402
+from feed_parser import RSSItem  # noqa: E402
+from get_rss_text import process_rss_item  # noqa: E402
+
+
+def fill_database(db_path, rows):
+    """Заполняет таблицу rss_items синтетическими строками"""
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            'INSERT INTO rss_items (title, description, link, pub_date, category) VALUES (?, ?, ?, ?, ?)',
+            ((f"Проект {i}", "Описание проекта " * 10, f"https://www.fl.ru/projects/{i}/",
+              "Mon, 01 Jan 2024 00:00:00 +0300", i % 42) for i in range(rows))
+        )
+        conn.commit()
+
+
+def make_items(prefix, count):
+    """Создаёт элементы ленты с уникальными ссылками"""
+    return [RSSItem(f"Новый проект {i}", "Описание", f"https://www.fl.ru/projects/{prefix}-{i}/", "")
+            for i in range(count)]
+
+
+def per_item_old(db, items):
+    """Прежний цикл parse_rss: два get_statistics() на элемент"""
+    started = time.perf_counter()
+    new_items = 0
+    for item in items:
+        old_total = db.get_statistics().get('total_items', 0)
+        process_rss_item(item, 1, db)
+        if db.get_statistics().get('total_items', 0) > old_total:
+            new_items += 1
+    return (time.perf_counter() - started) / len(items)
+
+
+def per_item_new(db, items):
+    """Новый цикл: результат берётся из ItemStatus"""
+    started = time.perf_counter()
+    new_items = 0
+    for item in items:
+        if process_rss_item(item, 1, db).is_new:
+            new_items += 1
+    return (time.perf_counter() - started) / len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help='размеры таблицы rss_items')
+    parser.add_argument('--items', type=int, default=200, help='новых элементов на замер')
+    args = parser.parse_args()
+
+    logging.getLogger('telegram_bot').setLevel(logging.ERROR)
+    print(f"{'строк в БД':>12} {'прежний цикл, мс/элем':>24} {'ItemStatus, мс/элем':>22}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            db = RSSDatabase(os.path.join(tmp, f"bench_{size}.db"))
+            fill_database(db.db_path, size)
+            with contextlib.redirect_stdout(io.StringIO()):
+                old = per_item_old(db, make_items(f"old-{size}", args.items))
+                new = per_item_new(db, make_items(f"new-{size}", args.items))
+            print(f"{size:>12} {old * 1000:>24.3f} {new * 1000:>22.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк потокового чтения: списки fetchall против итераторов с fetchmany
+
+Обход всей базы (по умолчанию 1 млн записей с описаниями ~450 символов):
+- get_all_items: прежний список всех записей в памяти;
+- iter_items: те же записи по одной, курсор читается пачками по --batch-size;
+- iter_items с проекцией (id, title, link, category) - без описаний;
+- iter_search_by_keywords против search_by_keywords (слово в каждой десятой записи).
+Для каждого прохода - время и пик памяти Python (tracemalloc, отдельным прогоном).
+
+Запуск: python benchmarks/bench_iter_memory.py --rows 1000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import RSSDatabase  # noqa: E402
+
+CATEGORIES = 40
+
+
+def fill(db, rows):
+    """rows записей; в каждой десятой - слово python, описание ~450 символов"""
+    with db.connection() as conn:
+        conn.execute(f'''
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {rows})
+            INSERT INTO rss_items (title, description, link, pub_date, category, created_at, pub_ts)
+            SELECT CASE WHEN i % 10 = 0 THEN 'Бот на Python ' ELSE 'Проект ' END || i,
+                   'Описание проекта номер ' || i || ': ' || hex(randomblob(200)),
+                   'https://www.fl.ru/projects/' || i || '/', '', i % {CATEGORIES} + 1,
+                   datetime('now', '-' || ({rows} - i) || ' minutes'), 1700000000 + i * 60
+            FROM n
+        ''')
+
+
+def walk(rows):
+    """Обход с обращением к полям, как у потребителя выборки"""
+    count = length = 0
+    for row in rows:
+        count += 1
+        length += len(row[1])
+    return count
+
+
+def measure(function):
+    """Время прогона и пик памяти Python (отдельным прогоном: tracemalloc замедляет выделение памяти)"""
+    started = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000, help='записей в базе')
+    parser.add_argument('--batch-size', type=int, default=1000, help='строк на одно чтение курсора')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = RSSDatabase(os.path.join(tmp, 'iter.db'))
+        fill(db, args.rows)
+        print(f"База: {args.rows} записей, размер файла "
+              f"{os.path.getsize(db.db_path) / 1024 / 1024:.0f} МБ; обход (время, пик памяти Python):")
+        projection = ('id', 'title', 'link', 'category')
+        cases = [
+            ("get_all_items (список)", lambda: walk(db.get_all_items())),
+            ("iter_items", lambda: walk(db.iter_items(batch_size=args.batch_size))),
+            ("iter_items без описаний", lambda: walk(db.iter_items(columns=projection, batch_size=args.batch_size))),
+            ("search_by_keywords (список)", lambda: walk(db.search_by_keywords(['python']))),
+            ("iter_search_by_keywords", lambda: walk(db.iter_search_by_keywords(['python'], columns=projection,
+                                                                              batch_size=args.batch_size))),
+        ]
+        for label, function in cases:
+            count, elapsed, peak = measure(function)
+            print(f"  {label + ':':<30} {count:>8} записей {elapsed:6.2f} сек, "
+                  f"пик памяти {peak / 1024 / 1024:8.1f} МБ")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк фильтрации: цикл по ключевым словам с проверкой `in` против KeywordMatcher
+
+Тексты берутся из rss_data.db (только чтение), ключевые слова - из filterList.ini,
+дополненные синтетическими до заданного количества.
+
+Запуск: python benchmarks/bench_matcher.py --keywords 1000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from matcher import KeywordMatcher  # noqa: E402
+
+
+def load_texts(limit):
+    """Заголовки и описания проектов из rss_data.db или синтетические тексты"""
+    db_path = os.path.join(ROOT, 'rss_data.db')
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        rows = conn.execute('SELECT title, description FROM rss_items LIMIT ?', (limit,)).fetchall()
+        conn.close()
+        if rows:
+            return [(title or '', description or '') for title, description in rows]
+    rng = random.Random(1)
+    words = "разработка сайт бот telegram python парсер дизайн логотип текст перевод".split()
+    return [(' '.join(rng.choices(words, k=6)), ' '.join(rng.choices(words, k=120))) for _ in range(limit)]
+
+
+def load_keywords(count):
+    """Ключевые слова из filterList.ini плюс синтетические термины"""
+    keywords = set()
+    with open(os.path.join(ROOT, 'filterList.ini'), encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith(('#', '[')):
+                keywords.add(line.lower())
+    rng = random.Random(7)
+    alphabet = 'абвгдежзиклмнопрстуфхцчшэюяabcdefghijklmnopqrstuvwxyz'
+    while len(keywords) < count:
+        keywords.add(''.join(rng.choices(alphabet, k=rng.randint(4, 12))))
+    return keywords
+
+
+def old_should_notify(keywords, stopwords, title, description):
+    """Прежняя логика TelegramNotifier.should_notify (без категории 5)"""
+    def has_stopwords(text):
+        if not text:
+            return False
+        text_lower = text.lower()
+        return bool([word for word in stopwords if word in text_lower])
+
+    def has_keywords(text):
+        if not text:
+            return False
+        text_lower = text.lower()
+        return any(keyword in text_lower for keyword in keywords)
+
+    if has_stopwords(title) or has_stopwords(description):
+        return False
+    return has_keywords(title) or has_keywords(description)
+
+
+def new_should_notify(keyword_matcher, stopword_matcher, title, description):
+    """Логика на KeywordMatcher: один проход на каждый набор терминов"""
+    text = f"{title}\n{description}"
+    if stopword_matcher.matched_terms(text):
+        return False
+    return keyword_matcher.matches(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--keywords', type=int, default=1000, help='количество ключевых слов')
+    parser.add_argument('--stopwords', type=int, default=100, help='количество стоп-слов')
+    parser.add_argument('--texts', type=int, default=2000, help='количество проектов')
+    args = parser.parse_args()
+
+    texts = load_texts(args.texts)
+    keywords = load_keywords(args.keywords)
+    stopwords = {f"стоп{i}слово" for i in range(args.stopwords)} | {'1с', '1c'}
+    print(f"Проектов: {len(texts)}, ключевых слов: {len(keywords)}, стоп-слов: {len(stopwords)}")
+
+    started = time.perf_counter()
+    keyword_matcher = KeywordMatcher(keywords)
+    stopword_matcher = KeywordMatcher(stopwords)
+    print(f"Компиляция KeywordMatcher: {(time.perf_counter() - started) * 1000:.1f} мс")
+
+    started = time.perf_counter()
+    old = [old_should_notify(keywords, stopwords, title, description) for title, description in texts]
+    old_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    new = [new_should_notify(keyword_matcher, stopword_matcher, title, description) for title, description in texts]
+    new_elapsed = time.perf_counter() - started
+
+    print(f"{'Цикл с in':<28} {old_elapsed * 1e6 / len(texts):9.1f} мкс/проект")
+    print(f"{'KeywordMatcher':<28} {new_elapsed * 1e6 / len(texts):9.1f} мкс/проект")
+    print(f"Ускорение: x{old_elapsed / new_elapsed:.1f}, совпадение решений: "
+          f"{sum(a == b for a, b in zip(old, new))}/{len(texts)}")
+
+    for mode in ('word', 'phrase'):
+        matcher = KeywordMatcher(keywords, mode)
+        started = time.perf_counter()
+        total = sum(len(matcher.find_all(f"{title}\n{description}")) for title, description in texts)
+        elapsed = time.perf_counter() - started
+        print(f"find_all, режим {mode:<7} {elapsed * 1e6 / len(texts):12.1f} мкс/проект  (совпадений: {total})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк накладных расходов метрик: проход с метриками и без
+
+1. Стоимость одного наблюдения (Histogram.observe, Counter.inc, time()).
+2. Проход по категориям через локальную заглушку RSS (загрузка, разбор,
+   сохранение в новую БД) поочерёдно с включёнными и выключенными метриками;
+   сравниваются минимумы и медианы. Заглушка отвечает мгновенно, поэтому это худший
+   случай: с реальной сетью доля метрик ещё меньше.
+3. Оценка сверху: число наблюдений за проход (включая сопоставление
+   и отправку в Telegram для каждого проекта) x стоимость наблюдения,
+   в том числе относительно реального прохода, который ограничен
+   частотой запросов к fl.ru (FETCH_RATE_PER_MINUTE).
+
+Запуск: python benchmarks/bench_metrics.py --categories 10 --items 30 --repeat 15
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_server import StubRSSServer  # noqa: E402
+from database import RSSDatabase  # noqa: E402
+from config import FETCH_BURST, FETCH_RATE_PER_MINUTE  # noqa: E402
+import get_rss_text  # noqa: E402
+import metrics  # noqa: E402
+
+
+def observation_cost():
+    """Стоимость одного наблюдения, секунд"""
+    histogram = metrics.Histogram('bench_histogram', 'бенчмарк', registry=None)
+    counter = metrics.Counter('bench_counter', 'бенчмарк', ['status'], registry=None)
+    number = 200000
+    observe = timeit.timeit(lambda: histogram.observe(0.003), number=number) / number
+    inc = timeit.timeit(lambda: counter.labels(200).inc(), number=number) / number
+
+    def timed():
+        with histogram.time():
+            pass
+    timer = timeit.timeit(timed, number=number) / number
+    baseline = timeit.timeit(lambda: None, number=number) / number
+    return observe - baseline, inc - baseline, timer - baseline
+
+
+def sweep(base_url, categories, db_path):
+    """Один проход по категориям в новую базу; возвращает его время"""
+    db = RSSDatabase(db_path)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for category in categories:
+            response = get_rss_text.get_rss_data(f"{base_url}{category}")
+            get_rss_text.process_category_response(category, response, db, set())
+    elapsed = time.perf_counter() - started
+    db.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--categories', type=int, default=10, help='категорий за проход')
+    parser.add_argument('--items', type=int, default=30, help='проектов в ленте')
+    parser.add_argument('--repeat', type=int, default=15, help='проходов в каждом режиме')
+    args = parser.parse_args()
+
+    logging.getLogger('telegram_bot').setLevel(logging.ERROR)
+
+    observe, inc, timer = observation_cost()
+    print(f"Histogram.observe: {observe * 1e9:.0f} нс, Counter.labels().inc: {inc * 1e9:.0f} нс, "
+          f"with time(): {timer * 1e9:.0f} нс")
+
+    categories = list(range(1, args.categories + 1))
+    timings = {True: [], False: []}
+    with StubRSSServer(items_per_feed=args.items) as server, tempfile.TemporaryDirectory() as tmp:
+        base_url = server.base_url
+        sweep(base_url, categories, os.path.join(tmp, 'warmup.db'))
+        for run in range(args.repeat):
+            # Режимы чередуются, чтобы дрейф (кэш, частота CPU) влиял на оба одинаково
+            for enabled in ((True, False) if run % 2 == 0 else (False, True)):
+                metrics.REGISTRY.enabled = enabled
+                timings[enabled].append(sweep(base_url, categories, os.path.join(tmp, f'{run}_{enabled}.db')))
+        metrics.REGISTRY.enabled = True
+
+    print(f"\nПроход: {args.categories} категорий x {args.items} проектов, {args.repeat} повторов")
+    for label, enabled in (("без метрик", False), ("с метриками", True)):
+        values = timings[enabled]
+        spread = statistics.stdev(values) / statistics.mean(values) * 100 if len(values) > 1 else 0.0
+        print(f"  {label + ':':<13} минимум {min(values) * 1000:.1f} мс, медиана {statistics.median(values) * 1000:.1f} мс "
+              f"(разброс ±{spread:.0f}%)")
+    without_metrics = min(timings[False])
+    measured = (min(timings[True]) - without_metrics) / without_metrics * 100
+    print(f"  разница минимумов: {measured:+.2f}%")
+
+    # На категорию: загрузка (observe + inc), разбор (observe + inc), сохранение пачки (observe + inc);
+    # на проект: сопоставление фильтрами и отправка в Telegram (observe + inc)
+    projects = args.categories * args.items
+    cost = args.categories * 3 * (observe + inc) + projects * (observe + observe + inc)
+    print(f"  оценка сверху: {args.categories * 6 + projects * 3} наблюдений x ~{(observe + inc) / 2 * 1e9:.0f} нс "
+          f"= {cost * 1000:.2f} мс ({cost / without_metrics * 100:.3f}% прохода)")
+    real_sweep = max(0, args.categories - FETCH_BURST) * 60 / FETCH_RATE_PER_MINUTE + without_metrics
+    print(f"  реальный проход при {FETCH_RATE_PER_MINUTE:g} запросах в минуту: не менее {real_sweep:.0f} сек, "
+          f"доля метрик {cost / real_sweep * 100:.5f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк поиска почти дубликатов на корпусе rss_data.db
+
+1. Подписи для сохранённых проектов (backfill_signatures): скорость и найденные
+   повторы; сверка с точным перебором всех пар по сходству Жаккара шинглов
+   (полнота LSH и доля ложных совпадений).
+2. Полнота на искусственных повторах: для --samples проектов корпуса - тот же текст,
+   косметические правки (регистр, ё, пунктуация, ссылки), замена слова, приписка
+   в конце и обрезка описания; повтор найден, если find_near_duplicates возвращает оригинал.
+3. Скорость поиска: find_near_duplicates (корзины LSH по индексу) против сравнения
+   подписи со всеми записями - на корпусе и после добавления --filler проектов
+   из слов корпуса (пакетным сохранением, как у парсера).
+
+Запуск: python benchmarks/bench_near_duplicates.py --db rss_data.db --filler 20000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ITEM_BATCH_SIZE, NEAR_DUPLICATE_THRESHOLD  # noqa: E402
+from database import DUPLICATES_OFF, RSSDatabase  # noqa: E402
+from near_duplicates import (  # noqa: E402
+    item_signature, normalize_text, shingles, similarity, unpack_signature
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def jaccard(first, second):
+    return len(first & second) / len(first | second) if first or second else 0.0
+
+
+def exact_pairs(items, threshold):
+    """Точный перебор: пары (меньший id, больший id) со сходством шинглов не ниже threshold"""
+    sets = [(item_id, shingles(normalize_text(f'{title} {description}')))
+            for item_id, title, description in items]
+    pairs = set()
+    for index, (first_id, first) in enumerate(sets):
+        for second_id, second in sets[index + 1:]:
+            if first and second and jaccard(first, second) >= threshold:
+                pairs.add((min(first_id, second_id), max(first_id, second_id)))
+    return pairs
+
+
+def found_pairs(db):
+    """Пары (оригинал, повтор), отмеченные duplicate_of"""
+    with db.connection() as conn:
+        return {tuple(sorted(row)) for row in conn.execute(
+            'SELECT duplicate_of, id FROM rss_items WHERE duplicate_of IS NOT NULL')}
+
+
+def in_same_group(pair, groups):
+    return groups.get(pair[0], pair[0]) == groups.get(pair[1], pair[1])
+
+
+def variants(title, description, rng):
+    """Искусственные повторы проекта: (вид правки, заголовок, описание)"""
+    words = description.split()
+    edited = list(words)
+    if edited:
+        edited[len(edited) // 2] = rng.choice(['срочно', 'внимательно', 'быстро', 'качественно'])
+    return [
+        ('тот же текст', title, description),
+        ('косметика', f'  {title.upper()}!!! ', description.replace('е', 'ё').replace('.', ' . ') + ' https://t.me/x'),
+        ('замена слова', title, ' '.join(edited)),
+        ('приписка', title, f'{description} Бюджет обсуждаем, пишите в личные сообщения.'),
+        ('обрезка 15%', title, ' '.join(words[:max(1, int(len(words) * 0.85))]) + '...'),
+    ]
+
+
+def recall_on_variants(db, items, samples, rng):
+    print(f"\nПолнота на искусственных повторах ({samples} проектов корпуса, порог {NEAR_DUPLICATE_THRESHOLD}):")
+    groups = dict(db.conn.execute('SELECT id, COALESCE(duplicate_of, id) FROM rss_items'))
+    totals = {}
+    for item_id, title, description in rng.sample(items, min(samples, len(items))):
+        original = groups[item_id]
+        exact = shingles(normalize_text(f'{title} {description}'))
+        for kind, new_title, new_description in variants(title, description, rng):
+            matches = db.find_near_duplicates(new_title, new_description, window_days=None)
+            found = any(match[2] == original for match in matches)
+            similar = jaccard(exact, shingles(normalize_text(f'{new_title} {new_description}')))
+            hits, count, total_similarity = totals.get(kind, (0, 0, 0.0))
+            totals[kind] = (hits + found, count + 1, total_similarity + similar)
+    for kind, (hits, count, total_similarity) in totals.items():
+        print(f"  {kind + ':':<16} найдено {hits / count * 100:5.1f}%  (среднее сходство шинглов {total_similarity / count:.2f})")
+
+
+def brute_force(db, signature):
+    """Сравнение подписи со всеми записями (без LSH)"""
+    rows = db.conn.execute('SELECT id, minhash FROM rss_items WHERE minhash IS NOT NULL').fetchall()
+    return [item_id for item_id, minhash in rows
+            if similarity(signature.minhash, unpack_signature(minhash)) >= NEAR_DUPLICATE_THRESHOLD]
+
+
+def lookup_speed(db, items, rng, label, lookups):
+    queries = [rng.choice(items) for _ in range(lookups)]
+    started = time.perf_counter()
+    for _, title, description in queries:
+        db.find_near_duplicates(title, description, window_days=None)
+    lsh = (time.perf_counter() - started) / len(queries)
+    signatures = [item_signature(title, description) for _, title, description in queries[:max(1, lookups // 10)]]
+    started = time.perf_counter()
+    for signature in signatures:
+        brute_force(db, signature)
+    scan = (time.perf_counter() - started) / len(signatures)
+    total = db.conn.execute('SELECT COUNT(*) FROM rss_items').fetchone()[0]
+    print(f"  {label:<22} {total:>8} записей: LSH {lsh * 1000:6.2f} мс ({1 / lsh:6.0f} поисков/с), "
+          f"перебор {scan * 1000:8.1f} мс, в {scan / lsh:5.0f} раз быстрее")
+
+
+def add_filler(db, count, vocabulary, rng):
+    """count проектов из случайных слов корпуса; возвращает время сохранения на проект"""
+    items = [(f'{" ".join(rng.choices(vocabulary, k=6))}', ' '.join(rng.choices(vocabulary, k=40)),
+              f'https://www.fl.ru/projects/filler-{number}/', '', number % 40 + 1) for number in range(count)]
+    started = time.perf_counter()
+    for start in range(0, count, ITEM_BATCH_SIZE):
+        db.add_items_bulk(items[start:start + ITEM_BATCH_SIZE])
+    return (time.perf_counter() - started) / max(count, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=os.path.join(ROOT, 'rss_data.db'), help='корпус (копируется во временный каталог)')
+    parser.add_argument('--samples', type=int, default=300, help='проектов для искусственных повторов')
+    parser.add_argument('--filler', type=int, default=20000, help='дополнительных проектов для замера скорости')
+    parser.add_argument('--lookups', type=int, default=500, help='поисков в замере скорости')
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'corpus.db')
+        shutil.copy(args.db, path)
+        db = RSSDatabase(path)
+        db.reset_signatures()
+        items = db.conn.execute('SELECT id, title, description FROM rss_items ORDER BY id').fetchall()
+
+        started = time.perf_counter()
+        processed, duplicates = db.backfill_signatures()
+        elapsed = time.perf_counter() - started
+        print(f"Корпус {args.db}: {len(items)} проектов")
+        print(f"Подписи: {processed} проектов за {elapsed:.2f} сек ({processed / elapsed:.0f} проектов/с), "
+              f"отмечено повторов: {duplicates}")
+
+        started = time.perf_counter()
+        exact = exact_pairs(items, NEAR_DUPLICATE_THRESHOLD)
+        exact_elapsed = time.perf_counter() - started
+        groups = dict(db.conn.execute('SELECT id, COALESCE(duplicate_of, id) FROM rss_items'))
+        found = found_pairs(db)
+        recalled = sum(1 for pair in exact if in_same_group(pair, groups))
+        sets = {item_id: shingles(normalize_text(f'{title} {description}')) for item_id, title, description in items}
+        false = sum(1 for first, second in found if jaccard(sets[first], sets[second]) < NEAR_DUPLICATE_THRESHOLD - 0.1)
+        print(f"Точный перебор пар ({exact_elapsed:.1f} сек): пар со сходством >= {NEAR_DUPLICATE_THRESHOLD}: {len(exact)}, "
+              f"из них в одной группе повторов: {recalled} ({recalled / max(len(exact), 1) * 100:.0f}%); "
+              f"отмеченных пар со сходством ниже {NEAR_DUPLICATE_THRESHOLD - 0.1:.1f}: {false} из {len(found)}")
+
+        recall_on_variants(db, items, args.samples, rng)
+
+        print("\nСкорость поиска похожих (find_near_duplicates):")
+        lookup_speed(db, items, rng, "корпус:", args.lookups)
+        if args.filler:
+            vocabulary = sorted({word for _, title, description in items for word in f'{title} {description}'.split()})
+            per_item = add_filler(db, args.filler, vocabulary, rng)
+            lookup_speed(db, items, rng, f"+{args.filler} проектов:", args.lookups)
+            plain = RSSDatabase(os.path.join(tmp, 'plain.db'), duplicate_mode=DUPLICATES_OFF)
+            plain_per_item = add_filler(plain, args.filler, vocabulary, rng)
+            plain.close()
+            print(f"\nПакетное сохранение: {plain_per_item * 1e6:.0f} мкс на проект без поиска дубликатов, "
+                  f"{per_item * 1e6:.0f} мкс с подписью и поиском")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк доставки уведомлений: новый event loop на каждое сообщение против NotificationQueue
+
+Оба варианта отправляют сообщения в локальную заглушку Bot API с лимитами Telegram.
+Замеряются время блокировки парсера, задержка доставки и пропускная способность.
+
+Запуск: python benchmarks/bench_notify.py --messages 120 --chats 20 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram import Bot  # noqa: E402
+
+from fake_bot_api import FakeBotAPI  # noqa: E402
+from notification_queue import NotificationQueue  # noqa: E402
+
+TOKEN = "123456:bench"
+
+
+def messages(count, chats):
+    """Сообщения, распределённые по чатам по кругу"""
+    return [(str(1000 + i % chats), f"Проект {i}: python бот для telegram") for i in range(count)]
+
+
+def run_legacy(base_url, batch):
+    """Прежний notify_if_needed: новый event loop на сообщение, ошибки только в лог"""
+    bot = Bot(token=TOKEN, base_url=base_url)
+    blocked = 0.0
+    for chat_id, text in batch:
+        started = time.perf_counter()
+        try:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(bot.send_message(chat_id=chat_id, text=text))
+            loop.close()
+        except Exception:
+            pass
+        blocked += time.perf_counter() - started
+    return blocked, None
+
+
+def run_queue(base_url, batch, chat_rate, global_rate):
+    """Очередь: постановка без ожидания, доставка в фоновом потоке"""
+    bot = Bot(token=TOKEN, base_url=base_url)
+    queue = NotificationQueue(bot, global_rate_per_second=global_rate,
+                              chat_rate_per_minute=chat_rate, chat_burst=1)
+    queue.start()
+    started = time.perf_counter()
+    for chat_id, text in batch:
+        queue.submit(chat_id, text)
+    blocked = time.perf_counter() - started
+    queue.flush()
+    stats = queue.stats()
+    queue.close()
+    return blocked, stats
+
+
+def report(label, server, blocked, elapsed, total, stats=None):
+    delivered = len(server.delivered)
+    print(f"\n{label}")
+    print(f"  доставлено:              {delivered} из {total} (потеряно {total - delivered})")
+    print(f"  ответов 429:             {server.throttled}")
+    print(f"  блокировка парсера:      {blocked:.3f} сек ({blocked / total * 1000:.2f} мс на сообщение)")
+    print(f"  время доставки всех:     {elapsed:.2f} сек")
+    print(f"  пропускная способность:  {delivered / elapsed:.1f} сообщений/сек")
+    if stats and stats['latency_p50'] is not None:
+        print(f"  задержка доставки:       p50 {stats['latency_p50']:.2f} сек, p95 {stats['latency_p95']:.2f} сек, "
+              f"пауз RetryAfter {stats['retry_after_waits']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=120, help='число сообщений')
+    parser.add_argument('--chats', type=int, default=20, help='число чатов')
+    parser.add_argument('--latency', type=float, default=0.05, help='задержка ответа Bot API, сек')
+    parser.add_argument('--chat-rate', type=int, default=60, help='лимит сообщений в минуту на чат')
+    parser.add_argument('--global-rate', type=int, default=30, help='общий лимит сообщений в секунду')
+    args = parser.parse_args()
+
+    logging.getLogger('notification_queue').setLevel(logging.ERROR)
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    batch = messages(args.messages, args.chats)
+
+    print(f"Сообщений: {args.messages}, чатов: {args.chats}, задержка API: {args.latency * 1000:.0f} мс, "
+          f"лимиты: {args.chat_rate}/мин на чат, {args.global_rate}/сек всего")
+
+    with FakeBotAPI(args.latency, args.chat_rate, args.global_rate) as server:
+        started = time.perf_counter()
+        blocked, _ = run_legacy(server.base_url, batch)
+        report("Новый event loop на сообщение (прежний вариант)", server, blocked,
+               time.perf_counter() - started, args.messages)
+
+    with FakeBotAPI(args.latency, args.chat_rate, args.global_rate) as server:
+        started = time.perf_counter()
+        blocked, stats = run_queue(server.base_url, batch, args.chat_rate, args.global_rate)
+        report("NotificationQueue", server, blocked, time.perf_counter() - started, args.messages, stats)
+
+
+if __name__ == '__main__':
+    main()
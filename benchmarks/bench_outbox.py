@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк восстановления outbox после перезапуска в зависимости от размера БД
+
+В базе N проектов, по каждому десятому - уже доставленное уведомление,
+и фиксированное число уведомлений, прерванных сбоем. Замеряется время
+recover_outbox() + claim_outbox() до полной выборки недоставленного.
+
+Запуск: python benchmarks/bench_outbox.py --sizes 10000 100000 1000000 --unsent 100
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import RSSDatabase  # noqa: E402
+
+
+def fill_database(db_path, rows, unsent):
+    """Проекты, история доставленных уведомлений и unsent прерванных уведомлений"""
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            'INSERT INTO rss_items (title, description, link, pub_date, category) VALUES (?, ?, ?, ?, ?)',
+            ((f"Проект {i}", "Описание проекта " * 10, f"https://www.fl.ru/projects/{i}/",
+              "Mon, 01 Jan 2024 00:00:00 +0300", i % 42) for i in range(rows))
+        )
+        conn.executemany(
+            "INSERT INTO outbox (item_id, chat_id, status, attempts, message_id) VALUES (?, '1', 'sent', 1, ?)",
+            ((item_id, item_id) for item_id in range(1, rows + 1, 10))
+        )
+        conn.executemany(
+            "INSERT INTO outbox (item_id, chat_id, status, attempts) VALUES (?, '2', 'sending', 1)",
+            ((rows - i,) for i in range(unsent))
+        )
+        conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help='размеры таблицы rss_items')
+    parser.add_argument('--unsent', type=int, default=100, help='уведомлений, прерванных сбоем')
+    args = parser.parse_args()
+
+    print(f"{'проектов':>10} {'строк outbox':>13} {'возвращено':>11} {'восстановление, мс':>20}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"bench_{size}.db")
+            RSSDatabase(path).close()
+            fill_database(path, size, args.unsent)
+
+            # Перезапуск: новое соединение, холодный кэш страниц SQLite
+            db = RSSDatabase(path)
+            started = time.perf_counter()
+            recovered = db.recover_outbox()
+            claimed = 0
+            while True:
+                rows = db.claim_outbox(100)
+                if not rows:
+                    break
+                claimed += len(rows)
+            elapsed = time.perf_counter() - started
+            outbox_rows = sum(db.get_outbox_stats().values())
+            db.close()
+            print(f"{size:>10} {outbox_rows:>13} {recovered:>11} {elapsed * 1000:>20.2f}")
+            assert claimed == recovered
+
+
+if __name__ == '__main__':
+    main()
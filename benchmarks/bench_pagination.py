@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк постраничного просмотра веб-интерфейса: OFFSET против курсора (created_at, id)
+
+1. Запрос страницы на глубине 1, 100, 1000 и 10 000 страниц: прежний
+   LIMIT/OFFSET и выборка по ключу (keyset) - p50 и p95 по --repeat замерам,
+   без фильтра и с фильтром по категории.
+2. Полный запрос главной страницы через тестовый клиент Flask (курсор,
+   счётчики и статистика из кэша) на первой и на глубокой странице,
+   а также первый запрос после новой записи (кэш сброшен).
+
+База создаётся во временном каталоге: --rows записей, 40 категорий.
+
+Запуск: python benchmarks/bench_pagination.py --rows 550000 --repeat 50
+"""
+
+import argparse
+import contextlib
+import io
+import math
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import RSSDatabase, encode_cursor  # noqa: E402
+
+CATEGORIES = 40
+PAGES = (1, 100, 1000, 10000)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(len(ordered) * fraction) - 1))]
+
+
+def fill(db, rows):
+    """rows записей: по несколько штук в секунду, как при пакетном сохранении"""
+    with db.connection() as conn:
+        conn.execute(f'''
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {rows})
+            INSERT INTO rss_items (title, description, link, pub_date, category, created_at)
+            SELECT 'Проект ' || i, 'Описание проекта номер ' || i, 'https://www.fl.ru/projects/' || i || '/',
+                   '', i % {CATEGORIES} + 1, datetime(1700000000 + i / 3, 'unixepoch')
+            FROM n
+        ''')
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return percentile(timings, 0.5), percentile(timings, 0.95)
+
+
+def offset_page(conn, page, per_page, category):
+    """Прежний запрос главной страницы"""
+    sql = 'SELECT id, title, description, link, pub_date, category, created_at FROM rss_items WHERE 1=1'
+    params = []
+    if category is not None:
+        sql += ' AND category = ?'
+        params.append(category)
+    sql += ' ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?'
+    params.extend([per_page, (page - 1) * per_page])
+    return conn.execute(sql, params).fetchall()
+
+
+def boundary(conn, page, per_page, category):
+    """Позиция последней записи перед страницей page (курсор, с которым на неё приходят)"""
+    if page == 1:
+        return None
+    rows = offset_page(conn, page - 1, per_page, category)
+    return (rows[-1][6], rows[-1][0]) if rows else None
+
+
+def compare_queries(db, per_page, repeat, category):
+    label = f"категория {category}" if category is not None else "все категории"
+    print(f"\nЗапрос страницы ({label}), {per_page} записей, p50 / p95:")
+    print(f"  {'страница':>9}  {'OFFSET':>19}  {'курсор':>19}")
+    conn = db.conn
+    for page in PAGES:
+        after = boundary(conn, page, per_page, category)
+        if after is None and page > 1:
+            continue  # в категории меньше страниц
+        offset = measure(lambda: offset_page(conn, page, per_page, category), repeat)
+        keyset = measure(lambda: db.get_items_page(per_page, category, after=after), repeat)
+        same = [row[0] for row in offset_page(conn, page, per_page, category)] == \
+            [item['id'] for item in db.get_items_page(per_page, category, after=after)[0]]
+        print(f"  {page:>9}  {offset[0] * 1000:7.2f} / {offset[1] * 1000:7.2f} мс  "
+              f"{keyset[0] * 1000:7.2f} / {keyset[1] * 1000:7.2f} мс{'' if same else '  (страницы различаются!)'}")
+
+
+def compare_requests(db_path, db, per_page, repeat):
+    with contextlib.redirect_stdout(io.StringIO()):
+        import viewdatabase
+    viewdatabase.web_interface = viewdatabase.WebInterface(db_path)
+    client = viewdatabase.app.test_client()
+    deep = boundary(db.conn, PAGES[-1], per_page, None)
+    urls = {"первая страница": f'/?per_page={per_page}'}
+    if deep is not None:  # в базе меньше PAGES[-1] страниц
+        urls[f"страница {PAGES[-1]}"] = f'/?per_page={per_page}&page={PAGES[-1]}&after={encode_cursor(*deep)}'
+        urls[f"API, страница {PAGES[-1]}"] = f'/api/items?per_page={per_page}&after={encode_cursor(*deep)}'
+    print("\nЗапрос главной страницы целиком (Flask test client), p50 / p95:")
+    for label, url in urls.items():
+        client.get(url)
+        p50, p95 = measure(lambda: client.get(url), repeat)
+        print(f"  {label + ':':<26} {p50 * 1000:7.2f} / {p95 * 1000:7.2f} мс")
+
+    # Новая запись сбрасывает кэш: следующий запрос заново считает статистику
+    cold = []
+    for number in range(min(repeat, 10)):
+        db.add_item('Новый проект', 'описание', f'https://www.fl.ru/projects/new-{number}/', '', 1)
+        started = time.perf_counter()
+        client.get(urls["первая страница"])
+        cold.append(time.perf_counter() - started)
+    print(f"  {'после новой записи:':<26} {percentile(cold, 0.5) * 1000:7.2f} / {percentile(cold, 0.95) * 1000:7.2f} мс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=550000, help='записей в базе')
+    parser.add_argument('--per-page', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=50, help='замеров на точку')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        db = RSSDatabase(db_path)
+        started = time.perf_counter()
+        fill(db, args.rows)
+        print(f"База: {args.rows} записей, {CATEGORIES} категорий (заполнение {time.perf_counter() - started:.1f} сек)")
+
+        compare_queries(db, args.per_page, args.repeat, None)
+        compare_queries(db, args.per_page, args.repeat, 1)
+        compare_requests(db_path, db, args.per_page, args.repeat)
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
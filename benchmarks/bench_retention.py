@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк хранения: перенос в помесячные архивы, сжатие и задержки рабочей базы
+
+База --rows записей за --history-days дней (в каждой десятой - слово python). Проход
+run_retention с политикой --max-age-days переносит старые записи в архивы пачками
+по RETENTION_BATCH_SIZE, затем incremental_vacuum и PRAGMA optimize.
+
+1. Скорость переноса и размер файла до и после.
+2. Запись парсера во время прохода: add_items_bulk пачками по ITEM_BATCH_SIZE из
+   отдельного соединения каждые --write-interval сек - p95 и максимум времени
+   сохранения без архивирования и параллельно с ним.
+3. Запросы к рабочей таблице до и после: полнотекстовый поиск с ранжированием
+   (search_items) и список категории (get_items_by_category) - их время зависит
+   от объёма таблицы, а после переноса - только от окна хранения.
+
+Запуск: python benchmarks/bench_retention.py --rows 300000 --max-age-days 90
+"""
+
+import argparse
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ITEM_BATCH_SIZE, RETENTION_BATCH_SIZE  # noqa: E402
+from database import RSSDatabase  # noqa: E402
+from retention import run_retention  # noqa: E402
+
+CATEGORIES = 40
+
+
+def fill(db, rows, days):
+    """rows записей за days дней; в каждой десятой - слово python"""
+    seconds = days * 86400
+    with db.connection() as conn:
+        conn.execute(f'''
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {rows})
+            INSERT INTO rss_items (title, description, link, pub_date, category, created_at, pub_ts)
+            SELECT CASE WHEN i % 10 = 0 THEN 'Бот на Python ' ELSE 'Проект ' END || i,
+                   'Описание проекта номер ' || i || ': ' || hex(randomblob(100)),
+                   'https://www.fl.ru/projects/' || i || '/', '', i % {CATEGORIES} + 1,
+                   datetime('now', '-' || (({rows} - i) * {seconds} / {rows}) || ' seconds'),
+                   strftime('%s', 'now') - ({rows} - i) * {seconds} / {rows}
+            FROM n
+        ''')
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(len(ordered) * fraction) - 1))]
+
+
+def writer(db_path, stop, interval, timings, prefix):
+    """Парсер: пачки новых проектов каждые interval сек"""
+    db = RSSDatabase(db_path)
+    number = 0
+    while not stop.wait(interval):
+        items = [(f'Новый проект {i}', 'описание', f'https://www.fl.ru/projects/{prefix}-{i}/', '', i % CATEGORIES + 1)
+                 for i in range(number, number + ITEM_BATCH_SIZE)]
+        number += ITEM_BATCH_SIZE
+        started = time.perf_counter()
+        db.add_items_bulk(items)
+        timings.append(time.perf_counter() - started)
+    db.close()
+
+
+def with_writer(db_path, interval, prefix, function, seconds=None):
+    """Выполняет function (или ждёт seconds) при параллельной записи; возвращает результат и времена записи"""
+    stop = threading.Event()
+    timings = []
+    thread = threading.Thread(target=writer, args=(db_path, stop, interval, timings, prefix))
+    thread.start()
+    try:
+        result = function() if function is not None else time.sleep(seconds)
+    finally:
+        stop.set()
+        thread.join()
+    return result, timings
+
+
+def query_timings(db, repeat):
+    def best(function):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+    return (best(lambda: db.search_items('python', limit=20)),
+            best(lambda: db.get_items_by_category(7)),
+            db.get_statistics().get('total_items', 0))
+
+
+def file_size(path):
+    return sum(os.path.getsize(path + suffix) for suffix in ('', '-wal') if os.path.exists(path + suffix))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=300000, help='записей в базе')
+    parser.add_argument('--history-days', type=int, default=720, help='глубина истории, дней')
+    parser.add_argument('--max-age-days', type=float, default=90, help='политика хранения, дней')
+    parser.add_argument('--write-interval', type=float, default=0.05, help='пауза между пачками записи, сек')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'rss_data.db')
+        db = RSSDatabase(db_path)
+        fill(db, args.rows, args.history_days)
+        db.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        size_before = file_size(db_path)
+        search_before, category_before, total_before = query_timings(db, args.repeat)
+
+        _, idle = with_writer(db_path, args.write_interval, 'idle', None, seconds=5)
+        started = time.perf_counter()
+        result, busy = with_writer(db_path, args.write_interval, 'busy', lambda: run_retention(
+            db, args.max_age_days, 0, os.path.join(tmp, 'archive'), RETENTION_BATCH_SIZE, pause=0))
+        elapsed = time.perf_counter() - started
+        db.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        size_after = file_size(db_path)
+        search_after, category_after, total_after = query_timings(db, args.repeat)
+        db.close()
+
+        archived = sum(result['archived'].values())
+        archives = os.listdir(os.path.join(tmp, 'archive'))
+        print(f"База: {args.rows} записей за {args.history_days} дней, хранение {args.max_age_days:g} дней")
+        print(f"\nПеренос: {archived} записей в {len(archives)} помесячных архивов за {elapsed:.1f} сек "
+              f"({archived / elapsed:.0f} записей/с, пачки по {RETENTION_BATCH_SIZE})")
+        print(f"Файл рабочей базы: {size_before / 1024 / 1024:.1f} МБ -> {size_after / 1024 / 1024:.1f} МБ "
+              f"(освобождено страниц: {result['compact']['freed_pages']})")
+        print(f"\nСохранение пачки парсером ({ITEM_BATCH_SIZE} проектов), мс:")
+        for label, timings in (("без архивирования", idle), ("во время архивирования", busy)):
+            print(f"  {label + ':':<24} p50 {percentile(timings, 0.5) * 1000:6.1f}  "
+                  f"p95 {percentile(timings, 0.95) * 1000:6.1f}  макс. {max(timings, default=0) * 1000:6.1f}  "
+                  f"({len(timings)} пачек)")
+        print(f"\nЗапросы к рабочей таблице (лучшее из {args.repeat}), мс:")
+        print(f"  {'':<24} {'записей':>8} {'поиск python':>13} {'категория 7':>12}")
+        for label, total, search, category in (("до переноса", total_before, search_before, category_before),
+                                                ("после переноса", total_after, search_after, category_after)):
+            print(f"  {label + ':':<24} {total:>8} {search * 1000:13.1f} {category * 1000:12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Имитационный стенд планировщика: фиксированное расписание против адаптивного
+
+Время идёт по имитированным часам: ожидание планировщика мгновенно сдвигает
+часы, а каждый опрос категории занимает --fetch-seconds. Проекты публикуются
+случайно (пуассоновский поток) с разной частотой по категориям, днём чаще,
+чем ночью; лента отдаёт только последние --feed-size проектов, всё более
+раннее между опросами теряется.
+
+Сравниваются: старое расписание (все категории в 9, 11, 13, 15, 17 часов,
+проверка раз в минуту) и AdaptiveScheduler. Метрики: опросов лент,
+пробуждений планировщика, задержка от публикации до обнаружения, потерянные
+проекты, пересечения проходов.
+
+Запуск: python benchmarks/bench_scheduler.py --days 3
+"""
+
+import argparse
+import bisect
+import math
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduler import AdaptiveScheduler  # noqa: E402
+
+# Проектов в час по категориям (днём; ночью - в NIGHT_FACTOR раз меньше)
+CATEGORY_RATES = {1: 12.0, 5: 6.0, 8: 3.0, 2: 1.0, 7: 0.5, 30: 0.2, 31: 0.1, 40: 0.05}
+NIGHT_FACTOR = 0.2
+FIXED_TIMES = (9, 11, 13, 15, 17)
+
+
+class SimulatedClock:
+    """Имитированные часы: wait() сдвигает время и сообщает об окончании прогона"""
+
+    def __init__(self, start, end):
+        self.now = start
+        self.end = end
+        self.wakeups = 0
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def wait(self, seconds):
+        self.wakeups += 1
+        self.now = min(self.now + seconds, self.end)
+        return self.now >= self.end
+
+
+def hourly_rate(category, timestamp):
+    hour = datetime.fromtimestamp(timestamp).hour
+    return CATEGORY_RATES[category] * (1.0 if 9 <= hour < 19 else NIGHT_FACTOR)
+
+
+def generate_posts(start, end, rng):
+    """Моменты публикации проектов по категориям (прореживание пуассоновского потока)"""
+    posts = {}
+    for category, peak in CATEGORY_RATES.items():
+        moments = []
+        moment = start
+        while True:
+            moment += rng.expovariate(peak / 3600)
+            if moment >= end:
+                break
+            if rng.random() < hourly_rate(category, moment) / peak:
+                moments.append(moment)
+        posts[category] = moments
+    return posts
+
+
+class FeedSimulator:
+    """Ленты категорий поверх имитированных часов"""
+
+    def __init__(self, clock, posts, feed_size, fetch_seconds):
+        self.clock = clock
+        self.posts = posts
+        self.feed_size = feed_size
+        self.fetch_seconds = fetch_seconds
+        self.seen = {category: clock.time() for category in posts}
+        self.delays = []
+        self.missed = 0
+        self.polls = 0
+        self.runs = 0
+        self.active = 0
+        self.max_active = 0
+
+    def run(self, categories):
+        """Один проход: категории опрашиваются по очереди, время идёт"""
+        self.runs += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        results = {}
+        try:
+            for category in categories:
+                self.clock.advance(self.fetch_seconds)
+                now = self.clock.time()
+                moments = self.posts[category]
+                first = bisect.bisect_right(moments, self.seen[category])
+                last = bisect.bisect_right(moments, now)
+                fresh = moments[first:last]
+                # Лента отдаёт только последние feed_size проектов
+                if len(fresh) > self.feed_size:
+                    self.missed += len(fresh) - self.feed_size
+                    fresh = fresh[-self.feed_size:]
+                self.delays.extend(now - moment for moment in fresh)
+                self.seen[category] = now
+                self.polls += 1
+                results[category] = len(fresh)
+        finally:
+            self.active -= 1
+        return results
+
+    def report(self, label, wakeups, extra=""):
+        delays = sorted(self.delays)
+        mean = sum(delays) / len(delays) / 60 if delays else 0.0
+        p95 = delays[min(len(delays) - 1, math.ceil(len(delays) * 0.95) - 1)] / 60 if delays else 0.0
+        print(f"\n{label}")
+        print(f"  проходов / опросов лент:     {self.runs} / {self.polls}")
+        print(f"  пробуждений планировщика:    {wakeups}")
+        print(f"  обнаружено проектов:         {len(delays)} (потеряно: {self.missed})")
+        print(f"  задержка обнаружения:        средняя {mean:.1f} мин, p95 {p95:.1f} мин")
+        print(f"  одновременных проходов:      не более {self.max_active}{extra}")
+
+
+def run_fixed(start, end, posts, args):
+    """Старый режим: немедленный запуск, затем все категории в 9-17 часов, проверка раз в минуту"""
+    clock = SimulatedClock(start, end)
+    feeds = FeedSimulator(clock, posts, args.feed_size, args.fetch_seconds)
+    categories = sorted(posts)
+    feeds.run(categories)
+
+    day = datetime.fromtimestamp(start).replace(hour=0, minute=0, second=0, microsecond=0)
+    while day.timestamp() < end:
+        for hour in FIXED_TIMES:
+            moment = (day + timedelta(hours=hour)).timestamp()
+            if start < moment < end and moment >= clock.time():
+                clock.now = moment
+                feeds.run(categories)
+        day += timedelta(days=1)
+    feeds.report("Фиксированное расписание 9/11/13/15/17", int((end - start) // 60))
+
+
+def run_adaptive(start, end, posts, args):
+    clock = SimulatedClock(start, end)
+    feeds = FeedSimulator(clock, posts, args.feed_size, args.fetch_seconds)
+    scheduler = AdaptiveScheduler(feeds.run, lambda: sorted(posts), clock=clock.time,
+                                  min_interval=args.min_interval, max_interval=args.max_interval,
+                                  active_hours=args.active_hours)
+    scheduler.serve(immediate=True, wait=clock.wait)
+    feeds.report(f"Адаптивный планировщик (окно {args.active_hours or 'круглосуточно'})", clock.wakeups,
+                 f", сроков объединено в следующий проход: {scheduler.coalesced}")
+    print("  интервалы к концу прогона:   " + ", ".join(
+        f"{job['category']}: {job['interval'] / 60:.0f} мин" for job in scheduler.stats()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=float, default=3, help='длительность прогона, суток')
+    parser.add_argument('--feed-size', type=int, default=30, help='проектов в ленте категории')
+    parser.add_argument('--fetch-seconds', type=float, default=10, help='время опроса одной категории')
+    parser.add_argument('--min-interval', type=float, default=300)
+    parser.add_argument('--max-interval', type=float, default=7200)
+    parser.add_argument('--active-hours', default='09:00-17:30', help="окно опроса ('' - круглосуточно)")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    start = datetime(2024, 1, 15, 8, 0).timestamp()  # Понедельник, до начала окна
+    end = start + args.days * 86400
+    posts = generate_posts(start, end, random.Random(args.seed))
+    print(f"Имитация {args.days:g} сут, проектов: {sum(len(moments) for moments in posts.values())}, "
+          f"категорий: {len(posts)}, опрос категории {args.fetch_seconds:g} сек")
+
+    run_fixed(start, end, posts, args)
+    run_adaptive(start, end, posts, args)
+
+
+if __name__ == '__main__':
+    main()
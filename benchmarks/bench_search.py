@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк поиска: цепочки LIKE '%kw%' против индекса FTS5 (bm25 + snippet)
+
+Запуск: python benchmarks/bench_search.py --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import RSSDatabase  # noqa: E402
+
+VOCABULARY = (
+    "разработка сайта лендинг интернет магазин дизайн логотип верстка парсер скрипт бот telegram "
+    "python django flask javascript react vue nodejs php laravel mysql postgresql api интеграция "
+    "автоматизация таблица excel google crm битрикс wordpress tilda seo продвижение реклама тексты "
+    "перевод видео монтаж анимация 3d модель чертеж консультация аудит мобильное приложение android ios"
+).split()
+
+
+# Редкие слова-наполнители, чтобы доля совпадений была близка к реальной
+FILLER = [f"слово{i}" for i in range(50000)]
+
+
+def random_text(rng, words):
+    """Текст, в котором около 5% слов - из словаря предметной области"""
+    return ' '.join(rng.choice(VOCABULARY) if rng.random() < 0.05 else rng.choice(FILLER) for _ in range(words))
+
+
+def fill_database(db, rows, batch=10000):
+    """Заполняет БД синтетическими проектами (индекс FTS заполняется триггерами)"""
+    rng = random.Random(42)
+    for start in range(0, rows, batch):
+        db.add_items_bulk([
+            (random_text(rng, 6).capitalize(), random_text(rng, 40),
+             f"https://www.fl.ru/projects/{i}/", "", i % 42)
+            for i in range(start, min(start + batch, rows))
+        ])
+
+
+def like_search(db, keywords):
+    """Прежний поиск: LOWER(...) LIKE по каждому ключевому слову"""
+    conditions = ' OR '.join('(LOWER(title) LIKE ? OR LOWER(description) LIKE ?)' for _ in keywords)
+    params = [f"%{kw.lower()}%" for kw in keywords for _ in range(2)]
+    with db.connection() as conn:
+        return conn.execute(f'''
+            SELECT DISTINCT id, title, description, link, pub_date, category, created_at
+            FROM rss_items WHERE {conditions} ORDER BY created_at DESC
+        ''', params).fetchall()
+
+
+def like_page(db, search, per_page=50):
+    """Прежняя страница веб-интерфейса: выборка с LIKE и отдельный COUNT(*) с тем же фильтром"""
+    with db.connection() as conn:
+        conn.execute('''SELECT id, title, description, link, pub_date, category, created_at FROM rss_items
+                        WHERE (title LIKE ? OR description LIKE ?) ORDER BY created_at DESC, id DESC LIMIT ?''',
+                     (f"%{search}%", f"%{search}%", per_page)).fetchall()
+        conn.execute('SELECT COUNT(*) FROM rss_items WHERE (title LIKE ? OR description LIKE ?)',
+                     (f"%{search}%", f"%{search}%")).fetchone()
+
+
+def fts_page(db, search, per_page=50):
+    """Страница веб-интерфейса через FTS5"""
+    db.search_items(search, None, per_page, 0)
+    db.count_search(search)
+
+
+def timed(func, repeat):
+    """Медиана времени выполнения в миллисекундах"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000, help='строк в rss_items')
+    parser.add_argument('--repeat', type=int, default=5, help='повторов каждого замера')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = RSSDatabase(os.path.join(tmp, 'bench.db'))
+        started = time.perf_counter()
+        fill_database(db, args.rows)
+        print(f"Заполнение {args.rows} строк (с индексом FTS5): {time.perf_counter() - started:.1f} сек")
+
+        keywords = ['python', 'telegram', 'бот', 'парсер']
+        print(f"{'запрос':<44} {'LIKE, мс':>10} {'FTS5, мс':>10}")
+        like = timed(lambda: like_search(db, keywords), args.repeat)
+        fts = timed(lambda: db.search_by_keywords(keywords), args.repeat)
+        print(f"{'search_by_keywords(' + ', '.join(keywords) + ')':<44} {like:>10.1f} {fts:>10.1f}")
+
+        like = timed(lambda: like_page(db, 'верстка'), args.repeat)
+        fts = timed(lambda: fts_page(db, 'верстка'), args.repeat)
+        print(f"{'страница поиска + счётчик (верстка)':<44} {like:>10.1f} {fts:>10.1f}")
+
+        like = timed(lambda: like_page(db, 'магазин django'), args.repeat)
+        fts = timed(lambda: fts_page(db, 'магазин django'), args.repeat)
+        print(f"{'страница поиска + счётчик (магазин django)':<44} {like:>10.1f} {fts:>10.1f}")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк статистики: полные агрегаты против сводных таблиц, обновляемых триггерами
+
+1. Чтение статистики (всего записей, по категориям, последнее обновление,
+   по дням за неделю): прежние COUNT(*) / GROUP BY / MAX по rss_items
+   против stats_by_category и stats_by_day - на базах разного размера.
+2. Цена триггеров при записи: пакетное сохранение (add_items_bulk пачками
+   по ITEM_BATCH_SIZE) с триггерами статистики и без них.
+3. Сверка: сводные таблицы совпадают с агрегатами по rss_items.
+
+Запуск: python benchmarks/bench_stats.py --rows 10000 100000 1000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ITEM_BATCH_SIZE  # noqa: E402
+from database import RSSDatabase  # noqa: E402
+
+CATEGORIES = 40
+
+
+def fill(db, rows):
+    """rows записей за последние ~60 дней"""
+    with db.connection() as conn:
+        conn.execute(f'''
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {rows})
+            INSERT INTO rss_items (title, description, link, pub_date, category, created_at)
+            SELECT 'Проект ' || i, 'Описание проекта номер ' || i, 'https://www.fl.ru/projects/' || i || '/',
+                   '', i % {CATEGORIES} + 1, datetime('now', '-' || (i * 5184000 / {rows}) || ' seconds')
+            FROM n
+        ''')
+
+
+def full_aggregates(conn):
+    """Прежний расчёт статистики веб-интерфейса"""
+    total = conn.execute('SELECT COUNT(*) FROM rss_items').fetchone()[0]
+    by_category = dict(conn.execute('SELECT category, COUNT(*) FROM rss_items GROUP BY category ORDER BY category'))
+    last_update = conn.execute('SELECT MAX(created_at) FROM rss_items').fetchone()[0]
+    daily = dict(conn.execute('''
+        SELECT DATE(created_at), COUNT(*) FROM rss_items
+        WHERE created_at >= datetime('now', '-7 days')
+        GROUP BY DATE(created_at) ORDER BY 1 DESC
+    '''))
+    return total, by_category, last_update, daily
+
+
+def best_of(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def compare_reads(tmp, rows, repeat):
+    db = RSSDatabase(os.path.join(tmp, f'read_{rows}.db'))
+    fill(db, rows)
+    conn = db.conn
+    old = best_of(lambda: full_aggregates(conn), repeat)
+    new = best_of(lambda: (db.get_statistics(), db.get_daily_statistics(7)), repeat)
+
+    total, by_category, last_update, _ = full_aggregates(conn)
+    stats = db.get_statistics()
+    same = (stats['total_items'], stats['by_category'], stats['last_update']) == (total, by_category, last_update)
+    print(f"  {rows:>9}  {old * 1000:10.2f} мс  {new * 1000:10.3f} мс  {old / new:8.0f}x  "
+          f"{'совпадает' if same else 'РАСХОЖДЕНИЕ'}")
+    db.close()
+
+
+def bulk_insert_time(db_path, rows, triggers):
+    db = RSSDatabase(db_path)
+    if not triggers:
+        with db.connection() as conn:
+            for event in ('insert', 'delete', 'update'):
+                conn.execute(f'DROP TRIGGER rss_items_stats_{event}')
+    items = [(f'Проект {i}', f'Описание проекта номер {i}', f'https://www.fl.ru/projects/{i}/', '', i % CATEGORIES + 1)
+             for i in range(rows)]
+    started = time.perf_counter()
+    for start in range(0, rows, ITEM_BATCH_SIZE):
+        db.add_items_bulk(items[start:start + ITEM_BATCH_SIZE])
+    elapsed = time.perf_counter() - started
+    db.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000], help='размеры баз')
+    parser.add_argument('--insert-rows', type=int, default=20000, help='записей в замере сохранения')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("Чтение статистики (лучшее из замеров):")
+        print(f"  {'записей':>9}  {'агрегаты':>13}  {'сводка':>13}  {'ускорение':>9}")
+        for rows in args.rows:
+            compare_reads(tmp, rows, args.repeat)
+
+        print(f"\nПакетное сохранение {args.insert_rows} записей пачками по {ITEM_BATCH_SIZE}:")
+        timings = {}
+        for run in range(3):
+            for triggers in (False, True):
+                elapsed = bulk_insert_time(os.path.join(tmp, f'insert_{run}_{triggers}.db'), args.insert_rows, triggers)
+                timings[triggers] = min(timings.get(triggers, elapsed), elapsed)
+        for label, triggers in (("без триггеров статистики", False), ("с триггерами статистики", True)):
+            print(f"  {label + ':':<26} {timings[triggers] * 1000:8.1f} мс "
+                  f"({timings[triggers] / args.insert_rows * 1e6:.1f} мкс на запись)")
+        print(f"  накладные расходы: {(timings[True] - timings[False]) / timings[False] * 100:+.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк разбора ленты: ET.fromstring + findall против потокового iter_rss_items
+
+Измеряет пиковое потребление памяти (tracemalloc) и скорость разбора
+на синтетической ленте из 50 000 элементов.
+
+Запуск: python benchmarks/bench_stream_parse.py --items 50000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_server import build_feed  # noqa: E402
+from feed_parser import iter_rss_items, FEED_CHUNK_SIZE  # noqa: E402
+
+
+def parse_tree(path):
+    """Прежний способ: всё тело в памяти, затем дерево целиком"""
+    with open(path, 'rb') as f:
+        root = ET.fromstring(f.read())
+    count = 0
+    for item in root.findall('.//item'):
+        item.find('title')
+        count += 1
+    return count
+
+
+def parse_stream(path):
+    """Потоковый разбор фрагментами, как из response.iter_content"""
+    def chunks():
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(FEED_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+
+    return sum(1 for _ in iter_rss_items(chunks()))
+
+
+def measure(label, func, path, size):
+    """Печатает время, пропускную способность и пик памяти"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = func(path)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {count:7d} элем.  {elapsed:6.2f} сек  {count / elapsed:9.0f} элем/сек  "
+          f"{size / elapsed / 2**20:6.1f} МБ/сек  пик памяти {peak / 2**20:7.1f} МБ")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=50000, help='элементов в синтетической ленте')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'feed.xml')
+        with open(path, 'wb') as f:
+            f.write(build_feed(1, args.items))
+        size = os.path.getsize(path)
+        print(f"Лента: {args.items} элементов, {size / 2**20:.1f} МБ")
+
+        measure("ET.fromstring + findall", parse_tree, path, size)
+        measure("iter_rss_items (потоково)", parse_stream, path, size)
+
+
+if __name__ == '__main__':
+    main()
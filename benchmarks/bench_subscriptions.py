@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк маршрутизации по подпискам: проверка каждого подписчика против
+одного просмотра текста с инвертированным индексом
+
+У каждого из N подписчиков ~30 ключевых слов и несколько стоп-слов из общего
+словаря. Наивный способ проверяет текст отдельно для каждого подписчика
+(как TelegramNotifier.should_notify), SubscriptionMatcher - один раз для всех.
+Результаты обоих способов сверяются.
+
+Запуск: python benchmarks/bench_subscriptions.py --subscribers 10 100 1000 --items 300
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from matcher import KeywordMatcher  # noqa: E402
+from subscriptions import Subscription, SubscriptionMatcher  # noqa: E402
+
+
+def vocabulary(size, rng):
+    """Синтетический словарь терминов"""
+    letters = "абвгдеклмнопрстуxyzpqw"
+    return sorted({"".join(rng.choice(letters) for _ in range(rng.randint(4, 9))) for _ in range(size * 2)})[:size]
+
+
+def make_subscriptions(count, words, rng):
+    subscriptions = []
+    for chat_id in range(count):
+        subscriptions.append(Subscription(
+            1000 + chat_id,
+            rng.sample(words, 30),
+            rng.sample(words, 3),
+            rng.sample(range(1, 42), 5) if chat_id % 3 == 0 else (),
+            [5] if chat_id % 10 == 0 else (),
+        ))
+    return subscriptions
+
+
+def make_items(count, words, rng):
+    items = []
+    filler = "нужно сделать проект срочно бюджет договорной опыт работы".split()
+    for _ in range(count):
+        text = " ".join(rng.choice(filler) if rng.random() < 0.8 else rng.choice(words) for _ in range(120))
+        items.append((text, rng.randint(1, 41)))
+    return items
+
+
+class NaiveRouter:
+    """Отдельные сопоставители на каждого подписчика"""
+
+    def __init__(self, subscriptions):
+        self.subscriptions = [
+            (subscription, KeywordMatcher(subscription.keywords), KeywordMatcher(subscription.stopwords))
+            for subscription in subscriptions
+        ]
+
+    def route(self, text, category):
+        chat_ids = []
+        for subscription, keywords, stopwords in self.subscriptions:
+            if not subscription.allows_category(category):
+                continue
+            if category not in subscription.urgent and not keywords.matches(text):
+                continue
+            if stopwords.matches(text):
+                continue
+            chat_ids.append(subscription.chat_id)
+        return chat_ids
+
+
+def measure(router, items):
+    started = time.perf_counter()
+    results = [router.route(text, category) for text, category in items]
+    return (time.perf_counter() - started) / len(items), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--subscribers', type=int, nargs='+', default=[10, 100, 1000], help='числа подписчиков')
+    parser.add_argument('--items', type=int, default=300, help='проектов на замер')
+    parser.add_argument('--vocabulary', type=int, default=2000, help='размер общего словаря')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = vocabulary(args.vocabulary, rng)
+    items = make_items(args.items, words, rng)
+
+    print(f"{'подписчиков':>12} {'наивно, мкс':>13} {'индекс, мкс':>13} {'ускорение':>10} {'получателей':>12}")
+    for count in args.subscribers:
+        subscriptions = make_subscriptions(count, words, rng)
+        naive_time, naive = measure(NaiveRouter(subscriptions), items)
+        indexed_time, indexed = measure(SubscriptionMatcher(subscriptions), items)
+        assert naive == indexed, "результаты маршрутизации расходятся"
+        recipients = sum(len(chat_ids) for chat_ids in indexed) / len(items)
+        print(f"{count:>12} {naive_time * 1e6:>13.1f} {indexed_time * 1e6:>13.1f} "
+              f"{naive_time / indexed_time:>9.1f}x {recipients:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
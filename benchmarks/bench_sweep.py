@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк полного прохода по категориям: последовательный обход против AsyncFeedFetcher
+
+Запуск: python benchmarks/bench_sweep.py --categories 30 --latency 0.5
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stub_server import StubRSSServer  # noqa: E402
+from database import RSSDatabase  # noqa: E402
+from fetcher import HostRateLimiter, run_sweep  # noqa: E402
+import get_rss_text  # noqa: E402
+
+
+def sweep_serial(categories, base_url, db):
+    """Последовательный обход, как в прежнем parse_rss (без пауз между запросами)"""
+    for category in categories:
+        response = get_rss_text.get_rss_data(f"{base_url}{category}")
+        get_rss_text.process_category_response(category, response, db)
+
+
+def sweep_async(categories, base_url, db, rate, concurrency):
+    """Проход через асинхронный движок с ограничением частоты"""
+    limiter = HostRateLimiter(rate_per_minute=rate, burst=concurrency, jitter=(0.0, 0.0))
+    run_sweep(categories, get_rss_text.get_rss_data,
+              lambda category, response: get_rss_text.process_category_response(category, response, db),
+              base_url, rate_limiter=limiter, max_concurrency=concurrency)
+
+
+def measure(label, func):
+    """Выполняет проход на чистой временной БД и печатает время"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = RSSDatabase(os.path.join(tmp, 'bench.db'))
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func(db)
+        elapsed = time.perf_counter() - started
+    print(f"{label:<40} {elapsed:8.2f} сек")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--categories', type=int, default=30, help='число категорий в проходе')
+    parser.add_argument('--latency', type=float, default=0.5, help='задержка ответа заглушки, сек')
+    parser.add_argument('--items', type=int, default=30, help='элементов в каждой ленте')
+    parser.add_argument('--rate', type=float, default=600, help='лимит запросов в минуту на хост')
+    parser.add_argument('--concurrency', type=int, default=8, help='максимум параллельных запросов')
+    args = parser.parse_args()
+
+    logging.getLogger('telegram_bot').setLevel(logging.ERROR)
+    categories = list(range(1, args.categories + 1))
+
+    print(f"Категорий: {args.categories}, задержка сервера: {args.latency} сек, "
+          f"элементов в ленте: {args.items}")
+    with StubRSSServer(latency=args.latency, items_per_feed=args.items) as server:
+        serial = measure("Последовательно (без пауз)",
+                         lambda db: sweep_serial(categories, server.base_url, db))
+        parallel = measure(f"AsyncFeedFetcher ({args.rate:g}/мин, x{args.concurrency})",
+                           lambda db: sweep_async(categories, server.base_url, db,
+                                                  args.rate, args.concurrency))
+
+    old_pauses = 210.0 * (args.categories - 1)
+    print(f"Ускорение относительно последовательного обхода: x{serial / parallel:.1f}")
+    print(f"Прежний parse_rss с паузами 60-360 сек: ~{(serial + old_pauses) / 60:.0f} мин в среднем")
+
+
+if __name__ == '__main__':
+    main()
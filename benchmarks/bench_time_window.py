@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк выборок по окну времени: фильтрация в Python против диапазона по индексу
+
+1. get_recent_items: прежняя реализация читала всю таблицу и разбирала created_at
+   каждой записи в Python, новая - WHERE created_at >= ... по индексу idx_created_id.
+   Базы разного размера с одинаковой плотностью (--per-day записей в сутки), так что
+   окно в N дней содержит одно и то же число записей: время новой выборки должно
+   оставаться постоянным, прежней - расти вместе с таблицей.
+2. iter_items_window по pub_ts (дата публикации) пачками - то же окно по дате публикации.
+3. Порядок ORDER BY pub_date DESC (строка RFC-822 сортируется по дню недели)
+   против ORDER BY pub_ts DESC: сколько из первых --top записей действительно
+   входят в --top самых новых.
+
+Запуск: python benchmarks/bench_time_window.py --rows 100000 1000000 --days 1 7
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import RSSDatabase  # noqa: E402
+from feed_parser import parse_pub_date  # noqa: E402
+
+CATEGORIES = 40
+
+
+def fill(db, rows, per_day):
+    """
+    rows записей, по per_day в сутки; pub_date - RFC-822, как в ленте. Записи сдвинуты
+    на полшага от границ суток, чтобы граница окна не попадала на запись между замерами
+    """
+    seconds = rows * 86400 // per_day
+    now = time.time() - 43200 // per_day
+    with db.connection() as conn:
+        conn.create_function('rfc822', 1, lambda offset: formatdate(now - offset, usegmt=True))
+        conn.execute(f'''
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {rows})
+            INSERT INTO rss_items (title, description, link, pub_date, category, created_at, pub_ts)
+            SELECT 'Проект ' || i, 'Описание проекта номер ' || i, 'https://www.fl.ru/projects/' || i || '/',
+                   rfc822(({rows} - i) * {seconds} / {rows}), i % {CATEGORIES} + 1,
+                   datetime('now', '-' || (({rows} - i) * {seconds} / {rows} + {43200 // per_day}) || ' seconds'), NULL
+            FROM n
+        ''')
+        conn.execute('UPDATE rss_items SET pub_ts = parse_pub_date(pub_date)')
+
+
+def legacy_recent_items(db, days):
+    """Прежний get_recent_items: вся таблица в Python и разбор даты каждой записи"""
+    with db.connection() as conn:
+        all_items = conn.execute('''
+            SELECT id, title, description, link, pub_date, category, created_at
+            FROM rss_items
+            ORDER BY created_at DESC
+        ''').fetchall()
+    recent_items = []
+    cutoff_date = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+    for item in all_items:
+        try:
+            item_date = datetime.fromisoformat(item[6])
+        except ValueError:
+            continue
+        if item_date >= cutoff_date:
+            recent_items.append(item)
+    return recent_items
+
+
+def window_items(db, days):
+    return [row for chunk in db.iter_items_window(since=time.time() - days * 86400, field='pub_ts')
+            for row in chunk]
+
+
+def best_of(function, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return result, min(timings)
+
+
+def newest_hits(conn, order, top):
+    """Сколько из первых top записей в порядке order входят в top самых новых публикаций"""
+    newest = sorted((parse_pub_date(row[1]), row[0]) for row in conn.execute('SELECT id, pub_date FROM rss_items'))
+    expected = {item_id for _, item_id in newest[-top:]}
+    shown = conn.execute(f'SELECT id FROM rss_items ORDER BY {order} LIMIT ?', (top,)).fetchall()
+    return sum(1 for row in shown if row[0] in expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000], help='размеры баз')
+    parser.add_argument('--days', type=float, nargs='+', default=[1, 7], help='размеры окна, дней')
+    parser.add_argument('--per-day', type=int, default=1000, help='записей в сутки')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=50, help='первых записей для проверки порядка')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Окно по времени (лучшее из {args.repeat}), {args.per_day} записей в сутки:")
+        print(f"  {'записей':>9} {'окно':>6} {'в окне':>7}  {'Python':>10}  {'created_at':>10}  "
+              f"{'pub_ts':>10}  {'ускорение':>9}")
+        for rows in args.rows:
+            db = RSSDatabase(os.path.join(tmp, f'window_{rows}.db'))
+            fill(db, rows, args.per_day)
+            for days in args.days:
+                legacy, old = best_of(lambda: legacy_recent_items(db, days), max(1, args.repeat // 2))
+                recent, new = best_of(lambda: db.get_recent_items(days), args.repeat)
+                published, stream = best_of(lambda: window_items(db, days), args.repeat)
+                same = [row[0] for row in legacy] == [row[0] for row in recent]
+                print(f"  {rows:>9} {days:>4g} д {len(recent):>7}  {old * 1000:7.1f} мс  {new * 1000:7.2f} мс  "
+                      f"{stream * 1000:7.2f} мс  {old / new:8.0f}x"
+                      f"{'' if same else '  РАСХОЖДЕНИЕ'}")
+
+            with db.connection() as conn:
+                by_string = newest_hits(conn, 'pub_date DESC', args.top)
+                by_ts = newest_hits(conn, 'pub_ts DESC, id DESC', args.top)
+            print(f"  {'':>9} из первых {args.top}: ORDER BY pub_date - {by_string} новейших, "
+                  f"ORDER BY pub_ts - {by_ts}")
+            db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест веб-интерфейса: запросов в секунду и задержки
+
+Сервер запускается отдельным процессом на временной базе (--rows записей):
+- dev:  app.run(threaded=True) с одним соединением записи, как python viewdatabase.py
+        (без отладчика и перезагрузки);
+- wsgi: python wsgi.py --workers N, пулы соединений только для чтения.
+
+Клиенты - --clients процессов по --threads потоков с постоянными HTTP-соединениями;
+запросы по кругу: главная страница, /api/items (глубокая страница по курсору),
+/api/item/<id>, /api/stats с If-None-Match (304, пока данные не изменились).
+Каждый режим прогоняется без записи и с параллельной записью: пачки по
+ITEM_BATCH_SIZE проектов каждые --write-interval сек, как при работе парсера;
+для записи выводится p95 времени сохранения пачки.
+
+Запуск: python benchmarks/bench_web_load.py --seconds 5 --workers 4
+"""
+
+import argparse
+import http.client
+import math
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import ITEM_BATCH_SIZE  # noqa: E402
+from database import RSSDatabase, encode_cursor  # noqa: E402
+
+CATEGORIES = 40
+
+DEV_SERVER = '''
+import logging, sys
+import viewdatabase
+logging.getLogger('werkzeug').setLevel(logging.WARNING)
+viewdatabase.init_web_interface(sys.argv[1])
+viewdatabase.app.run(host='127.0.0.1', port=int(sys.argv[2]), threaded=True)
+'''
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(len(ordered) * fraction) - 1))]
+
+
+def fill(db, rows):
+    with db.connection() as conn:
+        conn.execute(f'''
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {rows})
+            INSERT INTO rss_items (title, description, link, pub_date, category, created_at)
+            SELECT 'Проект ' || i, 'Описание проекта номер ' || i, 'https://www.fl.ru/projects/' || i || '/',
+                   '', i % {CATEGORIES} + 1, datetime('now', '-' || ({rows} - i) || ' minutes')
+            FROM n
+        ''')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, db_path, port, workers):
+    if mode == 'dev':
+        command = [sys.executable, '-c', DEV_SERVER, db_path, str(port)]
+    else:
+        command = [sys.executable, os.path.join(ROOT, 'wsgi.py'), '--host', '127.0.0.1', '--port', str(port),
+                   '--workers', str(workers), '--db', db_path]
+    process = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"Сервер {mode} не запустился")
+
+
+def client_thread(port, urls, max_id, deadline, results, seed):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    etag = None
+    count = errors = 0
+    latencies = []
+    while time.perf_counter() < deadline:
+        url = rng.choice(urls)
+        if url == '{item}':
+            url = f'/api/item/{rng.randint(1, max_id)}'
+        headers = {'If-None-Match': etag} if url == '/api/stats' and etag else {}
+        started = time.perf_counter()
+        try:
+            conn.request('GET', url, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if url == '/api/stats' and response.getheader('ETag'):
+                etag = response.getheader('ETag')
+            if response.status not in (200, 304, 404):
+                errors += 1
+            if response.will_close:
+                conn.close()
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+        latencies.append(time.perf_counter() - started)
+        count += 1
+    conn.close()
+    results.append((count, errors, latencies))
+
+
+def client_process(args):
+    port, urls, max_id, duration, threads, seed = args
+    deadline = time.perf_counter() + duration
+    results = []
+    workers = [threading.Thread(target=client_thread,
+                                args=(port, urls, max_id, deadline, results, seed * 100 + number))
+               for number in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    count = sum(result[0] for result in results)
+    errors = sum(result[1] for result in results)
+    latencies = [value for result in results for value in result[2]]
+    return count, errors, latencies
+
+
+def writer(db_path, stop, interval, timings, first_id):
+    """Парсер: пачки новых проектов каждые interval сек"""
+    db = RSSDatabase(db_path)
+    number = first_id
+    while not stop.wait(interval):
+        items = [(f'Новый проект {i}', 'описание', f'https://www.fl.ru/projects/new-{i}/', '', i % CATEGORIES + 1)
+                 for i in range(number, number + ITEM_BATCH_SIZE)]
+        number += ITEM_BATCH_SIZE
+        started = time.perf_counter()
+        db.add_items_bulk(items)
+        timings.append(time.perf_counter() - started)
+    db.close()
+
+
+def run_load(port, urls, max_id, args):
+    with multiprocessing.Pool(args.clients) as pool:
+        results = pool.map(client_process, [(port, urls, max_id, args.seconds, args.threads, seed)
+                                            for seed in range(args.clients)])
+    count = sum(result[0] for result in results)
+    errors = sum(result[1] for result in results)
+    latencies = [value for result in results for value in result[2]]
+    return count, errors, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help='записей в базе')
+    parser.add_argument('--seconds', type=float, default=5, help='длительность каждого прогона')
+    parser.add_argument('--clients', type=int, default=2, help='клиентских процессов')
+    parser.add_argument('--threads', type=int, default=8, help='потоков в клиентском процессе')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='процессов wsgi.py')
+    parser.add_argument('--write-interval', type=float, default=0.2, help='пауза между пачками записи, сек')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'load.db')
+        db = RSSDatabase(db_path)
+        fill(db, args.rows)
+        deep = db.conn.execute('SELECT created_at, id FROM rss_items ORDER BY created_at DESC, id DESC '
+                               'LIMIT 1 OFFSET ?', (args.rows // 2,)).fetchone()
+        db.close()
+        urls = ['/?per_page=50', f'/api/items?per_page=50&after={encode_cursor(*deep)}',
+                '/api/items?per_page=50&category=7', '{item}', '/api/stats', '/api/stats']
+
+        print(f"База: {args.rows} записей; клиентов {args.clients} x {args.threads} потоков, "
+              f"прогон {args.seconds:g} сек, CPU: {os.cpu_count()}")
+        print(f"  {'режим':<24} {'запросов/с':>10} {'p50, мс':>8} {'p95, мс':>8} {'ошибок':>7} {'запись p95, мс':>15}")
+        next_id = 0
+        for mode in ('dev', 'wsgi'):
+            label = 'dev (app.run)' if mode == 'dev' else f'wsgi.py, {args.workers} проц.'
+            port = free_port()
+            server = start_server(mode, db_path, port, args.workers)
+            try:
+                for writing in (False, True):
+                    stop = threading.Event()
+                    write_timings = []
+                    thread = None
+                    if writing:
+                        thread = threading.Thread(target=writer, args=(db_path, stop, args.write_interval,
+                                                                       write_timings, next_id))
+                        thread.start()
+                    count, errors, latencies = run_load(port, urls, args.rows, args)
+                    if thread is not None:
+                        stop.set()
+                        thread.join()
+                        next_id += len(write_timings) * ITEM_BATCH_SIZE
+                    write = f"{percentile(write_timings, 0.95) * 1000:15.1f}" if writing else f"{'-':>15}"
+                    print(f"  {label + (' + запись' if writing else ''):<24} {count / args.seconds:10.0f} "
+                          f"{percentile(latencies, 0.5) * 1000:8.1f} {percentile(latencies, 0.95) * 1000:8.1f} "
+                          f"{errors:7d} {write}")
+            finally:
+                server.terminate()
+                server.wait(timeout=10)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Локальная заглушка Telegram Bot API (sendMessage) с лимитами частоты для бенчмарков
+
+Ограничения как у Telegram: не больше N сообщений в минуту в один чат
+и M сообщений в секунду всего; при превышении - 429 с retry_after.
+"""
+
+import json
+import math
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    """Не печатает обрывы соединений клиентом (прежний вариант закрывает event loop посреди запроса)"""
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeBotAPI:
+    """Многопоточный сервер, отвечающий на sendMessage в формате Bot API"""
+
+    def __init__(self, latency: float = 0.0, chat_per_minute: int = 20, global_per_second: int = 30):
+        self.latency = latency
+        self.chat_per_minute = chat_per_minute
+        self.global_per_second = global_per_second
+        self.delivered = []  # (chat_id, text, время доставки)
+        self.requests = 0
+        self.throttled = 0
+        self._chat_sent = defaultdict(deque)
+        self._global_sent = deque()
+        self._lock = threading.Lock()
+        self.httpd = _QuietHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def _retry_after(self, chat_id, now: float) -> int:
+        """Секунды до освобождения лимита (0 - сообщение можно принять)"""
+        chat_sent = self._chat_sent[chat_id]
+        while chat_sent and now - chat_sent[0] >= 60:
+            chat_sent.popleft()
+        while self._global_sent and now - self._global_sent[0] >= 1:
+            self._global_sent.popleft()
+
+        wait = 0.0
+        if len(chat_sent) >= self.chat_per_minute:
+            wait = max(wait, 60 - (now - chat_sent[0]))
+        if len(self._global_sent) >= self.global_per_second:
+            wait = max(wait, 1 - (now - self._global_sent[0]))
+        return math.ceil(wait) if wait > 0 else 0
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def _reply(self, status: int, payload: dict):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+                if self.headers.get('Content-Type', '').startswith('application/json'):
+                    params = json.loads(body or '{}')
+                else:
+                    params = {key: values[0] for key, values in parse_qs(body).items()}
+                if not self.path.endswith('/sendMessage'):
+                    self._reply(404, {'ok': False, 'error_code': 404, 'description': 'Not Found'})
+                    return
+
+                chat_id = str(params.get('chat_id', '')).strip('"')
+                if server.latency:
+                    threading.Event().wait(server.latency)
+
+                with server._lock:
+                    server.requests += 1
+                    now = time.monotonic()
+                    retry_after = server._retry_after(chat_id, now)
+                    if retry_after:
+                        server.throttled += 1
+                    else:
+                        server._chat_sent[chat_id].append(now)
+                        server._global_sent.append(now)
+                        server.delivered.append((chat_id, params.get('text', ''), now))
+                        message_id = len(server.delivered)
+
+                if retry_after:
+                    self._reply(429, {
+                        'ok': False, 'error_code': 429,
+                        'description': f'Too Many Requests: retry after {retry_after}',
+                        'parameters': {'retry_after': retry_after}
+                    })
+                    return
+
+                chat = int(chat_id) if chat_id.lstrip('-').isdigit() else chat_id
+                self._reply(200, {'ok': True, 'result': {
+                    'message_id': message_id, 'date': int(time.time()),
+                    'chat': {'id': chat, 'type': 'private'}, 'text': params.get('text', '')
+                }})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    @property
+    def base_url(self) -> str:
+        """Базовый URL в формате TELEGRAM_API_URL"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Локальный HTTP-сервер-заглушка, отдающий синтетические RSS-ленты FL.ru для бенчмарков
+"""
+
+import threading
+import zlib
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from xml.sax.saxutils import escape
+
+
+def build_feed(category: int, items: int = 30, offset: int = 0) -> bytes:
+    """Строит синтетическую RSS-ленту категории (новые элементы сверху)"""
+    parts = ['<?xml version="1.0" encoding="utf-8"?>\n<rss version="2.0"><channel>',
+             f'<title>FL.ru category {category}</title>']
+    for i in range(offset + items, offset, -1):
+        title = escape(f"Проект {i} в категории {category}: python бот для telegram")
+        description = escape(f"Описание проекта {i}. Нужно написать скрипт автоматизации. " * 4)
+        parts.append(
+            f'<item><title>{title}</title>'
+            f'<link>https://www.fl.ru/projects/{category}{i:07d}/</link>'
+            f'<description>{description}</description>'
+            f'<pubDate>{formatdate(1700000000 + i * 60)}</pubDate></item>'
+        )
+    parts.append('</channel></rss>')
+    return ''.join(parts).encode('utf-8')
+
+
+class StubRSSServer:
+    """Многопоточный сервер с настраиваемой задержкой ответа"""
+
+    def __init__(self, latency: float = 0.0, items_per_feed: int = 30, throttle_every: int = 0):
+        """throttle_every=N - каждый N-й запрос получает 429 с Retry-After: 0"""
+        self.latency = latency
+        self.items_per_feed = items_per_feed
+        self.throttle_every = throttle_every
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    throttled = server.throttle_every and server.requests % server.throttle_every == 0
+                if throttled:
+                    self.send_response(429)
+                    self.send_header('Retry-After', '0')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                query = parse_qs(urlparse(self.path).query)
+                category = int(query.get('category', ['1'])[0])
+                if server.latency:
+                    threading.Event().wait(server.latency)
+                body = build_feed(category, server.items_per_feed)
+                etag = '"%x"' % zlib.crc32(body)
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Type', 'application/rss+xml; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    @property
+    def base_url(self) -> str:
+        """Базовый URL в формате RSS_BASE_URL"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/rss/all.xml?category="
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
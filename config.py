@@ -12,12 +12,110 @@ load_dotenv()
 # Telegram настройки (из .env)
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org/bot')
+
+# Очередь доставки уведомлений: лимиты Telegram (общий и на один чат) и повторы
+TELEGRAM_GLOBAL_RATE_PER_SECOND = float(os.getenv('TELEGRAM_GLOBAL_RATE_PER_SECOND', '30'))
+TELEGRAM_CHAT_RATE_PER_MINUTE = float(os.getenv('TELEGRAM_CHAT_RATE_PER_MINUTE', '20'))
+TELEGRAM_CHAT_BURST = int(os.getenv('TELEGRAM_CHAT_BURST', '3'))
+TELEGRAM_SEND_RETRIES = int(os.getenv('TELEGRAM_SEND_RETRIES', '5'))
+# Сколько секунд ждать доставки очереди в конце прохода
+NOTIFY_FLUSH_TIMEOUT = float(os.getenv('NOTIFY_FLUSH_TIMEOUT', '120'))
+
+# Дайджест: проекты копятся NOTIFY_DIGEST_WINDOW секунд или до NOTIFY_DIGEST_MAX_ITEMS штук
+# и отправляются одним сообщением; о срочных категориях уведомляем всегда и сразу
+NOTIFY_DIGEST = os.getenv('NOTIFY_DIGEST', 'false').lower() in ('1', 'true', 'yes')
+NOTIFY_DIGEST_WINDOW = float(os.getenv('NOTIFY_DIGEST_WINDOW', '60'))
+NOTIFY_DIGEST_MAX_ITEMS = int(os.getenv('NOTIFY_DIGEST_MAX_ITEMS', '25'))
+NOTIFY_URGENT_CATEGORIES = {
+    int(category) for category in os.getenv('NOTIFY_URGENT_CATEGORIES', '5').split(',') if category.strip()
+}
+
+# Outbox: повторная отправка недоставленных уведомлений с экспоненциальной задержкой
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '100'))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '8'))
+OUTBOX_RETRY_BASE = float(os.getenv('OUTBOX_RETRY_BASE', '30'))
+OUTBOX_RETRY_MAX = float(os.getenv('OUTBOX_RETRY_MAX', '3600'))
+
+# Режим сопоставления ключевых слов и стоп-слов: substring, word или phrase
+FILTER_MATCH_MODE = os.getenv('FILTER_MATCH_MODE', 'substring')
+# Интервал проверки изменений filterList.ini, stopwords.ini и included_categories.txt (сек)
+FILTER_RELOAD_INTERVAL = float(os.getenv('FILTER_RELOAD_INTERVAL', '2'))
 
 # HTTP настройки (из .env с fallback значениями)
 USER_AGENT = os.getenv('USER_AGENT', 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
 COOKIES = os.getenv('COOKIES', '')
 REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', '30'))
 
+# HTTP-сессия: пул соединений и повторы на 429/5xx с экспоненциальной задержкой
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '8'))
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '3'))
+HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', '2'))
+HTTP_MAX_BACKOFF = float(os.getenv('HTTP_MAX_BACKOFF', '300'))
+
+# Параллельная загрузка категорий (ограничение частоты запросов к одному хосту)
+FETCH_MAX_CONCURRENCY = int(os.getenv('FETCH_MAX_CONCURRENCY', '4'))
+FETCH_RATE_PER_MINUTE = float(os.getenv('FETCH_RATE_PER_MINUTE', '6'))
+FETCH_BURST = int(os.getenv('FETCH_BURST', '2'))
+FETCH_JITTER_MIN = float(os.getenv('FETCH_JITTER_MIN', '1'))
+FETCH_JITTER_MAX = float(os.getenv('FETCH_JITTER_MAX', '5'))
+
+# Ранняя остановка разбора ленты после K известных ссылок подряд (0 - отключено)
+EARLY_STOP_AFTER_KNOWN = int(os.getenv('EARLY_STOP_AFTER_KNOWN', '5'))
+
+# Размер пачки элементов, сохраняемых в БД одной транзакцией
+ITEM_BATCH_SIZE = int(os.getenv('ITEM_BATCH_SIZE', '100'))
+
+# Адаптивный планировщик: интервал опроса категории подбирается так, чтобы за опрос
+# приходило около SCHEDULER_TARGET_NEW новых проектов (в пределах MIN..MAX секунд)
+SCHEDULER_MIN_INTERVAL = float(os.getenv('SCHEDULER_MIN_INTERVAL', '300'))
+SCHEDULER_MAX_INTERVAL = float(os.getenv('SCHEDULER_MAX_INTERVAL', '7200'))
+SCHEDULER_INITIAL_INTERVAL = float(os.getenv('SCHEDULER_INITIAL_INTERVAL', '1800'))
+SCHEDULER_TARGET_NEW = float(os.getenv('SCHEDULER_TARGET_NEW', '3'))
+# Вес последнего опроса в сглаженной частоте публикаций (0..1)
+SCHEDULER_RATE_SMOOTHING = float(os.getenv('SCHEDULER_RATE_SMOOTHING', '0.3'))
+# Категории со сроком в пределах стольких секунд опрашиваются тем же проходом
+SCHEDULER_COALESCE = float(os.getenv('SCHEDULER_COALESCE', '60'))
+# Окно опроса ЧЧ:ММ-ЧЧ:ММ по местному времени (пусто - круглосуточно)
+SCHEDULER_ACTIVE_HOURS = os.getenv('SCHEDULER_ACTIVE_HOURS', '09:00-17:30')
+
+# Метрики Prometheus: экспортёр /metrics в процессе парсера (порт 0 - не запускать)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9108'))
+# Адрес экспортёра: по умолчанию только локальный (у /metrics нет авторизации); 0.0.0.0 - все интерфейсы
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+# Веб-интерфейс: кэш счётчиков и статистики сбрасывается при добавлении или удалении записей
+# и не реже чем раз в столько секунд (окно статистики по дням сдвигается со временем)
+VIEW_CACHE_TTL = float(os.getenv('VIEW_CACHE_TTL', '60'))
+# Глубина листания результатов полнотекстового поиска: они ранжированы по bm25 и листаются
+# через OFFSET, поэтому доступны только первые SEARCH_MAX_RESULTS (уточните запрос)
+SEARCH_MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', '1000'))
+# Рабочий режим веб-интерфейса (wsgi.py): адрес, число процессов и соединений чтения на процесс
+WEB_HOST = os.getenv('WEB_HOST', '0.0.0.0')
+WEB_PORT = int(os.getenv('WEB_PORT', '5000'))
+WEB_WORKERS = int(os.getenv('WEB_WORKERS', str(os.cpu_count() or 2)))
+WEB_READ_POOL_SIZE = int(os.getenv('WEB_READ_POOL_SIZE', '8'))
+
+# Хранение: проекты старше RETENTION_MAX_AGE_DAYS дней и сверх RETENTION_MAX_ROWS_PER_CATEGORY
+# самых новых в категории переносятся в помесячные архивы RETENTION_ARCHIVE_DIR (0 - без ограничения)
+RETENTION_MAX_AGE_DAYS = float(os.getenv('RETENTION_MAX_AGE_DAYS', '365'))
+RETENTION_MAX_ROWS_PER_CATEGORY = int(os.getenv('RETENTION_MAX_ROWS_PER_CATEGORY', '0'))
+RETENTION_ARCHIVE_DIR = os.getenv('RETENTION_ARCHIVE_DIR', 'archive')
+# Записей в одной транзакции переноса и пауза между пачками (сек) - запись парсера не ждёт дольше пачки
+RETENTION_BATCH_SIZE = int(os.getenv('RETENTION_BATCH_SIZE', '500'))
+RETENTION_BATCH_PAUSE = float(os.getenv('RETENTION_BATCH_PAUSE', '0.05'))
+# Интервал архивирования и сжатия базы в работающем планировщике, сек (0 - не запускать)
+RETENTION_INTERVAL = float(os.getenv('RETENTION_INTERVAL', '21600'))
+
+# Почти дубликаты (тот же проект под новой ссылкой или в другой категории): сходство текста
+# не ниже NEAR_DUPLICATE_THRESHOLD с проектом за последние NEAR_DUPLICATE_WINDOW_DAYS дней.
+# Уведомление о повторе: thread - ответом на уведомление об оригинале, suppress - не отправлять,
+# notify - как о новом, off - не искать
+NEAR_DUPLICATE_MODE = os.getenv('NEAR_DUPLICATE_MODE', 'thread')
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.7'))
+NEAR_DUPLICATE_WINDOW_DAYS = float(os.getenv('NEAR_DUPLICATE_WINDOW_DAYS', '30'))
+
 # Форматы дат
 DISPLAY_DATE_FORMAT = os.getenv('DISPLAY_DATE_FORMAT', '%Y-%m-%d %H:%M:%S')
 
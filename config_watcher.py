@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Горячая перезагрузка фильтров и списка категорий
+
+Следит за изменением filterList.ini, stopwords.ini и included_categories.txt
+(опрос mtime/размера в фоновом потоке) и атомарно подменяет снимок
+с перекомпилированными сопоставителями. Каждая подмена увеличивает
+номер поколения и пишет в лог, что изменилось.
+"""
+
+import configparser
+import logging
+import os
+import threading
+from typing import FrozenSet, Optional, Set
+
+from config import FILTER_MATCH_MODE, FILTER_RELOAD_INTERVAL
+from matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+KEYWORDS_FILE = "filterList.ini"
+STOPWORDS_FILE = "stopwords.ini"
+CATEGORIES_FILE = "included_categories.txt"
+
+# Категории по умолчанию, если файл не найден
+DEFAULT_CATEGORIES = frozenset(range(1, 11))
+
+
+def load_terms(file_path: str, section: str, strict: bool = False) -> Set[str]:
+    """
+    Загрузка терминов из секции ini-файла (или построчно, если секции нет).
+    strict=True - ошибки чтения пробрасываются, а не дают пустой набор
+    """
+    terms = set()
+
+    if not os.path.exists(file_path):
+        if strict:
+            raise FileNotFoundError(file_path)
+        logger.warning(f"Файл {file_path} не найден")
+        return terms
+
+    try:
+        config = configparser.ConfigParser()
+        try:
+            config.read(file_path, encoding='utf-8')
+        except configparser.Error:
+            # Секция со строками без "ключ = значение" - читаем как обычный текстовый файл ниже
+            config = None
+
+        if config is not None and section in config:
+            for key, value in config[section].items():
+                if value.strip():
+                    terms.add(value.strip().lower())
+
+        # Если секция не найдена, читаем как обычный текстовый файл
+        if not terms:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#') and not line.startswith('['):
+                        terms.add(line.lower())
+
+    except Exception as e:
+        if strict:
+            raise
+        logger.error(f"Ошибка при загрузке {file_path}: {e}")
+
+    return terms
+
+
+def load_categories(file_path: str = CATEGORIES_FILE, strict: bool = False) -> Set[int]:
+    """Загрузка списка категорий для опроса (все категории по умолчанию, если файла нет)"""
+    included = set()
+
+    if not os.path.exists(file_path):
+        if strict:
+            raise FileNotFoundError(file_path)
+        print(f"Файл {file_path} не найден. Будут опрошены все категории.")
+        return set(DEFAULT_CATEGORIES)
+
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                # Пропускаем пустые строки и комментарии
+                if line and not line.startswith('#'):
+                    try:
+                        category = int(line)
+                        included.add(category)
+                    except ValueError:
+                        print(f"Предупреждение: некорректный номер категории '{line}' в файле {file_path}")
+    except Exception as e:
+        if strict:
+            raise
+        print(f"Ошибка при чтении файла {file_path}: {e}")
+
+    return included
+
+
+class FilterSnapshot:
+    """Неизменяемый снимок фильтров и категорий одного поколения"""
+
+    __slots__ = ('generation', 'keywords', 'stopwords', 'categories', 'keyword_matcher', 'stopword_matcher')
+
+    def __init__(self, generation: int, keywords: Set[str], stopwords: Set[str], categories: Set[int],
+                 mode: str = FILTER_MATCH_MODE):
+        self.generation = generation
+        self.keywords: FrozenSet[str] = frozenset(keywords)
+        self.stopwords: FrozenSet[str] = frozenset(stopwords)
+        self.categories: FrozenSet[int] = frozenset(categories)
+        self.keyword_matcher = KeywordMatcher(self.keywords, mode)
+        self.stopword_matcher = KeywordMatcher(self.stopwords, mode)
+
+
+class ConfigWatcher:
+    """Отслеживает файлы фильтров и категорий и подменяет текущий снимок при их изменении"""
+
+    def __init__(self, keywords_path: str = KEYWORDS_FILE, stopwords_path: str = STOPWORDS_FILE,
+                 categories_path: str = CATEGORIES_FILE, interval: float = FILTER_RELOAD_INTERVAL,
+                 mode: str = FILTER_MATCH_MODE):
+        self.keywords_path = keywords_path
+        self.stopwords_path = stopwords_path
+        self.categories_path = categories_path
+        self.interval = interval
+        self.mode = mode
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._signature = self._file_signature()
+        self._failed_signature = None
+
+        # Первая загрузка - как раньше: отсутствующие файлы дают значения по умолчанию
+        self.current = FilterSnapshot(
+            1,
+            load_terms(keywords_path, 'keywords'),
+            load_terms(stopwords_path, 'stopwords'),
+            load_categories(categories_path),
+            mode
+        )
+        logger.info(f"Загружено {len(self.current.keywords)} ключевых слов, "
+                     f"{len(self.current.stopwords)} стоп-слов, {len(self.current.categories)} категорий")
+
+    @property
+    def generation(self) -> int:
+        return self.current.generation
+
+    def _file_signature(self):
+        """(mtime_ns, размер) каждого файла; None - файл отсутствует"""
+        signature = []
+        for path in (self.keywords_path, self.stopwords_path, self.categories_path):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def check(self) -> bool:
+        """Перечитывает файлы, если они изменились; возвращает True при смене поколения"""
+        with self._lock:
+            signature = self._file_signature()
+            if signature == self._signature or signature == self._failed_signature:
+                return False
+
+            # Исчезновение ранее существовавшего файла - ошибка, а не пустой набор
+            strict_keywords, strict_stopwords, strict_categories = (
+                previous is not None for previous in self._signature
+            )
+            try:
+                keywords = load_terms(self.keywords_path, 'keywords', strict=strict_keywords)
+                stopwords = load_terms(self.stopwords_path, 'stopwords', strict=strict_stopwords)
+                categories = load_categories(self.categories_path, strict=strict_categories)
+            except Exception as e:
+                # Файл мог быть удалён или записан частично (например, во время сохранения
+                # редактором) - оставляем прежний снимок и повторим при следующем изменении
+                self._failed_signature = signature
+                logger.warning(f"Не удалось перечитать фильтры, используется поколение {self.generation}: {e}")
+                return False
+
+            self._signature = signature
+            previous = self.current
+            if (keywords == previous.keywords and stopwords == previous.stopwords
+                    and categories == previous.categories):
+                return False
+
+            snapshot = FilterSnapshot(previous.generation + 1, keywords, stopwords, categories, self.mode)
+            self.current = snapshot  # атомарная подмена ссылки
+            self._log_changes(previous, snapshot)
+            return True
+
+    @staticmethod
+    def _log_changes(previous: FilterSnapshot, snapshot: FilterSnapshot):
+        """Пишет в лог добавленные и удалённые термины и категории"""
+        changes = []
+        for label, old, new in (('ключевые слова', previous.keywords, snapshot.keywords),
+                                ('стоп-слова', previous.stopwords, snapshot.stopwords),
+                                ('категории', previous.categories, snapshot.categories)):
+            added, removed = sorted(new - old), sorted(old - new)
+            if added:
+                changes.append(f"{label} +{added}")
+            if removed:
+                changes.append(f"{label} -{removed}")
+        logger.info(f"Фильтры перезагружены, поколение {snapshot.generation}: {'; '.join(changes)}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Ошибка при проверке файлов фильтров: {e}")
+
+    def start(self):
+        """Запускает фоновый опрос файлов"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Останавливает фоновый опрос"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+# Глобальный наблюдатель, общий для парсера и Telegram уведомителя
+_config_watcher = None
+_config_watcher_lock = threading.Lock()
+
+
+def get_config_watcher() -> ConfigWatcher:
+    """Получает запущенный экземпляр наблюдателя за файлами фильтров"""
+    global _config_watcher
+
+    with _config_watcher_lock:
+        if _config_watcher is None:
+            _config_watcher = ConfigWatcher()
+            _config_watcher.start()
+    return _config_watcher
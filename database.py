@@ -3,23 +3,239 @@
 Модуль для работы с базой данных SQLite
 """
 
+import base64
+import html
+import json
+import re
 import sqlite3
 import os
-from datetime import datetime, timedelta
-from typing import List, Tuple, Optional
+import queue
+import threading
+import time
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
+from datetime import datetime, timezone
+from urllib.request import pathname2url
+from enum import Enum
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Optional, Set
+
+from config import NEAR_DUPLICATE_MODE, NEAR_DUPLICATE_THRESHOLD, NEAR_DUPLICATE_WINDOW_DAYS
+from feed_parser import parse_pub_date
+from metrics import DB_INSERT_SECONDS, ITEMS_INSERTED
+from near_duplicates import item_signature, pack_signature, similarity, unpack_signature, Signature
+
+# Настройки соединения SQLite
+SQLITE_CACHE_SIZE_KB = 64 * 1024        # кэш страниц, КБ
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024    # отображение файла БД в память, байт
+SQLITE_BUSY_TIMEOUT = 30                # ожидание блокировки другим процессом, сек
+
+
+# Маркеры подсветки в snippet() - заменяются на <mark> после HTML-экранирования
+FTS_MARK_OPEN = '\x02'
+FTS_MARK_CLOSE = '\x03'
+
+# Веса столбцов для bm25(): совпадение в заголовке важнее, чем в описании
+FTS_TITLE_WEIGHT = 5.0
+FTS_DESCRIPTION_WEIGHT = 1.0
+
+# Маршрутизация уведомлений: route(title, description, link, pub_date, category) -> chat_id получателей
+NotificationRoute = Callable[[str, str, str, str, int], Iterable[str]]
+
+# Состояния записей outbox
+OUTBOX_PENDING = 'pending'    # ожидает отправки (в том числе повтора после ошибки)
+OUTBOX_SENDING = 'sending'    # передана отправителю
+OUTBOX_SENT = 'sent'          # доставлена, message_id сохранён
+OUTBOX_FAILED = 'failed'      # попытки исчерпаны
+
+# Уведомления о почти дубликатах: ответом на уведомление об оригинале, не отправлять,
+# как о новом проекте; off - дубликаты не ищутся
+DUPLICATES_THREAD = 'thread'
+DUPLICATES_SUPPRESS = 'suppress'
+DUPLICATES_NOTIFY = 'notify'
+DUPLICATES_OFF = 'off'
+DUPLICATE_MODES = (DUPLICATES_THREAD, DUPLICATES_SUPPRESS, DUPLICATES_NOTIFY, DUPLICATES_OFF)
+# Кандидатов из одной корзины LSH и с тем же content_hash - не больше стольких (шаблонные
+# проекты попадают в одни корзины, и без ограничения поиск рос бы с размером таблицы)
+DUPLICATE_BUCKET_CANDIDATES = 8
+
+# Виды фильтров подписки: ключевые слова, стоп-слова, категории и срочные категории
+SUBSCRIPTION_FILTER_KINDS = ('keyword', 'stopword', 'category', 'urgent')
+
+# Столбцы записи rss_items в выборках (по умолчанию) и все, доступные для выбора
+ITEM_COLUMNS = ('id', 'title', 'description', 'link', 'pub_date', 'category', 'created_at')
+ITEM_ALL_COLUMNS = ITEM_COLUMNS + ('updated_at', 'pub_ts', 'content_hash', 'minhash', 'duplicate_of')
+
+# Выгрузка: столбцы записи и шаг по id (одна инструкция INSERT ... SELECT или одна пачка чтения)
+EXPORT_COLUMNS = ITEM_COLUMNS
+EXPORT_CHUNK_IDS = 50000
+EXPORT_BATCH_SIZE = 1000
+
+# Поля для выборок по окну времени: дата сохранения (UTC-строка) и дата публикации (Unix-время)
+TIME_WINDOW_FIELDS = ('created_at', 'pub_ts')
+
+# Хранение: записей в одной транзакции переноса в архив, страниц в одном шаге incremental_vacuum
+ARCHIVE_BATCH_SIZE = 500
+COMPACT_STEP_PAGES = 256
+# Столбцы, переносимые в архив (id сохраняется)
+ARCHIVE_COLUMNS = ITEM_ALL_COLUMNS
+
+# Ход выгрузки: progress(записей обработано, доля диапазона id от 0 до 1)
+ExportProgress = Callable[[int, float], None]
+
+# Время сохранения проектов: по одному и пачкой
+DB_INSERT_ITEM_SECONDS = DB_INSERT_SECONDS.labels('item')
+DB_INSERT_BULK_SECONDS = DB_INSERT_SECONDS.labels('bulk')
+
+
+def fts_phrase(text: str) -> str:
+    """Экранирует фразу для MATCH; '*' на конце - поиск по префиксу (учитывает окончания слов)"""
+    return '"' + text.replace('"', '""') + '"*'
+
+
+def build_fts_query(terms: List[str], operator: str = 'OR', columns: Optional[List[str]] = None) -> str:
+    """Собирает выражение FTS5 MATCH из списка фраз (пустая строка, если фраз нет)"""
+    phrases = [fts_phrase(term.strip()) for term in terms if term and term.strip()]
+    if not phrases:
+        return ''
+    expression = f' {operator} '.join(phrases)
+    if columns:
+        return '{' + ' '.join(columns) + '} : (' + expression + ')'
+    return expression
+
+
+def print_export_progress(rows: int, fraction: float):
+    """Печатает ход выгрузки"""
+    print(f"  … {fraction:.0%}, скопировано {rows} проектов")
+
+
+def _wait(seconds: float, stop: Optional[threading.Event] = None):
+    """Пауза между пачками фоновой работы; установка stop прерывает её"""
+    if stop is not None:
+        stop.wait(seconds)
+    else:
+        time.sleep(seconds)
+
+
+@lru_cache(maxsize=None)
+def item_row_type(columns: Tuple[str, ...] = ITEM_COLUMNS) -> type:
+    """Тип строки (namedtuple без __dict__) для набора столбцов rss_items"""
+    unknown = [column for column in columns if column not in ITEM_ALL_COLUMNS]
+    if unknown or not columns:
+        raise ValueError(f"Неизвестные столбцы {', '.join(unknown) or '(пусто)'}: {', '.join(ITEM_ALL_COLUMNS)}")
+    return namedtuple('ItemRow', columns)
+
+
+def connect_read_only(db_path: str) -> sqlite3.Connection:
+    """Соединение только для чтения (mode=ro, query_only; кэш страниц и mmap - как у соединения записи)"""
+    uri = f'file:{pathname2url(os.path.abspath(db_path))}?mode=ro'
+    conn = sqlite3.connect(uri, uri=True, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False)
+    conn.execute('PRAGMA query_only=ON')
+    conn.execute(f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}')
+    conn.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
+
+
+def highlight_snippet(snippet: str) -> str:
+    """HTML-экранирует фрагмент snippet() и подсвечивает совпадения тегом <mark>"""
+    return html.escape(snippet or '').replace(FTS_MARK_OPEN, '<mark>').replace(FTS_MARK_CLOSE, '</mark>')
+
+
+def encode_cursor(created_at: str, item_id: int) -> str:
+    """Непрозрачный курсор страницы: позиция записи в порядке (created_at, id)"""
+    raw = json.dumps([created_at, item_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Позиция (created_at, id) из курсора; None для пустого или повреждённого курсора"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, item_id = json.loads(raw)
+        return str(created_at), int(item_id)
+    except (ValueError, TypeError):
+        return None
+
+
+class ItemStatus(Enum):
+    """Результат сохранения и обработки элемента ленты"""
+    INSERTED = 'inserted'    # новая запись, уведомление не требовалось
+    NOTIFIED = 'notified'    # новая запись, уведомление отправлено
+    BLOCKED = 'blocked'      # новая запись, уведомление заблокировано стоп-словами
+    DUPLICATE = 'duplicate'  # ссылка уже есть в базе
+    FAILED = 'failed'        # запись не сохранена (нет ссылки или ошибка БД)
+    
+    @property
+    def is_new(self) -> bool:
+        """Была ли добавлена новая запись"""
+        return self in (ItemStatus.INSERTED, ItemStatus.NOTIFIED, ItemStatus.BLOCKED)
+    
+    def __bool__(self) -> bool:
+        # Совместимость с прежним add_item(), возвращавшим True для новой записи
+        return self.is_new
 
 
 class RSSDatabase:
     """Класс для работы с базой данных RSS заданий"""
     
-    def __init__(self, db_path: str = "rss_data.db"):
-        """Инициализация базы данных"""
+    def __init__(self, db_path: str = "rss_data.db", duplicate_mode: str = NEAR_DUPLICATE_MODE):
+        """Инициализация базы данных (duplicate_mode - обработка почти дубликатов, DUPLICATE_MODES)"""
+        if duplicate_mode not in DUPLICATE_MODES:
+            raise ValueError(f"Неизвестный режим дубликатов {duplicate_mode}: {', '.join(DUPLICATE_MODES)}")
         self.db_path = db_path
+        self.duplicate_mode = duplicate_mode
+        self.fts_enabled = False
+        self._lock = threading.RLock()
+        self._depth = 0  # вложенность connection() в текущем потоке-владельце блокировки
+        self.conn = self._connect()
         self.init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Открывает долгоживущее соединение (WAL, synchronous=NORMAL, кэш страниц и mmap)"""
+        conn = sqlite3.connect(self.db_path, timeout=SQLITE_BUSY_TIMEOUT, check_same_thread=False)
+        # Освобождённые страницы возвращаются шагами (compact); действует для новых баз,
+        # старые переводятся один раз полным VACUUM (enable_incremental_vacuum)
+        conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}')
+        conn.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        # Удаление записи удаляет и её уведомления в outbox
+        conn.execute('PRAGMA foreign_keys=ON')
+        # pub_date (RFC-822) -> pub_ts при пакетной вставке и миграции
+        conn.create_function('parse_pub_date', 1, parse_pub_date, deterministic=True)
+        return conn
+    
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Соединение под блокировкой: транзакция фиксируется при выходе или откатывается при ошибке.
+        Вложенный вызов (например, из маршрута уведомлений внутри add_items_bulk) работает
+        в транзакции внешнего и не фиксирует её раньше времени
+        """
+        with self._lock:
+            if self._depth:
+                yield self.conn
+                return
+            self._depth += 1
+            try:
+                with self.conn:
+                    yield self.conn
+            finally:
+                self._depth -= 1
+    
+    def close(self):
+        """Закрывает соединение с базой данных"""
+        with self._lock:
+            self.conn.close()
+    
     def init_database(self):
         """Создание таблиц в базе данных"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS rss_items (
@@ -30,108 +246,1138 @@ class RSSDatabase:
                     pub_date TEXT,
                     category INTEGER,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    pub_ts REAL,
+                    content_hash INTEGER,
+                    minhash BLOB,
+                    duplicate_of INTEGER
                 )
             ''')
+            self._init_pub_ts(cursor)
             
             # Создаем индексы для оптимизации поиска
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_link ON rss_items(link)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_category ON rss_items(category)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_pub_date ON rss_items(pub_date)')
+            # Постраничный просмотр по ключу (created_at, id): новые сверху, без OFFSET
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_created_id ON rss_items(created_at, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_category_created_id ON rss_items(category, created_at, id)')
+            # Сортировка и окна по дате публикации (строка RFC-822 в pub_date сортируется неверно)
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_pub_ts ON rss_items(pub_ts)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_category_pub_ts ON rss_items(category, pub_ts)')
+            
+            # Кэш валидаторов HTTP (ETag / Last-Modified) и хэшей содержимого лент
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS feed_cache (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT,
+                    content_length INTEGER DEFAULT 0,
+                    wire_length INTEGER,
+                    parse_seconds REAL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            self._ensure_column(cursor, 'feed_cache', 'wire_length', 'INTEGER')
+            
+            # Отметка самого нового обработанного элемента каждой категории
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS category_watermarks (
+                    category INTEGER PRIMARY KEY,
+                    last_link TEXT,
+                    last_pub_ts REAL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Журнал опросов лент: по записи на каждую загрузку категории
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS fetch_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    category INTEGER NOT NULL,
+                    started_at REAL NOT NULL,
+                    status INTEGER,
+                    bytes INTEGER DEFAULT 0,
+                    fetch_seconds REAL,
+                    parse_seconds REAL DEFAULT 0,
+                    items_seen INTEGER DEFAULT 0,
+                    new_items INTEGER DEFAULT 0,
+                    notifications INTEGER DEFAULT 0,
+                    error TEXT
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_fetch_runs_category ON fetch_runs(category, started_at)')
             
-            conn.commit()
+            # Уведомления к отправке: пишутся в той же транзакции, что и новая запись
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    item_id INTEGER NOT NULL REFERENCES rss_items(id) ON DELETE CASCADE,
+                    chat_id TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    message_id INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    sent_at TIMESTAMP,
+                    UNIQUE (item_id, chat_id)
+                )
+            ''')
+            # Восстановление после перезапуска читает только недоставленное, а не всю таблицу
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox(status, next_attempt_at)')
+            
+            # Подписчики (чаты) и их фильтры
+            self._init_subscriptions(cursor)
+            
+            # Сводная статистика по категориям и дням
+            self._init_statistics(cursor)
+            
+            # Подписи текста и корзины LSH для поиска почти дубликатов
+            self._init_duplicates(cursor)
+            
+            # Полнотекстовый индекс по заголовку и описанию
+            self._init_fts(cursor)
+    
+    @classmethod
+    def _init_duplicates(cls, cursor):
+        """Столбцы подписи (content_hash, minhash, duplicate_of) и таблица корзин LSH item_lsh"""
+        for column, definition in (('content_hash', 'INTEGER'), ('minhash', 'BLOB'), ('duplicate_of', 'INTEGER')):
+            cls._ensure_column(cursor, 'rss_items', column, definition)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_content_hash ON rss_items(content_hash)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_duplicate_of ON rss_items(duplicate_of)')
+        # Корзина -> записи: кандидаты в дубликаты находятся по индексу, без просмотра таблицы
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS item_lsh (
+                bucket INTEGER NOT NULL,
+                item_id INTEGER NOT NULL REFERENCES rss_items(id) ON DELETE CASCADE,
+                PRIMARY KEY (bucket, item_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_item_lsh_item ON item_lsh(item_id)')
     
-    def add_item(self, title: str, description: str, link: str, pub_date: str, category: int) -> bool:
-        """Добавление нового элемента в базу данных"""
+    @classmethod
+    def _init_pub_ts(cls, cursor):
+        """Добавляет в старые базы столбец pub_ts (Unix-время pub_date) и заполняет его"""
+        cursor.execute('PRAGMA table_info(rss_items)')
+        if 'pub_ts' in [row[1] for row in cursor.fetchall()]:
+            return
+        cls._ensure_column(cursor, 'rss_items', 'pub_ts', 'REAL')
+        cursor.execute("UPDATE rss_items SET pub_ts = parse_pub_date(pub_date) WHERE pub_date != ''")
+    
+    def _init_fts(self, cursor):
+        """Создаёт индекс FTS5 с триггерами синхронизации и заполняет его для существующих баз"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rss_items_fts'")
+        exists = cursor.fetchone() is not None
+        try:
+            # unicode61 приводит к нижнему регистру кириллицу и латиницу, remove_diacritics 2 - ё/е и т.п.
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS rss_items_fts USING fts5(
+                    title, description,
+                    content='rss_items', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2',
+                    prefix='2 3'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"FTS5 недоступен, поиск будет выполняться через LIKE: {e}")
+            self.fts_enabled = False
+            return
+        
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS rss_items_fts_insert AFTER INSERT ON rss_items BEGIN
+                INSERT INTO rss_items_fts (rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS rss_items_fts_delete AFTER DELETE ON rss_items BEGIN
+                INSERT INTO rss_items_fts (rss_items_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS rss_items_fts_update AFTER UPDATE OF title, description ON rss_items BEGIN
+                INSERT INTO rss_items_fts (rss_items_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+                INSERT INTO rss_items_fts (rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+        ''')
+        
+        if not exists:
+            # Миграция: индексируем записи, сохранённые до появления FTS
+            cursor.execute("INSERT INTO rss_items_fts (rss_items_fts) VALUES ('rebuild')")
+        self.fts_enabled = True
+    
+    @classmethod
+    def _init_statistics(cls, cursor):
+        """
+        Создаёт сводные таблицы статистики; триггеры rss_items обновляют их при каждой вставке,
+        удалении и смене категории или даты, так что чтение статистики не просматривает записи
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stats_by_category'")
+        exists = cursor.fetchone() is not None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stats_by_category (
+                category INTEGER,
+                items INTEGER NOT NULL DEFAULT 0,
+                last_created_at TIMESTAMP
+            )
+        ''')
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_stats_by_category ON stats_by_category(category)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stats_by_day (
+                day TEXT PRIMARY KEY,
+                items INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+        
+        # Категория может быть NULL (UNIQUE такие строки не различает), поэтому строка
+        # создаётся отдельно и ищется через IS, а не через ON CONFLICT
+        add = '''
+            INSERT INTO stats_by_category (category)
+            SELECT new.category WHERE NOT EXISTS (SELECT 1 FROM stats_by_category WHERE category IS new.category);
+            UPDATE stats_by_category
+            SET items = items + 1, last_created_at = MAX(COALESCE(last_created_at, ''), COALESCE(new.created_at, ''))
+            WHERE category IS new.category;
+            INSERT INTO stats_by_day (day, items) SELECT DATE(new.created_at), 1 WHERE new.created_at IS NOT NULL
+            ON CONFLICT(day) DO UPDATE SET items = items + 1;
+        '''
+        # Последняя дата категории после удаления - один поиск по idx_category_created_id
+        remove = '''
+            UPDATE stats_by_category
+            SET items = items - 1,
+                last_created_at = (SELECT MAX(created_at) FROM rss_items WHERE category IS old.category)
+            WHERE category IS old.category;
+            DELETE FROM stats_by_category WHERE category IS old.category AND items <= 0;
+            UPDATE stats_by_day SET items = items - 1 WHERE day = DATE(old.created_at);
+            DELETE FROM stats_by_day WHERE day = DATE(old.created_at) AND items <= 0;
+        '''
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS rss_items_stats_insert AFTER INSERT ON rss_items BEGIN {add} END')
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS rss_items_stats_delete AFTER DELETE ON rss_items BEGIN {remove} END')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS rss_items_stats_update AFTER UPDATE OF category, created_at ON rss_items
+            BEGIN {remove} {add} END
+        ''')
+        
+        if not exists:
+            # Миграция: сводка по записям, сохранённым до появления таблиц статистики
+            cls._rebuild_statistics(cursor)
+    
+    @staticmethod
+    def _rebuild_statistics(cursor):
+        """Пересчитывает сводные таблицы статистики по rss_items целиком"""
+        cursor.execute('DELETE FROM stats_by_category')
+        cursor.execute('DELETE FROM stats_by_day')
+        cursor.execute('''
+            INSERT INTO stats_by_category (category, items, last_created_at)
+            SELECT category, COUNT(*), MAX(created_at) FROM rss_items GROUP BY category
+        ''')
+        cursor.execute('''
+            INSERT INTO stats_by_day (day, items)
+            SELECT DATE(created_at), COUNT(*) FROM rss_items WHERE created_at IS NOT NULL GROUP BY DATE(created_at)
+        ''')
+    
+    def rebuild_statistics(self) -> bool:
+        """Пересчёт сводной статистики по всем записям (восстановление после ручной правки БД)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
+                self._rebuild_statistics(conn.cursor())
+                return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при пересчёте статистики: {e}")
+            return False
+    
+    @staticmethod
+    def _init_subscriptions(cursor):
+        """Создаёт реестр подписок; триггеры увеличивают версию при любом изменении"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS subscriptions (
+                chat_id TEXT PRIMARY KEY,
+                title TEXT,
+                active INTEGER NOT NULL DEFAULT 1,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS subscription_filters (
+                chat_id TEXT NOT NULL REFERENCES subscriptions(chat_id) ON DELETE CASCADE,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (chat_id, kind, value)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS subscription_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('INSERT OR IGNORE INTO subscription_version (id, version) VALUES (1, 0)')
+        # Парсер перечитывает подписки только при смене версии (правки приходят из бота управления)
+        for table in ('subscriptions', 'subscription_filters'):
+            for event in ('INSERT', 'UPDATE', 'DELETE'):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+                        UPDATE subscription_version SET version = version + 1 WHERE id = 1;
+                    END
+                ''')
+    
+    @staticmethod
+    def _ensure_column(cursor, table: str, column: str, definition: str):
+        """Добавляет столбец в существующую таблицу (миграция старых баз)"""
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    
+    def add_item(self, title: str, description: str, link: str, pub_date: str, category: int,
+                 route: Optional[NotificationRoute] = None) -> ItemStatus:
+        """
+        Добавление нового элемента в базу данных (INSERTED, DUPLICATE или FAILED).
+        route - получатели уведомления; записи outbox сохраняются в той же транзакции
+        """
+        started = time.perf_counter()
+        # Подпись считается до блокировки записи
+        signature = item_signature(title, description) if self.duplicate_mode != DUPLICATES_OFF else None
+        try:
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR IGNORE INTO rss_items 
-                    (title, description, link, pub_date, category)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (title, description, link, pub_date, category))
+                    (title, description, link, pub_date, category, pub_ts)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (title, description, link, pub_date, category, parse_pub_date(pub_date)))
                 
                 # Проверяем, была ли добавлена новая запись
-                if cursor.rowcount > 0:
-                    conn.commit()
-                    return True
-                return False
+                if cursor.rowcount == 0:
+                    return ItemStatus.DUPLICATE
+                row = (cursor.lastrowid, title, description, link, pub_date, category)
+                duplicates = self._link_near_duplicates(cursor, [(row[0], signature, None)])
+                if route is not None:
+                    self._enqueue_outbox(cursor, [row], route, duplicates)
+            # Транзакцию фиксирует connection() при выходе (вложенный вызов - внешняя транзакция)
+            ITEMS_INSERTED.inc()
+            return ItemStatus.INSERTED
                 
         except sqlite3.Error as e:
             print(f"Ошибка при добавлении в базу данных: {e}")
+            return ItemStatus.FAILED
+        finally:
+            DB_INSERT_ITEM_SECONDS.observe(time.perf_counter() - started)
+    
+    def add_items_bulk(self, items: Iterable[Tuple[str, str, str, str, int]],
+                       route: Optional[NotificationRoute] = None) -> Optional[List[str]]:
+        """
+        Добавление пачки элементов (title, description, link, pub_date, category) одной транзакцией.
+        route - получатели уведомлений; записи outbox сохраняются в той же транзакции.
+        Возвращает новые ссылки в порядке следования или None при ошибке
+        """
+        started = time.perf_counter()
+        items = list(items)
+        # Подписи считаются до блокировки записи: транзакция только ищет кандидатов по индексам
+        signatures = {}
+        if self.duplicate_mode != DUPLICATES_OFF:
+            for title, description, link, *_ in items:
+                if link not in signatures:
+                    signatures[link] = item_signature(title, description)
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                # Блокировка записи с начала транзакции: пачка сначала читает rss_items, и при
+                # отложенной транзакции чужая запись между чтением и вставкой (архивирование,
+                # другой процесс) дала бы "database is locked" без ожидания busy_timeout
+                if not conn.in_transaction:
+                    cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute('''
+                    CREATE TEMP TABLE IF NOT EXISTS incoming_items (
+                        seq INTEGER PRIMARY KEY,
+                        title TEXT,
+                        description TEXT,
+                        link TEXT,
+                        pub_date TEXT,
+                        category INTEGER
+                    )
+                ''')
+                cursor.execute('DELETE FROM incoming_items')
+                cursor.executemany('''
+                    INSERT INTO incoming_items (title, description, link, pub_date, category)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', items)
+                
+                # Новые ссылки - те, которых ещё нет в rss_items (первое вхождение в пачке)
+                cursor.execute('''
+                    SELECT link FROM incoming_items AS i
+                    WHERE NOT EXISTS (SELECT 1 FROM rss_items AS r WHERE r.link = i.link)
+                    GROUP BY link
+                    ORDER BY MIN(seq)
+                ''')
+                new_links = [row[0] for row in cursor.fetchall()]
+                
+                # Записи, добавленные этой транзакцией, идут после текущего максимального id
+                cursor.execute('SELECT COALESCE(MAX(id), 0) FROM rss_items')
+                last_id = cursor.fetchone()[0]
+                
+                cursor.execute('''
+                    INSERT OR IGNORE INTO rss_items (title, description, link, pub_date, category, pub_ts)
+                    SELECT title, description, link, pub_date, category, parse_pub_date(pub_date)
+                    FROM incoming_items
+                    ORDER BY seq
+                ''')
+                cursor.execute('DELETE FROM incoming_items')
+                
+                if new_links and (route is not None or self.duplicate_mode != DUPLICATES_OFF):
+                    cursor.execute('''
+                        SELECT id, title, description, link, pub_date, category
+                        FROM rss_items WHERE id > ? ORDER BY id
+                    ''', (last_id,))
+                    rows = cursor.fetchall()
+                    duplicates = self._link_near_duplicates(
+                        cursor, [(row[0], signatures.get(row[3]), None) for row in rows])
+                    if route is not None:
+                        self._enqueue_outbox(cursor, rows, route, duplicates)
+            ITEMS_INSERTED.inc(len(new_links))
+            return new_links
+                
+        except sqlite3.Error as e:
+            print(f"Ошибка при пакетном добавлении в базу данных: {e}")
+            return None
+        finally:
+            DB_INSERT_BULK_SECONDS.observe(time.perf_counter() - started)
+    
+    def _enqueue_outbox(self, cursor, rows: Iterable[Tuple], route: NotificationRoute,
+                        duplicates: Optional[Dict[int, int]] = None):
+        """
+        Записывает в outbox уведомления о новых записях (id, title, description, link, pub_date, category).
+        duplicates - {id: id оригинала}; в режиме suppress о повторе уведомлённого проекта не сообщается
+        """
+        duplicates = duplicates or {}
+        suppress = self.duplicate_mode == DUPLICATES_SUPPRESS and bool(duplicates)
+        # Оригиналы (по id первой записи), о которых или о повторах которых уже уведомляли
+        notified: Set[int] = set()
+        if suppress:
+            originals = sorted(set(duplicates.values()))
+            placeholders = ', '.join('?' * len(originals))
+            cursor.execute(f'''
+                SELECT DISTINCT COALESCE(r.duplicate_of, r.id) FROM outbox AS o JOIN rss_items AS r ON r.id = o.item_id
+                WHERE r.id IN ({placeholders}) OR r.duplicate_of IN ({placeholders})
+            ''', originals + originals)
+            notified = {row[0] for row in cursor.fetchall()}
+        outbox_rows = []
+        for item_id, title, description, link, pub_date, category in rows:
+            original = duplicates.get(item_id, item_id)
+            if suppress and original in notified:
+                continue
+            chats = route(title, description, link, pub_date, category)
+            if chats:
+                notified.add(original)
+            outbox_rows.extend((item_id, str(chat_id)) for chat_id in chats)
+        if outbox_rows:
+            cursor.executemany('INSERT OR IGNORE INTO outbox (item_id, chat_id) VALUES (?, ?)', outbox_rows)
+    
+    def _near_duplicate_candidates(self, cursor, signature: Signature, before_id: Optional[int] = None,
+                                   created_at: Optional[str] = None,
+                                   window_days: Optional[float] = NEAR_DUPLICATE_WINDOW_DAYS,
+                                   threshold: float = NEAR_DUPLICATE_THRESHOLD) -> List[Tuple[int, float, int]]:
+        """
+        Записи, похожие на подпись не меньше threshold: (id, сходство, id оригинала), самые похожие
+        первыми. Кандидаты - по общим корзинам LSH (самые новые DUPLICATE_BUCKET_CANDIDATES из каждой)
+        и content_hash (самые ранние), всё по индексам; before_id - только более ранние записи,
+        window_days - созданные не раньше чем за столько дней до created_at
+        """
+        before = [] if before_id is None else [before_id]
+        bound, hash_bound = ('', '') if before_id is None else ('AND item_id < ?', 'AND id < ?')
+        # Повторы ссылаются на оригинал (duplicate_of), поэтому новых записей корзины достаточно
+        parts = [f'SELECT * FROM (SELECT item_id FROM item_lsh WHERE bucket = ? {bound} '
+                 f'ORDER BY item_id DESC LIMIT {DUPLICATE_BUCKET_CANDIDATES})'] * len(signature.buckets)
+        parts.append(f'SELECT * FROM (SELECT id FROM rss_items WHERE content_hash = ? {hash_bound} '
+                     f'ORDER BY id LIMIT {DUPLICATE_BUCKET_CANDIDATES})')
+        params: list = [value for bucket in signature.buckets for value in (bucket, *before)]
+        params.extend([signature.content_hash, *before])
+        window = ''
+        if window_days is not None:
+            window = "AND r.created_at >= datetime(COALESCE(?, 'now'), ?)"
+            params.extend([created_at, f'-{float(window_days)} days'])
+        cursor.execute(f'''
+            SELECT r.id, r.content_hash, r.minhash, r.duplicate_of FROM rss_items AS r
+            WHERE r.id IN ({' UNION '.join(parts)}) {window}
+        ''', params)
+        matches = []
+        for item_id, content_hash, minhash, duplicate_of in cursor.fetchall():
+            if content_hash == signature.content_hash:
+                score = 1.0
+            elif minhash is not None:
+                score = similarity(signature.minhash, unpack_signature(minhash))
+            else:
+                continue
+            if score >= threshold:
+                matches.append((item_id, score, duplicate_of or item_id))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches
+    
+    def _link_near_duplicates(self, cursor, rows: Iterable[Tuple[int, Optional[Signature], Optional[str]]]
+                              ) -> Dict[int, int]:
+        """
+        Сохраняет подписи и корзины LSH новых записей (id, подпись, created_at - отсчёт окна, None -
+        сейчас) и отмечает в duplicate_of оригинал самого раннего похожего проекта. Записи пачки
+        обрабатываются по порядку, так что повтор внутри пачки тоже находится. Возвращает {id: id оригинала}
+        """
+        duplicates: Dict[int, int] = {}
+        for item_id, signature, created_at in rows:
+            if signature is None:
+                continue
+            matches = self._near_duplicate_candidates(cursor, signature, item_id, created_at)
+            original = min(matches)[2] if matches else None
+            cursor.execute('UPDATE rss_items SET content_hash = ?, minhash = ?, duplicate_of = ? WHERE id = ?',
+                           (signature.content_hash, pack_signature(signature.minhash), original, item_id))
+            cursor.executemany('INSERT OR IGNORE INTO item_lsh (bucket, item_id) VALUES (?, ?)',
+                               [(bucket, item_id) for bucket in signature.buckets])
+            if original is not None:
+                duplicates[item_id] = original
+        return duplicates
+    
+    def find_near_duplicates(self, title: str, description: str,
+                             window_days: Optional[float] = NEAR_DUPLICATE_WINDOW_DAYS,
+                             threshold: float = NEAR_DUPLICATE_THRESHOLD) -> List[Tuple[int, float, int]]:
+        """Сохранённые проекты, похожие на текст: (id, сходство, id оригинала), самые похожие первыми"""
+        signature = item_signature(title, description)
+        if signature is None:
+            return []
+        try:
+            with self.connection() as conn:
+                return self._near_duplicate_candidates(conn.cursor(), signature, window_days=window_days,
+                                                       threshold=threshold)
+        except sqlite3.Error as e:
+            print(f"Ошибка при поиске похожих проектов: {e}")
+            return []
+    
+    def backfill_signatures(self, batch_size: int = ARCHIVE_BATCH_SIZE) -> Tuple[int, int]:
+        """
+        Строит подписи проектам, сохранённым без них (старые базы), от старых к новым и с окном
+        поиска оригинала относительно created_at каждой записи. Пачки - отдельные транзакции.
+        Возвращает (обработано записей, найдено дубликатов) или (-1, 0) при ошибке
+        """
+        processed = found = 0
+        last_id = 0
+        try:
+            while True:
+                with self.connection() as conn:
+                    rows = conn.execute('''
+                        SELECT id, title, description, created_at FROM rss_items
+                        WHERE minhash IS NULL AND id > ? ORDER BY id LIMIT ?
+                    ''', (last_id, batch_size)).fetchall()
+                if not rows:
+                    return processed, found
+                # Подписи пачки считаются вне транзакции записи
+                signed = [(item_id, item_signature(title, description), created_at)
+                          for item_id, title, description, created_at in rows]
+                with self.connection() as conn:
+                    found += len(self._link_near_duplicates(conn.cursor(), signed))
+                last_id = rows[-1][0]
+                processed += len(rows)
+        except sqlite3.Error as e:
+            print(f"Ошибка при построении подписей: {e}")
+            return -1, 0
+    
+    def reset_signatures(self) -> bool:
+        """Удаляет подписи, корзины LSH и отметки повторов (перед backfill_signatures с новой схемой подписи)"""
+        try:
+            with self.connection() as conn:
+                conn.execute('DELETE FROM item_lsh')
+                conn.execute('UPDATE rss_items SET content_hash = NULL, minhash = NULL, duplicate_of = NULL '
+                             'WHERE minhash IS NOT NULL OR duplicate_of IS NOT NULL')
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при удалении подписей: {e}")
             return False
     
-    def get_items_by_category(self, category: int) -> List[Tuple]:
-        """Получение всех элементов по категории"""
+    def get_duplicate_groups(self, limit: int = 100) -> List[Tuple[int, List[int]]]:
+        """Оригиналы с повторами: (id оригинала, id повторов), сначала самые повторяемые"""
+        try:
+            with self.connection() as conn:
+                rows = conn.execute('''
+                    SELECT duplicate_of, GROUP_CONCAT(id) FROM rss_items
+                    WHERE duplicate_of IS NOT NULL
+                    GROUP BY duplicate_of ORDER BY COUNT(*) DESC, duplicate_of LIMIT ?
+                ''', (limit,)).fetchall()
+            return [(original, [int(item_id) for item_id in copies.split(',')]) for original, copies in rows]
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении повторов: {e}")
+            return []
+    
+    def recover_outbox(self) -> int:
+        """
+        После перезапуска возвращает в очередь уведомления, переданные отправителю, но не подтверждённые.
+        Возвращает их количество
+        """
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("UPDATE outbox SET status = 'pending' WHERE status = 'sending'")
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"Ошибка при восстановлении outbox: {e}")
+            return 0
+    
+    def claim_outbox(self, limit: int = 100, now: Optional[float] = None) -> List[dict]:
+        """
+        Забирает готовые к отправке уведомления (status pending, срок повтора наступил),
+        помечает их sending и увеличивает счётчик попыток. Возвращает записи с полями проекта
+        и reply_to - id сообщения об оригинале почти дубликата (режим thread)
+        """
+        now = time.time() if now is None else now
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
-                    SELECT id, title, description, link, pub_date, category, created_at
-                    FROM rss_items 
+                    SELECT o.id, o.chat_id, o.attempts, r.id, r.title, r.description, r.link, r.pub_date, r.category,
+                           (SELECT p.message_id FROM outbox AS p
+                            WHERE p.item_id = r.duplicate_of AND p.chat_id = o.chat_id AND p.status = 'sent')
+                    FROM outbox AS o JOIN rss_items AS r ON r.id = o.item_id
+                    WHERE o.status = 'pending' AND o.next_attempt_at <= ?
+                    ORDER BY o.id
+                    LIMIT ?
+                ''', (now, limit))
+                rows = cursor.fetchall()
+                cursor.executemany(
+                    "UPDATE outbox SET status = 'sending', attempts = attempts + 1 WHERE id = ?",
+                    [(row[0],) for row in rows]
+                )
+                return [
+                    {'id': row[0], 'chat_id': row[1], 'attempts': row[2] + 1, 'item_id': row[3],
+                     'title': row[4], 'description': row[5], 'link': row[6], 'pub_date': row[7], 'category': row[8],
+                     # Повтор проекта - ответом на сообщение об оригинале в том же чате
+                     'reply_to': row[9] if self.duplicate_mode == DUPLICATES_THREAD else None}
+                    for row in rows
+                ]
+        except sqlite3.Error as e:
+            print(f"Ошибка при чтении outbox: {e}")
+            return []
+    
+    def mark_outbox_sent(self, outbox_ids: Iterable[int], message_id: Optional[int]) -> bool:
+        """Отмечает уведомления доставленными и сохраняет id сообщения Telegram"""
+        try:
+            with self.connection() as conn:
+                conn.executemany('''
+                    UPDATE outbox SET status = 'sent', message_id = ?, last_error = NULL, sent_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', [(message_id, outbox_id) for outbox_id in outbox_ids])
+                return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при обновлении outbox: {e}")
+            return False
+    
+    def mark_outbox_failed(self, outbox_ids: Iterable[int], error: str, retry_at: Optional[float]) -> bool:
+        """Записывает ошибку отправки: повтор в retry_at или окончательный отказ (retry_at=None)"""
+        try:
+            with self.connection() as conn:
+                if retry_at is None:
+                    conn.executemany(
+                        "UPDATE outbox SET status = 'failed', last_error = ? WHERE id = ?",
+                        [(error, outbox_id) for outbox_id in outbox_ids]
+                    )
+                else:
+                    conn.executemany(
+                        "UPDATE outbox SET status = 'pending', last_error = ?, next_attempt_at = ? WHERE id = ?",
+                        [(error, retry_at, outbox_id) for outbox_id in outbox_ids]
+                    )
+                return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при обновлении outbox: {e}")
+            return False
+    
+    def get_outbox_stats(self) -> dict:
+        """Количество уведомлений в outbox по состояниям"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT status, COUNT(*) FROM outbox GROUP BY status')
+                stats = dict.fromkeys((OUTBOX_PENDING, OUTBOX_SENDING, OUTBOX_SENT, OUTBOX_FAILED), 0)
+                stats.update(cursor.fetchall())
+                return stats
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении статистики outbox: {e}")
+            return {}
+    
+    def add_subscription(self, chat_id: str, title: Optional[str] = None) -> bool:
+        """Добавляет подписку чата или снова включает отключённую"""
+        try:
+            with self.connection() as conn:
+                conn.execute('''
+                    INSERT INTO subscriptions (chat_id, title) VALUES (?, ?)
+                    ON CONFLICT(chat_id) DO UPDATE SET active = 1, title = COALESCE(excluded.title, title)
+                ''', (str(chat_id), title))
+                return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при добавлении подписки: {e}")
+            return False
+    
+    def remove_subscription(self, chat_id: str) -> bool:
+        """Удаляет подписку чата вместе с её фильтрами"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.execute('DELETE FROM subscriptions WHERE chat_id = ?', (str(chat_id),))
+                return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            print(f"Ошибка при удалении подписки: {e}")
+            return False
+    
+    def add_subscription_filters(self, chat_id: str, kind: str, values: Iterable) -> int:
+        """Добавляет фильтры вида kind (SUBSCRIPTION_FILTER_KINDS); возвращает число новых"""
+        if kind not in SUBSCRIPTION_FILTER_KINDS:
+            raise ValueError(f"Неизвестный вид фильтра: {kind}")
+        try:
+            with self.connection() as conn:
+                cursor = conn.executemany(
+                    'INSERT OR IGNORE INTO subscription_filters (chat_id, kind, value) VALUES (?, ?, ?)',
+                    [(str(chat_id), kind, str(value).strip().lower()) for value in values if str(value).strip()]
+                )
+                return max(0, cursor.rowcount)
+        except sqlite3.Error as e:
+            print(f"Ошибка при добавлении фильтров подписки: {e}")
+            return 0
+    
+    def remove_subscription_filters(self, chat_id: str, kind: str, values: Optional[Iterable] = None) -> int:
+        """Удаляет фильтры вида kind (все, если values=None); возвращает число удалённых"""
+        try:
+            with self.connection() as conn:
+                if values is None:
+                    cursor = conn.execute('DELETE FROM subscription_filters WHERE chat_id = ? AND kind = ?',
+                                          (str(chat_id), kind))
+                    return cursor.rowcount
+                removed = 0
+                for value in values:
+                    cursor = conn.execute(
+                        'DELETE FROM subscription_filters WHERE chat_id = ? AND kind = ? AND value = ?',
+                        (str(chat_id), kind, str(value).strip().lower())
+                    )
+                    removed += cursor.rowcount
+                return removed
+        except sqlite3.Error as e:
+            print(f"Ошибка при удалении фильтров подписки: {e}")
+            return 0
+    
+    def get_subscriptions(self, active_only: bool = True) -> List[dict]:
+        """Подписки с фильтрами: keyword, stopword (множества строк), category, urgent (множества чисел)"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    'SELECT chat_id, title, active FROM subscriptions'
+                    + (' WHERE active = 1' if active_only else '') + ' ORDER BY created_at, chat_id'
+                )
+                subscriptions = {}
+                for chat_id, title, active in cursor.fetchall():
+                    subscriptions[chat_id] = {'chat_id': chat_id, 'title': title, 'active': bool(active)}
+                    subscriptions[chat_id].update((kind, set()) for kind in SUBSCRIPTION_FILTER_KINDS)
+                
+                cursor.execute('SELECT chat_id, kind, value FROM subscription_filters')
+                for chat_id, kind, value in cursor:
+                    subscription = subscriptions.get(chat_id)
+                    if subscription is None or kind not in SUBSCRIPTION_FILTER_KINDS:
+                        continue
+                    if kind in ('category', 'urgent'):
+                        try:
+                            value = int(value)
+                        except ValueError:
+                            continue
+                    subscription[kind].add(value)
+                return list(subscriptions.values())
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении подписок: {e}")
+            return []
+    
+    def get_subscriptions_version(self) -> int:
+        """Версия реестра подписок (растёт при каждом изменении)"""
+        try:
+            with self.connection() as conn:
+                row = conn.execute('SELECT version FROM subscription_version WHERE id = 1').fetchone()
+                return row[0] if row else 0
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении версии подписок: {e}")
+            return 0
+    
+    def get_known_links(self) -> Set[str]:
+        """Получение множества всех сохранённых ссылок"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT link FROM rss_items')
+                return {row[0] for row in cursor}
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении ссылок: {e}")
+            return set()
+    
+    def get_watermark(self, category: int) -> Optional[dict]:
+        """Получение отметки самого нового обработанного элемента категории"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT last_link, last_pub_ts
+                    FROM category_watermarks
                     WHERE category = ?
-                    ORDER BY pub_date DESC
                 ''', (category,))
-                return cursor.fetchall()
+                row = cursor.fetchone()
+                if row is None:
+                    return None
+                return {'link': row[0], 'pub_ts': row[1]}
+        except sqlite3.Error as e:
+            print(f"Ошибка при чтении отметки категории: {e}")
+            return None
+    
+    def set_watermark(self, category: int, link: str, pub_ts: Optional[float]) -> bool:
+        """Сохранение отметки самого нового обработанного элемента категории"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT OR REPLACE INTO category_watermarks
+                    (category, last_link, last_pub_ts, updated_at)
+                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ''', (category, link, pub_ts))
+                return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при сохранении отметки категории: {e}")
+            return False
+    
+    def get_feed_cache(self, url: str) -> Optional[dict]:
+        """Получение сохранённых валидаторов и хэша содержимого ленты"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT etag, last_modified, content_hash, content_length, wire_length, parse_seconds
+                    FROM feed_cache
+                    WHERE url = ?
+                ''', (url,))
+                row = cursor.fetchone()
+                if row is None:
+                    return None
+                return {
+                    'etag': row[0],
+                    'last_modified': row[1],
+                    'content_hash': row[2],
+                    'content_length': row[3] or 0,
+                    'wire_length': row[4],
+                    'parse_seconds': row[5] or 0.0
+                }
+        except sqlite3.Error as e:
+            print(f"Ошибка при чтении кэша ленты: {e}")
+            return None
+    
+    def save_feed_cache(self, url: str, etag: Optional[str], last_modified: Optional[str],
+                        content_hash: str, content_length: int, wire_length: Optional[int],
+                        parse_seconds: float) -> bool:
+        """Сохранение валидаторов и хэша содержимого ленты"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT OR REPLACE INTO feed_cache
+                    (url, etag, last_modified, content_hash, content_length, wire_length, parse_seconds, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ''', (url, etag, last_modified, content_hash, content_length, wire_length, parse_seconds))
+                return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при сохранении кэша ленты: {e}")
+            return False
+    
+    def record_fetch_run(self, category: int, status: Optional[int], bytes_received: int = 0,
+                         fetch_seconds: Optional[float] = None, parse_seconds: float = 0.0,
+                         items_seen: int = 0, new_items: int = 0, notifications: int = 0,
+                         error: Optional[str] = None, started_at: Optional[float] = None) -> bool:
+        """Запись об одной загрузке ленты категории (status None - ответ не получен)"""
+        try:
+            with self.connection() as conn:
+                conn.execute('''
+                    INSERT INTO fetch_runs
+                    (category, started_at, status, bytes, fetch_seconds, parse_seconds,
+                     items_seen, new_items, notifications, error)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (category, time.time() if started_at is None else started_at, status, bytes_received,
+                      fetch_seconds, parse_seconds, items_seen, new_items, notifications, error))
+                return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при записи опроса ленты: {e}")
+            return False
+    
+    def get_fetch_runs(self, category: Optional[int] = None, limit: int = 100) -> List[dict]:
+        """Последние загрузки лент (все категории или одна), новые первыми"""
+        query = '''
+            SELECT id, category, started_at, status, bytes, fetch_seconds, parse_seconds,
+                   items_seen, new_items, notifications, error
+            FROM fetch_runs
+        '''
+        params: list = []
+        if category is not None:
+            query += ' WHERE category = ?'
+            params.append(category)
+        query += ' ORDER BY id DESC LIMIT ?'
+        params.append(limit)
+        try:
+            with self.connection() as conn:
+                cursor = conn.execute(query, params)
+                columns = [column[0] for column in cursor.description]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении журнала опросов: {e}")
+            return []
+    
+    def get_fetch_stats(self, hours: float = 24) -> List[dict]:
+        """
+        Сводка загрузок по категориям за последние hours часов: число опросов, ошибок
+        (нет ответа или статус не 200/304), ответов 304, средняя и максимальная задержка,
+        трафик, найдено новых проектов и отправлено уведомлений, время и статус последнего опроса
+        """
+        try:
+            with self.connection() as conn:
+                cursor = conn.execute('''
+                    SELECT category,
+                           COUNT(*) AS runs,
+                           SUM(status IS NULL OR status NOT IN (200, 304)) AS errors,
+                           SUM(status = 304) AS not_modified,
+                           AVG(fetch_seconds) AS avg_fetch_seconds,
+                           MAX(fetch_seconds) AS max_fetch_seconds,
+                           AVG(parse_seconds) AS avg_parse_seconds,
+                           SUM(bytes) AS bytes,
+                           SUM(items_seen) AS items_seen,
+                           SUM(new_items) AS new_items,
+                           SUM(notifications) AS notifications,
+                           MAX(started_at) AS last_run_at,
+                           (SELECT status FROM fetch_runs AS last
+                            WHERE last.category = fetch_runs.category
+                            ORDER BY last.started_at DESC LIMIT 1) AS last_status
+                    FROM fetch_runs
+                    WHERE started_at >= ?
+                    GROUP BY category
+                    ORDER BY category
+                ''', (time.time() - hours * 3600,))
+                columns = [column[0] for column in cursor.description]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении сводки опросов: {e}")
+            return []
+    
+    def get_posting_rates(self, hours: float = 7 * 24) -> dict:
+        """
+        Скользящая оценка частоты публикаций по категориям за последние hours часов
+        (по времени добавления записей created_at): {категория: {'items', 'per_hour', 'last_item_at'}}
+        """
+        try:
+            with self.connection() as conn:
+                cursor = conn.execute('''
+                    SELECT category, COUNT(*), MAX(created_at)
+                    FROM rss_items
+                    WHERE created_at >= datetime('now', ?)
+                    GROUP BY category
+                ''', (f'-{hours:g} hours',))
+                return {
+                    category: {'items': count, 'per_hour': count / hours, 'last_item_at': last_item_at}
+                    for category, count, last_item_at in cursor.fetchall()
+                }
+        except sqlite3.Error as e:
+            print(f"Ошибка при расчёте частоты публикаций: {e}")
+            return {}
+    
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        Отдельное соединение только для чтения на время потоковой выборки: итерация может
+        длиться сколько угодно, не удерживая блокировку соединения записи (в режиме WAL
+        чтение идёт по снимку и не мешает парсеру)
+        """
+        conn = connect_read_only(self.db_path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def _iter_rows(self, query: str, params: Iterable, columns: Tuple[str, ...],
+                   batch_size: int) -> Iterator[tuple]:
+        """Строки запроса типом item_row_type(columns); из курсора читается по batch_size строк"""
+        row_type = item_row_type(columns)
+        with self._reader() as conn:
+            cursor = conn.execute(query, list(params))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield from map(row_type._make, rows)
+    
+    def iter_items(self, category: Optional[int] = None, columns: Tuple[str, ...] = ITEM_COLUMNS,
+                   batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[tuple]:
+        """
+        Все записи (или записи категории), новые публикации сверху, по одной. columns - нужные
+        столбцы (например, без description), batch_size - строк на одно чтение из курсора
+        """
+        columns = tuple(columns)
+        item_row_type(columns)
+        where, params = ('category = ?', [category]) if category is not None else ('1', [])
+        return self._iter_rows(f'''
+            SELECT {', '.join(columns)} FROM rss_items
+            WHERE {where}
+            ORDER BY pub_ts DESC, id DESC
+        ''', params, columns, batch_size)
+    
+    def get_items_by_category(self, category: int) -> List[Tuple]:
+        """Получение всех элементов по категории (новые публикации сверху)"""
+        try:
+            return list(self.iter_items(category))
         except sqlite3.Error as e:
             print(f"Ошибка при получении данных: {e}")
             return []
     
     def get_all_items(self) -> List[Tuple]:
-        """Получение всех элементов"""
+        """Получение всех элементов (новые публикации сверху)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            return list(self.iter_items())
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении данных: {e}")
+            return []
+    
+    def get_items_page(self, limit: int = 50, category: Optional[int] = None, search: Optional[str] = None,
+                       after: Optional[Tuple[str, int]] = None, before: Optional[Tuple[str, int]] = None,
+                       oldest: bool = False) -> Tuple[List[dict], bool]:
+        """
+        Страница записей в порядке created_at DESC, id DESC по ключу (keyset), а не по OFFSET:
+        after - позиция последней записи предыдущей страницы (следующая страница),
+        before - позиция первой записи (предыдущая страница), oldest - последняя страница.
+        Стоимость не зависит от глубины страницы. Возвращает (записи, есть ли ещё записи
+        в направлении листания)
+        """
+        where = []
+        params: list = []
+        if category is not None:
+            where.append('category = ?')
+            params.append(category)
+        if search:
+            where.append('(title LIKE ? OR description LIKE ?)')
+            params.extend([f'%{search}%', f'%{search}%'])
+        
+        # Назад (и к последней странице) идём по возрастанию и переворачиваем результат
+        backward = before is not None or oldest
+        if after is not None:
+            where.append('(created_at, id) < (?, ?)')
+            params.extend(after)
+        elif before is not None:
+            where.append('(created_at, id) > (?, ?)')
+            params.extend(before)
+        order = 'ASC' if backward else 'DESC'
+        
+        sql = 'SELECT id, title, description, link, pub_date, category, created_at FROM rss_items'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += f' ORDER BY created_at {order}, id {order} LIMIT ?'
+        params.append(limit + 1)
+        
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении страницы записей: {e}")
+            return [], False
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backward:
+            rows.reverse()
+        return [{
+            'id': row[0],
+            'title': row[1],
+            'description': row[2],
+            'link': row[3],
+            'pub_date': row[4],
+            'category': row[5],
+            'created_at': row[6]
+        } for row in rows], has_more
+    
+    def get_item(self, item_id: int) -> Optional[dict]:
+        """Запись по id (None, если не найдена или ошибка БД)"""
+        try:
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT id, title, description, link, pub_date, category, created_at
-                    FROM rss_items 
-                    ORDER BY pub_date DESC
-                ''')
-                return cursor.fetchall()
+                    FROM rss_items WHERE id = ?
+                ''', (item_id,))
+                row = cursor.fetchone()
         except sqlite3.Error as e:
-            print(f"Ошибка при получении данных: {e}")
-            return []
+            print(f"Ошибка при получении записи: {e}")
+            return None
+        if row is None:
+            return None
+        return {
+            'id': row[0],
+            'title': row[1],
+            'description': row[2],
+            'link': row[3],
+            'pub_date': row[4],
+            'category': row[5],
+            'created_at': row[6]
+        }
+    
+    def get_data_version(self) -> str:
+        """
+        Версия данных для кэшей чтения и ETag: id последней добавленной записи и число записей
+        (по сводке статистики), так что версия меняется и при удалениях. Пустая строка - ошибка БД
+        """
+        try:
+            with self.connection() as conn:
+                last_id, total = conn.execute('''
+                    SELECT (SELECT COALESCE(MAX(id), 0) FROM rss_items),
+                           (SELECT COALESCE(SUM(items), 0) FROM stats_by_category)
+                ''').fetchone()
+                return f'{last_id}-{total}'
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении версии данных: {e}")
+            return ''
     
     def get_statistics(self) -> dict:
-        """Получение статистики по базе данных"""
+        """Получение статистики по базе данных (из сводной таблицы, одна строка на категорию)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
                 cursor = conn.cursor()
-                
-                # Общее количество записей
-                cursor.execute('SELECT COUNT(*) FROM rss_items')
-                total_items = cursor.fetchone()[0]
-                
-                # Количество записей по категориям
                 cursor.execute('''
-                    SELECT category, COUNT(*) 
-                    FROM rss_items 
-                    GROUP BY category 
+                    SELECT category, items, last_created_at
+                    FROM stats_by_category
                     ORDER BY category
                 ''')
-                by_category = cursor.fetchall()
-                
-                # Последнее обновление
-                cursor.execute('SELECT MAX(created_at) FROM rss_items')
-                last_update = cursor.fetchone()[0]
+                rows = cursor.fetchall()
                 
                 return {
-                    'total_items': total_items,
-                    'by_category': dict(by_category),
-                    'last_update': last_update
+                    'total_items': sum(row[1] for row in rows),
+                    'by_category': {row[0]: row[1] for row in rows},
+                    'last_update': max((row[2] for row in rows if row[2]), default=None)
                 }
         except sqlite3.Error as e:
             print(f"Ошибка при получении статистики: {e}")
             return {}
     
+    def get_daily_statistics(self, days: int = 7) -> dict:
+        """Количество записей по дням создания за последние days дней, новые дни первыми"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT day, items FROM stats_by_day
+                    WHERE day >= DATE('now', ?)
+                    ORDER BY day DESC
+                ''', (f'-{int(days)} days',))
+                return dict(cursor.fetchall())
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении статистики по дням: {e}")
+            return {}
+    
     def clear_category(self, category: int) -> bool:
         """Очистка всех записей определенной категории"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('DELETE FROM rss_items WHERE category = ?', (category,))
-                conn.commit()
                 return True
         except sqlite3.Error as e:
             print(f"Ошибка при очистке категории: {e}")
@@ -140,169 +1386,596 @@ class RSSDatabase:
     def clear_all(self) -> bool:
         """Очистка всей базы данных"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('DELETE FROM rss_items')
-                conn.commit()
                 return True
         except sqlite3.Error as e:
             print(f"Ошибка при очистке базы данных: {e}")
             return False
     
+    def retention_condition(self, max_age_days: Optional[float] = None,
+                            max_rows_per_category: Optional[int] = None,
+                            min_age_days: float = 1) -> Optional[Tuple[str, list]]:
+        """
+        Условие WHERE для записей, которые пора перенести в архив: старше max_age_days дней
+        или сверх max_rows_per_category самых новых в своей категории. Записи моложе
+        min_age_days и с недоставленными уведомлениями не переносятся. None - переносить нечего
+        """
+        policies = []
+        params: list = []
+        if max_age_days:
+            policies.append("created_at < datetime('now', ?)")
+            params.append(f'-{float(max_age_days)} days')
+        if max_rows_per_category:
+            with self.connection() as conn:
+                over = conn.execute('SELECT category FROM stats_by_category WHERE items > ?',
+                                    (max_rows_per_category,)).fetchall()
+                for (category,) in over:
+                    # Самая старая из оставляемых записей категории - по индексу idx_category_created_id
+                    boundary = conn.execute('''
+                        SELECT created_at, id FROM rss_items WHERE category IS ?
+                        ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?
+                    ''', (category, max_rows_per_category - 1)).fetchone()
+                    if boundary is not None:
+                        policies.append('(category IS ? AND (created_at, id) < (?, ?))')
+                        params.extend([category, *boundary])
+        if not policies:
+            return None
+        where = f"({' OR '.join(policies)}) AND created_at < datetime('now', ?)"
+        params.append(f'-{float(min_age_days)} days')
+        where += (' AND NOT EXISTS (SELECT 1 FROM outbox WHERE outbox.item_id = rss_items.id'
+                  f" AND outbox.status IN ('{OUTBOX_PENDING}', '{OUTBOX_SENDING}'))")
+        return where, params
+    
+    def archive_items(self, condition: Tuple[str, list], archive_dir: str,
+                      batch_size: int = ARCHIVE_BATCH_SIZE, pause: float = 0.0,
+                      limit: Optional[int] = None, stop: Optional[threading.Event] = None) -> Dict[str, int]:
+        """
+        Переносит записи под условием (от старых к новым) в помесячные архивы
+        archive_dir/<имя базы>_ГГГГ-ММ.db по месяцу created_at. Каждая пачка - две короткие
+        транзакции: копия в архив, затем удаление из рабочей базы, так что сбой между ними
+        оставляет запись в обеих базах, но не теряет её. Между пачками соединение свободно
+        для записи парсера (pause - дополнительная пауза, сек). stop проверяется между пачками:
+        после его установки перенос завершается на текущей пачке. Возвращает {месяц: перенесено}
+        """
+        where, params = condition
+        stem = os.path.splitext(os.path.basename(self.db_path))[0]
+        moved: Dict[str, int] = defaultdict(int)
+        prepared: Set[str] = set()
+        key = None
+        total = 0
+        while (limit is None or total < limit) and not (stop is not None and stop.is_set()):
+            size = batch_size if limit is None else min(batch_size, limit - total)
+            keyset = ' AND (created_at, id) > (?, ?)' if key is not None else ''
+            with self.connection() as conn:
+                rows = conn.execute(f'''
+                    SELECT id, created_at, strftime('%Y-%m', created_at) FROM rss_items
+                    WHERE ({where}){keyset}
+                    ORDER BY created_at, id LIMIT ?
+                ''', [*params, *(key or ()), size]).fetchall()
+            if not rows:
+                break
+            key = (rows[-1][1], rows[-1][0])
+            by_month: Dict[str, List[int]] = defaultdict(list)
+            for item_id, _, month in rows:
+                by_month[month or 'undated'].append(item_id)
+            for month, ids in by_month.items():
+                path = os.path.join(archive_dir, f'{stem}_{month}.db')
+                if path not in prepared:
+                    # Схема архива (FTS, статистика) - как у рабочей базы, поиск по архиву работает
+                    os.makedirs(archive_dir, exist_ok=True)
+                    RSSDatabase(path).close()
+                    prepared.add(path)
+                self._move_to_archive(path, ids)
+                moved[month] += len(ids)
+            total += len(rows)
+            if pause:
+                _wait(pause, stop)
+        return dict(moved)
+    
+    def count_by_month(self, condition: Tuple[str, list]) -> Dict[str, int]:
+        """Число записей под условием по месяцам created_at (оценка переноса в архив)"""
+        where, params = condition
+        try:
+            with self.connection() as conn:
+                return dict(conn.execute(f'''
+                    SELECT COALESCE(strftime('%Y-%m', created_at), 'undated'), COUNT(*) FROM rss_items
+                    WHERE {where} GROUP BY 1 ORDER BY 1
+                ''', params).fetchall())
+        except sqlite3.Error as e:
+            print(f"Ошибка при подсчёте записей для архива: {e}")
+            return {}
+    
+    def _move_to_archive(self, archive_path: str, ids: List[int]):
+        """
+        Копирует записи ids в архив и удаляет их из рабочей базы (две транзакции). Повторы
+        переносимых оригиналов, остающиеся в рабочей базе, в той же транзакции, что и удаление,
+        получают оригиналом самый ранний из оставшихся повторов группы (он сам - без отметки)
+        """
+        columns = ', '.join(ARCHIVE_COLUMNS)
+        placeholders = ', '.join('?' * len(ids))
+        with self._lock:
+            self.conn.execute('ATTACH DATABASE ? AS archive', (archive_path,))
+            try:
+                with self.connection() as conn:
+                    conn.execute(f'''
+                        INSERT OR IGNORE INTO archive.rss_items ({columns})
+                        SELECT {columns} FROM main.rss_items WHERE id IN ({placeholders})
+                    ''', ids)
+                with self.connection() as conn:
+                    # Новые оригиналы групп считаются до изменения строк (подзапрос с GROUP BY)
+                    conn.execute(f'''
+                        UPDATE main.rss_items SET duplicate_of = NULLIF(groups.root, rss_items.id)
+                        FROM (SELECT duplicate_of AS original, MIN(id) AS root FROM main.rss_items
+                              WHERE duplicate_of IN ({placeholders}) AND id NOT IN ({placeholders})
+                              GROUP BY duplicate_of) AS groups
+                        WHERE rss_items.duplicate_of = groups.original AND rss_items.id NOT IN ({placeholders})
+                    ''', ids * 3)
+                    conn.execute(f'DELETE FROM main.rss_items WHERE id IN ({placeholders})', ids)
+            finally:
+                self.conn.execute('DETACH DATABASE archive')
+    
+    def compact(self, step_pages: int = COMPACT_STEP_PAGES, pause: float = 0.0,
+                stop: Optional[threading.Event] = None) -> dict:
+        """
+        Возвращает свободные страницы файлу шагами по step_pages (incremental_vacuum; каждый шаг -
+        своя короткая транзакция) и обновляет статистику планировщика запросов (PRAGMA optimize).
+        Оба шага читают, а затем пишут, поэтому идут в BEGIN IMMEDIATE: при отложенной транзакции
+        чужая запись между чтением и записью дала бы "database is locked" без ожидания busy_timeout.
+        Ошибка сжатия не прерывает проход (записи уже перенесены); после установки stop сжатие
+        завершается на текущем шаге. Возвращает режим auto_vacuum,
+        число освобождённых страниц и размер страницы
+        """
+        with self.connection() as conn:
+            mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+            page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        freed = 0
+        # 2 - INCREMENTAL; в остальных режимах свободные страницы остаются в файле до VACUUM
+        try:
+            while mode == 2 and not (stop is not None and stop.is_set()):
+                with self._lock:
+                    free = self.conn.execute('PRAGMA freelist_count').fetchone()[0]
+                    if not free:
+                        break
+                    # executescript выполняет PRAGMA до конца (execute освободил бы одну страницу)
+                    self.conn.executescript(f'BEGIN IMMEDIATE; PRAGMA incremental_vacuum({min(free, step_pages)}); COMMIT;')
+                    freed += min(free, step_pages)
+                if pause:
+                    _wait(pause, stop)
+            if stop is None or not stop.is_set():
+                with self._lock:
+                    self.conn.executescript('BEGIN IMMEDIATE; PRAGMA optimize; COMMIT;')
+        except sqlite3.Error as e:
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            print(f"Ошибка при сжатии базы данных: {e}")
+        return {'auto_vacuum': mode, 'freed_pages': freed, 'page_size': page_size}
+    
+    def enable_incremental_vacuum(self) -> bool:
+        """
+        Однократный перевод старой базы в auto_vacuum=INCREMENTAL: полный VACUUM, который
+        переписывает файл и на это время блокирует запись (запускать при остановленном парсере)
+        """
+        try:
+            with self._lock:
+                self.conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+                self.conn.execute('VACUUM')
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при сжатии базы данных: {e}")
+            return False
+    
     def search_by_keywords(self, keywords: List[str], search_in_title: bool = True, search_in_description: bool = True) -> List[Tuple]:
-        """Поиск элементов по ключевым словам"""
+        """Поиск элементов по ключевым словам (FTS5 с ранжированием bm25, иначе LIKE)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Формируем SQL запрос для поиска
-                conditions = []
-                params = []
-                
-                for keyword in keywords:
-                    keyword_conditions = []
-                    if search_in_title:
-                        keyword_conditions.append("LOWER(title) LIKE ?")
-                        params.append(f"%{keyword.lower()}%")
-                    if search_in_description:
-                        keyword_conditions.append("LOWER(description) LIKE ?")
-                        params.append(f"%{keyword.lower()}%")
-                    
-                    if keyword_conditions:
-                        conditions.append(f"({' OR '.join(keyword_conditions)})")
-                
-                if not conditions:
-                    return []
-                
-                query = f'''
-                    SELECT DISTINCT id, title, description, link, pub_date, category, created_at
-                    FROM rss_items 
-                    WHERE {' OR '.join(conditions)}
-                    ORDER BY created_at DESC
-                '''
-                
-                cursor.execute(query, params)
-                return cursor.fetchall()
-                
+            return list(self.iter_search_by_keywords(keywords, search_in_title, search_in_description))
         except sqlite3.Error as e:
             print(f"Ошибка при поиске по ключевым словам: {e}")
             return []
+    
+    def iter_search_by_keywords(self, keywords: List[str], search_in_title: bool = True,
+                                search_in_description: bool = True, columns: Tuple[str, ...] = ITEM_COLUMNS,
+                                batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[tuple]:
+        """Записи с любым из ключевых слов по одной (порядок - как у search_by_keywords)"""
+        columns = tuple(columns)
+        item_row_type(columns)
+        if self.fts_enabled:
+            fields = [field for field, enabled in (('title', search_in_title), ('description', search_in_description))
+                      if enabled]
+            match = build_fts_query(keywords, 'OR', fields if len(fields) == 1 else None) if fields else ''
+            if not match:
+                return iter(())
+            return self._iter_rows(f'''
+                SELECT {', '.join(f'r.{column}' for column in columns)}
+                FROM rss_items_fts
+                JOIN rss_items AS r ON r.id = rss_items_fts.rowid
+                WHERE rss_items_fts MATCH ?
+                ORDER BY bm25(rss_items_fts, {FTS_TITLE_WEIGHT}, {FTS_DESCRIPTION_WEIGHT})
+            ''', [match], columns, batch_size)
+        
+        condition = self._like_keywords_condition(keywords, search_in_title, search_in_description)
+        if condition is None:
+            return iter(())
+        return self._iter_rows(f'''
+            SELECT {', '.join(columns)}
+            FROM rss_items
+            WHERE {condition[0]}
+            ORDER BY created_at DESC
+        ''', condition[1], columns, batch_size)
+    
+    @staticmethod
+    def _like_keywords_condition(keywords: List[str], search_in_title: bool,
+                                 search_in_description: bool) -> Optional[Tuple[str, list]]:
+        """Условие WHERE (LIKE) для любого из ключевых слов; None, если искать негде"""
+        conditions = []
+        params = []
+        for keyword in keywords:
+            keyword_conditions = []
+            if search_in_title:
+                keyword_conditions.append("LOWER(title) LIKE ?")
+                params.append(f"%{keyword.lower()}%")
+            if search_in_description:
+                keyword_conditions.append("LOWER(description) LIKE ?")
+                params.append(f"%{keyword.lower()}%")
+            if keyword_conditions:
+                conditions.append(f"({' OR '.join(keyword_conditions)})")
+        if not conditions:
+            return None
+        return ' OR '.join(conditions), params
+    
+    def export_condition(self, keywords: Optional[List[str]] = None, days: Optional[float] = None,
+                         category: Optional[int] = None, search_in_title: bool = True,
+                         search_in_description: bool = True) -> Optional[Tuple[str, list]]:
+        """
+        Условие WHERE для выгрузки записей rss_items: любое из ключевых слов (FTS5, иначе LIKE),
+        созданные за последние days дней, категория. None - под фильтр ничего не попадёт
+        """
+        conditions = []
+        params: list = []
+        if keywords is not None:
+            if self.fts_enabled:
+                columns = [column for column, enabled in (('title', search_in_title),
+                                                          ('description', search_in_description)) if enabled]
+                match = build_fts_query(keywords, 'OR', columns if len(columns) == 1 else None) if columns else ''
+                if not match:
+                    return None
+                conditions.append('id IN (SELECT rowid FROM main.rss_items_fts WHERE rss_items_fts MATCH ?)')
+                params.append(match)
+            else:
+                like = self._like_keywords_condition(keywords, search_in_title, search_in_description)
+                if like is None:
+                    return None
+                conditions.append(f'({like[0]})')
+                params.extend(like[1])
+        if days is not None:
+            # created_at хранится в UTC (CURRENT_TIMESTAMP), как и datetime('now')
+            conditions.append("created_at >= datetime('now', ?)")
+            params.append(f'-{float(days)} days')
+        if category is not None:
+            conditions.append('category = ?')
+            params.append(category)
+        return ' AND '.join(conditions) or '1', params
+    
+    def _id_range(self) -> Tuple[int, int]:
+        with self.connection() as conn:
+            low, high = conn.execute('SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM main.rss_items').fetchone()
+        return low, high
+    
+    def iter_item_batches(self, condition: Tuple[str, list] = ('1', []), batch_size: int = EXPORT_BATCH_SIZE,
+                          progress: Optional[ExportProgress] = None) -> Iterator[List[Tuple]]:
+        """
+        Записи под условием пачками по batch_size (столбцы EXPORT_COLUMNS, по возрастанию id).
+        Каждая пачка читается отдельным запросом по ключу id, так что в памяти не больше
+        одной пачки, а соединение не занято между пачками. progress - не чаще, чем раз
+        в EXPORT_CHUNK_IDS записей
+        """
+        where, params = condition
+        low, high = self._id_range()
+        last_id = low - 1
+        rows_done = 0
+        next_report = EXPORT_CHUNK_IDS
+        while True:
+            with self.connection() as conn:
+                rows = conn.execute(f'''
+                    SELECT {', '.join(EXPORT_COLUMNS)} FROM rss_items
+                    WHERE id > ? AND ({where})
+                    ORDER BY id LIMIT ?
+                ''', [last_id, *params, batch_size]).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            rows_done += len(rows)
+            if progress is not None and rows_done >= next_report:
+                next_report = rows_done + EXPORT_CHUNK_IDS
+                progress(rows_done, (last_id - low + 1) / (high - low + 1) if high >= low else 1.0)
+            yield rows
+    
+    def export_to_database(self, output_path: str, condition: Tuple[str, list] = ('1', []),
+                           progress: Optional[ExportProgress] = None) -> int:
+        """
+        Копирует записи под условием в базу output_path средствами SQLite: ATTACH и
+        INSERT ... SELECT по диапазонам id (EXPORT_CHUNK_IDS), без передачи строк в Python.
+        created_at и updated_at сохраняются; ссылки, уже имеющиеся в целевой базе, пропускаются.
+        progress вызывается после каждого диапазона, если их больше одного. Возвращает число скопированных записей (-1 при ошибке)
+        """
+        # Схема целевой базы (индексы, FTS, сводная статистика) - как у рабочей
+        try:
+            RSSDatabase(output_path).close()
+        except sqlite3.Error as e:
+            print(f"Ошибка при создании базы выгрузки {output_path}: {e}")
+            return -1
+        where, params = condition
+        columns = 'title, description, link, pub_date, category, created_at, updated_at, pub_ts'
+        copied = 0
+        with self._lock:
+            try:
+                self.conn.execute('ATTACH DATABASE ? AS export', (output_path,))
+            except sqlite3.Error as e:
+                print(f"Ошибка при подключении базы выгрузки: {e}")
+                return -1
+            try:
+                low, high = self._id_range()
+                with self.connection() as conn:
+                    for start in range(low, high + 1, EXPORT_CHUNK_IDS):
+                        end = min(start + EXPORT_CHUNK_IDS - 1, high)
+                        cursor = conn.execute(f'''
+                            INSERT OR IGNORE INTO export.rss_items ({columns})
+                            SELECT {columns} FROM main.rss_items
+                            WHERE id BETWEEN ? AND ? AND ({where})
+                            ORDER BY id
+                        ''', [start, end, *params])
+                        copied += max(cursor.rowcount, 0)
+                        if progress is not None and high - low >= EXPORT_CHUNK_IDS:
+                            progress(copied, (end - low + 1) / (high - low + 1))
+                return copied
+            except sqlite3.Error as e:
+                print(f"Ошибка при выгрузке в базу {output_path}: {e}")
+                return -1
+            finally:
+                self.conn.execute('DETACH DATABASE export')
+    
+    def search_items(self, query: str, category: Optional[int] = None,
+                     limit: int = 50, offset: int = 0) -> List[dict]:
+        """
+        Полнотекстовый поиск для веб-интерфейса: все слова запроса (по префиксу),
+        ранжирование bm25 и подсвеченный фрагмент описания в поле 'snippet'
+        """
+        match = build_fts_query(re.findall(r'\w+', query or ''), 'AND')
+        if not match or not self.fts_enabled:
+            return []
+        
+        sql = f'''
+            SELECT r.id, r.title, r.description, r.link, r.pub_date, r.category, r.created_at,
+                   snippet(rss_items_fts, 1, ?, ?, '…', 24)
+            FROM rss_items_fts
+            JOIN rss_items AS r ON r.id = rss_items_fts.rowid
+            WHERE rss_items_fts MATCH ?
+        '''
+        params = [FTS_MARK_OPEN, FTS_MARK_CLOSE, match]
+        if category is not None:
+            sql += ' AND r.category = ?'
+            params.append(category)
+        sql += f' ORDER BY bm25(rss_items_fts, {FTS_TITLE_WEIGHT}, {FTS_DESCRIPTION_WEIGHT}) LIMIT ? OFFSET ?'
+        params.extend([limit, offset])
+        
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql, params)
+                return [{
+                    'id': row[0],
+                    'title': row[1],
+                    'description': row[2],
+                    'link': row[3],
+                    'pub_date': row[4],
+                    'category': row[5],
+                    'created_at': row[6],
+                    'snippet': highlight_snippet(row[7])
+                } for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            print(f"Ошибка при полнотекстовом поиске: {e}")
+            return []
+    
+    def count_search(self, query: str, category: Optional[int] = None) -> int:
+        """Количество результатов полнотекстового поиска"""
+        match = build_fts_query(re.findall(r'\w+', query or ''), 'AND')
+        if not match or not self.fts_enabled:
+            return 0
+        
+        sql = 'SELECT COUNT(*) FROM rss_items_fts'
+        params = [match]
+        if category is not None:
+            sql += ' JOIN rss_items AS r ON r.id = rss_items_fts.rowid WHERE rss_items_fts MATCH ? AND r.category = ?'
+            params.append(category)
+        else:
+            sql += ' WHERE rss_items_fts MATCH ?'
+        
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql, params)
+                return cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Ошибка при подсчёте результатов поиска: {e}")
+            return 0
 
     def create_filtered_database(self, keywords: List[str], output_path: str = None, 
-                               search_in_title: bool = True, search_in_description: bool = True) -> str:
-        """Создание новой базы данных с проектами, содержащими ключевые слова"""
+                               search_in_title: bool = True, search_in_description: bool = True,
+                               progress: Optional[ExportProgress] = print_export_progress) -> str:
+        """Создание новой базы данных с проектами, содержащими ключевые слова (с исходными датами)"""
         if output_path is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             keywords_str = "_".join(keywords[:3])  # Используем первые 3 ключевых слова для имени
             output_path = f"rss_filtered_{keywords_str}_{timestamp}.db"
         
-        try:
-            # Создаем новую базу данных
-            new_db = RSSDatabase(output_path)
-            
-            # Получаем отфильтрованные элементы
-            filtered_items = self.search_by_keywords(keywords, search_in_title, search_in_description)
-            
-            if not filtered_items:
-                print(f"Не найдено проектов с ключевыми словами: {', '.join(keywords)}")
-                return output_path
-            
-            # Копируем элементы в новую базу
-            added_count = 0
-            for item in filtered_items:
-                id_val, title, description, link, pub_date, category, created_at = item
-                
-                # Добавляем элемент в новую базу
-                success = new_db.add_item(title, description, link, pub_date, category)
-                if success:
-                    added_count += 1
-            
-            print(f"✓ Создана база данных с отфильтрованными проектами: {output_path}")
-            print(f"✓ Скопировано {added_count} проектов с ключевыми словами: {', '.join(keywords)}")
-            
-            # Показываем статистику новой базы
-            new_stats = new_db.get_statistics()
-            print(f"✓ Статистика новой базы: {new_stats.get('total_items', 0)} записей")
-            
-            return output_path
-            
-        except Exception as e:
-            print(f"Ошибка при создании отфильтрованной базы: {e}")
+        condition = self.export_condition(keywords, search_in_title=search_in_title,
+                                          search_in_description=search_in_description)
+        return self._create_export_database(
+            output_path, condition, progress,
+            "отфильтрованными проектами", f"с ключевыми словами: {', '.join(keywords)}",
+            f"Не найдено проектов с ключевыми словами: {', '.join(keywords)}")
+    
+    def _create_export_database(self, output_path: str, condition: Optional[Tuple[str, list]],
+                                progress: Optional[ExportProgress], title: str, description: str,
+                                not_found: str) -> str:
+        """Выгрузка в новую базу с отчётом (общая часть create_*_database)"""
+        copied = self.export_to_database(output_path, condition, progress) if condition is not None else 0
+        if copied < 0:
             return ""
+        if copied == 0:
+            print(not_found)
+            return output_path
+        
+        print(f"✓ Создана база данных с {title}: {output_path}")
+        print(f"✓ Скопировано {copied} проектов {description}")
+        
+        # Показываем статистику новой базы
+        new_db = RSSDatabase(output_path)
+        new_stats = new_db.get_statistics()
+        new_db.close()
+        print(f"✓ Статистика новой базы: {new_stats.get('total_items', 0)} записей")
+        return output_path
 
-    def get_recent_items(self, days: int = 10) -> List[Tuple]:
-        """Получение элементов за последние N дней"""
+    def get_recent_items(self, days: float = 10) -> List[Tuple]:
+        """Получение элементов, сохранённых за последние N дней (новые сверху)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Получаем все элементы для фильтрации
-                cursor.execute('''
+            with self.connection() as conn:
+                # Диапазон по индексу idx_created_id: время зависит от числа записей в окне, а не в таблице
+                cursor = conn.execute('''
                     SELECT id, title, description, link, pub_date, category, created_at
-                    FROM rss_items 
-                    ORDER BY created_at DESC
-                ''')
-                
-                all_items = cursor.fetchall()
-                recent_items = []
-                cutoff_date = datetime.now() - timedelta(days=days)
-                
-                for item in all_items:
-                    id_val, title, description, link, pub_date, category, created_at = item
-                    
-                    # Пробуем парсить created_at
-                    try:
-                        item_date = datetime.fromisoformat(created_at.replace('Z', '+00:00').replace('+00:00', ''))
-                    except:
-                        # Если не удается распарсить, пропускаем
-                        continue
-                    
-                    # Проверяем, попадает ли дата в диапазон
-                    if item_date >= cutoff_date:
-                        recent_items.append(item)
-                
-                return recent_items
-                
+                    FROM rss_items
+                    WHERE created_at >= datetime('now', ?)
+                    ORDER BY created_at DESC, id DESC
+                ''', (f'-{float(days)} days',))
+                return cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Ошибка при получении недавних элементов: {e}")
             return []
+    
+    @staticmethod
+    def _window_bound(field: str, timestamp: float):
+        """Граница окна в представлении поля: created_at - строка UTC, pub_ts - Unix-время"""
+        if field == 'created_at':
+            return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        return timestamp
+    
+    def iter_items_window(self, since: Optional[float] = None, until: Optional[float] = None,
+                          field: str = 'created_at', category: Optional[int] = None,
+                          chunk_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[Tuple]]:
+        """
+        Записи с since <= field < until (Unix-время; None - без границы), новые сверху,
+        пачками по chunk_size. field - created_at (дата сохранения) или pub_ts (дата
+        публикации; записи без распознанной pub_date не попадают). Каждая пачка - отдельный
+        запрос по индексу с продолжением от ключа (field, id) последней записи, так что
+        соединение не занято между пачками, а время зависит от размера окна, а не таблицы
+        """
+        if field not in TIME_WINDOW_FIELDS:
+            raise ValueError(f"Окно по полю {field} не поддерживается: {', '.join(TIME_WINDOW_FIELDS)}")
+        conditions = [f'{field} IS NOT NULL']
+        params: list = []
+        if since is not None:
+            conditions.append(f'{field} >= ?')
+            params.append(self._window_bound(field, since))
+        if until is not None:
+            conditions.append(f'{field} < ?')
+            params.append(self._window_bound(field, until))
+        if category is not None:
+            conditions.append('category = ?')
+            params.append(category)
+        where = ' AND '.join(conditions)
+        key = None
+        while True:
+            keyset = f' AND ({field}, id) < (?, ?)' if key is not None else ''
+            with self.connection() as conn:
+                rows = conn.execute(f'''
+                    SELECT id, title, description, link, pub_date, category, created_at, {field}
+                    FROM rss_items
+                    WHERE {where}{keyset}
+                    ORDER BY {field} DESC, id DESC
+                    LIMIT ?
+                ''', [*params, *(key or ()), chunk_size]).fetchall()
+            if not rows:
+                return
+            key = (rows[-1][7], rows[-1][0])
+            yield [row[:7] for row in rows]
+            if len(rows) < chunk_size:
+                return
 
-    def create_recent_database(self, days: int = 10, output_path: str = None) -> str:
-        """Создание новой базы данных с элементами за последние N дней"""
+    def create_recent_database(self, days: int = 10, output_path: str = None,
+                               progress: Optional[ExportProgress] = print_export_progress) -> str:
+        """Создание новой базы данных с элементами за последние N дней (с исходными датами)"""
         if output_path is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_path = f"rss_recent_{days}days_{timestamp}.db"
         
+        return self._create_export_database(
+            output_path, self.export_condition(days=days), progress,
+            "недавними проектами", f"за последние {days} дней",
+            f"Не найдено элементов за последние {days} дней")
+
+
+class ReadOnlyDatabase(RSSDatabase):
+    """
+    Доступ к базе только для чтения через пул соединений (mode=ro, PRAGMA query_only)
+    для рабочих процессов веб-интерфейса. Все методы чтения RSSDatabase работают без общей
+    блокировки: каждый поток берёт своё соединение, а в режиме WAL чтение идёт по снимку
+    и не ждёт записи парсера. Схему создаёт и обновляет RSSDatabase до запуска читателей
+    """
+    
+    def __init__(self, db_path: str = "rss_data.db", pool_size: int = 8):
+        self.db_path = db_path
+        self.pool_size = max(pool_size, 1)
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all: List[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
+        self._local = threading.local()  # соединение, занятое текущим потоком (вложенные вызовы)
+        with self.connection() as conn:
+            cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rss_items_fts'")
+            self.fts_enabled = cursor.fetchone() is not None
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Открывает соединение только для чтения"""
+        return connect_read_only(self.db_path)
+    
+    def _acquire(self) -> sqlite3.Connection:
+        """Свободное соединение пула; новое открывается, пока пул не заполнен, иначе ждём освобождения"""
         try:
-            # Создаем новую базу данных
-            new_db = RSSDatabase(output_path)
-            
-            # Получаем недавние элементы
-            recent_items = self.get_recent_items(days)
-            
-            if not recent_items:
-                print(f"Не найдено элементов за последние {days} дней")
-                return output_path
-            
-            # Копируем элементы в новую базу
-            added_count = 0
-            for item in recent_items:
-                id_val, title, description, link, pub_date, category, created_at = item
-                
-                # Добавляем элемент в новую базу
-                success = new_db.add_item(title, description, link, pub_date, category)
-                if success:
-                    added_count += 1
-            
-            print(f"✓ Создана база данных с недавними проектами: {output_path}")
-            print(f"✓ Скопировано {added_count} проектов за последние {days} дней")
-            
-            # Показываем статистику новой базы
-            new_stats = new_db.get_statistics()
-            print(f"✓ Статистика новой базы: {new_stats.get('total_items', 0)} записей")
-            
-            return output_path
-            
-        except Exception as e:
-            print(f"Ошибка при создании базы недавних проектов: {e}")
-            return ""
\ No newline at end of file
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._pool_lock:
+            if len(self._all) < self.pool_size:
+                conn = self._connect()
+                self._all.append(conn)
+                return conn
+        return self._pool.get()
+    
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Соединение пула на время блока; вложенный вызов в том же потоке получает то же соединение"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+        conn = self._acquire()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            # Снимок чтения не должен переживать блок, иначе следующий запрос увидит старые данные
+            if conn.in_transaction:
+                conn.rollback()
+            self._pool.put(conn)
+    
+    def _reader(self):
+        """Потоковое чтение идёт через соединение пула"""
+        return self.connection()
+    
+    def close(self):
+        """Закрывает все соединения пула"""
+        with self._pool_lock:
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
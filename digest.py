@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Дайджест уведомлений: несколько проектов в одном сообщении Telegram
+
+Подходящие проекты копятся в буфере чата, пока не истечёт окно
+или не наберётся заданное количество, после чего упаковываются
+в минимальное число сообщений, укладывающихся в лимит Telegram.
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import NOTIFY_DIGEST_WINDOW, NOTIFY_DIGEST_MAX_ITEMS
+
+# Максимальная длина текста сообщения Telegram
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+ENTRY_SEPARATOR = "\n\n"
+
+
+def digest_header(count: int) -> str:
+    """Заголовок сообщения-дайджеста"""
+    return f"🆕 <b>Новые проекты FL.ru: {count}</b>"
+
+
+def group_digest(entries: List[str], limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[List[str]]:
+    """
+    Раскладывает отформатированные проекты по сообщениям длиной до limit (жадно, по порядку).
+    Проекты не разрезаются; слишком длинный проект обрезается до лимита
+    """
+    # Место под заголовок с самым длинным возможным счётчиком
+    budget = limit - len(digest_header(len(entries))) - len(ENTRY_SEPARATOR)
+    groups: List[List[str]] = []
+    current: List[str] = []
+    size = 0
+
+    for entry in entries:
+        if len(entry) > budget:
+            entry = entry[:budget - 1] + "…"
+        added = len(entry) + (len(ENTRY_SEPARATOR) if current else 0)
+        if current and size + added > budget:
+            groups.append(current)
+            current, size = [], 0
+            added = len(entry)
+        current.append(entry)
+        size += added
+
+    if current:
+        groups.append(current)
+    return groups
+
+
+def render_digest(group: List[str]) -> str:
+    """Текст сообщения-дайджеста из группы проектов"""
+    return digest_header(len(group)) + ENTRY_SEPARATOR + ENTRY_SEPARATOR.join(group)
+
+
+def pack_digest(entries: List[str], limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """Упаковывает проекты в минимальное число сообщений длиной до limit"""
+    return [render_digest(group) for group in group_digest(entries, limit)]
+
+
+class DigestBuffer:
+    """Буфер проектов по чатам со сбросом по времени или количеству"""
+
+    def __init__(self, send: Callable[[object, str, List], None], window: float = NOTIFY_DIGEST_WINDOW,
+                 max_items: int = NOTIFY_DIGEST_MAX_ITEMS, limit: int = TELEGRAM_MESSAGE_LIMIT):
+        """
+        send(chat_id, text, keys) - отправка готового сообщения (например, в NotificationQueue);
+        keys - ключи вошедших в него проектов, переданные в add()
+        """
+        self.send = send
+        self.window = window
+        self.max_items = max(1, max_items)
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._entries: Dict[object, List[Tuple[str, object]]] = {}
+        self._timers: Dict[object, threading.Timer] = {}
+
+    def add(self, chat_id, entry: str, key=None):
+        """Добавляет проект в буфер чата (key возвращается в send вместе с сообщением)"""
+        with self._lock:
+            entries = self._entries.setdefault(chat_id, [])
+            entries.append((entry, key))
+            full = len(entries) >= self.max_items
+            if not full and chat_id not in self._timers:
+                timer = threading.Timer(self.window, self.flush_chat, args=(chat_id,))
+                timer.daemon = True
+                self._timers[chat_id] = timer
+                timer.start()
+        if full:
+            self.flush_chat(chat_id)
+
+    def flush_chat(self, chat_id):
+        """Отправляет накопленные проекты чата"""
+        with self._lock:
+            entries = self._entries.pop(chat_id, [])
+            timer = self._timers.pop(chat_id, None)
+        if timer is not None:
+            timer.cancel()
+        if not entries:
+            return
+
+        groups = group_digest([entry for entry, _ in entries], self.limit)
+        keys = [key for _, key in entries]
+        for group in groups:
+            self.send(chat_id, render_digest(group), keys[:len(group)])
+            keys = keys[len(group):]
+
+    def flush(self):
+        """Отправляет буферы всех чатов"""
+        with self._lock:
+            chat_ids = list(self._entries)
+        for chat_id in chat_ids:
+            self.flush_chat(chat_id)
+
+    def pending(self, chat_id: Optional[object] = None) -> int:
+        """Число проектов, ожидающих отправки"""
+        with self._lock:
+            if chat_id is not None:
+                return len(self._entries.get(chat_id, ()))
+            return sum(len(entries) for entries in self._entries.values())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Выгрузка проектов из базы: SQLite, JSON Lines, CSV и Parquet
+
+Записи читаются пачками по id (RSSDatabase.iter_item_batches) и сразу пишутся
+в файл, так что в памяти не бывает больше одной пачки. Выгрузка в SQLite
+идёт средствами самой базы (ATTACH и INSERT ... SELECT) с исходными датами.
+Parquet требует пакета pyarrow.
+
+Запуск: python export.py rss_export.jsonl --keywords python django --days 30
+"""
+
+import argparse
+import csv
+import json
+import os
+from typing import Iterable, List, Optional, Tuple
+
+from database import EXPORT_BATCH_SIZE, EXPORT_COLUMNS, ExportProgress, RSSDatabase, print_export_progress
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = None
+
+# Строк в группе Parquet (столько записей копится в памяти перед записью)
+PARQUET_ROW_GROUP = 65536
+
+# Формат по расширению файла
+FORMATS = {'.db': 'sqlite', '.sqlite': 'sqlite', '.sqlite3': 'sqlite',
+           '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.csv': 'csv', '.parquet': 'parquet'}
+
+
+class JsonlWriter:
+    """Одна запись - одна строка JSON"""
+
+    def __init__(self, path: str):
+        self.file = open(path, 'w', encoding='utf-8', newline='\n')
+
+    def write_batch(self, rows: List[Tuple]):
+        self.file.writelines(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + '\n' for row in rows)
+
+    def close(self):
+        self.file.close()
+
+
+class CsvWriter:
+    """CSV с заголовком (UTF-8 с BOM - файл открывается в Excel без перекодировки)"""
+
+    def __init__(self, path: str):
+        self.file = open(path, 'w', encoding='utf-8-sig', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(EXPORT_COLUMNS)
+
+    def write_batch(self, rows: List[Tuple]):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """Parquet: пачки копятся до PARQUET_ROW_GROUP строк и пишутся одной группой строк"""
+
+    def __init__(self, path: str):
+        if pyarrow is None:
+            raise RuntimeError("Для выгрузки в Parquet установите pyarrow: pip install pyarrow")
+        self.schema = pyarrow.schema([
+            ('id', pyarrow.int64()),
+            ('title', pyarrow.string()),
+            ('description', pyarrow.string()),
+            ('link', pyarrow.string()),
+            ('pub_date', pyarrow.string()),
+            ('category', pyarrow.int64()),
+            ('created_at', pyarrow.string()),
+        ])
+        self.writer = parquet.ParquetWriter(path, self.schema, compression='zstd')
+        self.pending: List[Tuple] = []
+
+    def write_batch(self, rows: List[Tuple]):
+        self.pending.extend(rows)
+        if len(self.pending) >= PARQUET_ROW_GROUP:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        columns = list(zip(*self.pending))
+        self.writer.write_table(pyarrow.Table.from_arrays(
+            [pyarrow.array(column, type=field.type) for column, field in zip(columns, self.schema)],
+            schema=self.schema))
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+WRITERS = {'jsonl': JsonlWriter, 'csv': CsvWriter, 'parquet': ParquetWriter}
+
+
+def detect_format(path: str) -> str:
+    """Формат выгрузки по расширению файла"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки {extension or path}: {', '.join(sorted(FORMATS))}")
+    return FORMATS[extension]
+
+
+def write_batches(batches: Iterable[List[Tuple]], path: str, fmt: str) -> int:
+    """Пишет пачки записей в файл формата fmt; возвращает число записей"""
+    writer = WRITERS[fmt](path)
+    written = 0
+    try:
+        for rows in batches:
+            writer.write_batch(rows)
+            written += len(rows)
+    finally:
+        writer.close()
+    return written
+
+
+def export_items(db: RSSDatabase, path: str, fmt: Optional[str] = None, keywords: Optional[List[str]] = None,
+                 days: Optional[float] = None, category: Optional[int] = None,
+                 batch_size: int = EXPORT_BATCH_SIZE, progress: Optional[ExportProgress] = None) -> int:
+    """
+    Выгружает проекты под фильтром (ключевые слова, последние days дней, категория) в файл path.
+    Формат - fmt или по расширению. Возвращает число выгруженных записей (-1 при ошибке БД)
+    """
+    fmt = fmt or detect_format(path)
+    condition = db.export_condition(keywords, days, category)
+    if fmt == 'sqlite':
+        return db.export_to_database(path, condition, progress) if condition is not None else 0
+    if condition is None:
+        return write_batches([], path, fmt)
+    return write_batches(db.iter_item_batches(condition, batch_size, progress), path, fmt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output', help='файл выгрузки: .db, .jsonl, .csv или .parquet')
+    parser.add_argument('--format', choices=sorted(set(FORMATS.values())), help='формат (по умолчанию - по расширению)')
+    parser.add_argument('--db', default='rss_data.db', help='исходная база данных')
+    parser.add_argument('--keywords', nargs='+', help='любое из ключевых слов в заголовке или описании')
+    parser.add_argument('--days', type=float, help='только проекты за последние N дней')
+    parser.add_argument('--category', type=int, help='только проекты категории')
+    parser.add_argument('--quiet', action='store_true', help='не показывать ход выгрузки')
+    args = parser.parse_args()
+
+    db = RSSDatabase(args.db)
+    try:
+        exported = export_items(db, args.output, args.format, args.keywords, args.days, args.category,
+                                progress=None if args.quiet else print_export_progress)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    finally:
+        db.close()
+    if exported < 0:
+        raise SystemExit(1)
+    print(f"✓ Выгружено {exported} проектов: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
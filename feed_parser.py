@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Потоковый разбор RSS-лент
+
+Элементы <item> разбираются по мере поступления фрагментов ответа
+через XMLPullParser и сразу удаляются из дерева, поэтому потребление
+памяти не зависит от размера ленты.
+"""
+
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Iterator, Optional
+
+# Размер фрагмента при чтении ответа
+FEED_CHUNK_SIZE = 16 * 1024
+
+# Лёгкая запись элемента ленты
+RSSItem = namedtuple('RSSItem', ['title', 'description', 'link', 'pub_date'])
+
+ITEM_FIELDS = {'title': 'title', 'description': 'description', 'link': 'link', 'pubDate': 'pub_date'}
+
+
+def parse_pub_date(pub_date: str) -> Optional[float]:
+    """Преобразует дату RFC-822 из <pubDate> в Unix-время (None, если не удалось)"""
+    if not pub_date:
+        return None
+    try:
+        return parsedate_to_datetime(pub_date).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _item_from_element(elem: ET.Element) -> RSSItem:
+    """Извлекает поля элемента <item> (отсутствующие поля - пустые строки)"""
+    values = dict.fromkeys(RSSItem._fields, "")
+    for child in elem:
+        field = ITEM_FIELDS.get(child.tag)
+        if field is not None and not values[field]:
+            values[field] = child.text or ""
+    return RSSItem(**values)
+
+
+def iter_rss_items(chunks: Iterable[bytes]) -> Iterator[RSSItem]:
+    """Генератор элементов ленты из потока байтовых фрагментов (ET.ParseError при ошибке)"""
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    stack = []
+
+    def drain():
+        for event, elem in parser.read_events():
+            if event == 'start':
+                stack.append(elem)
+                continue
+
+            stack.pop()
+            if elem.tag == 'item':
+                yield _item_from_element(elem)
+                # Удаляем разобранный элемент из родителя, чтобы дерево не росло
+                if stack:
+                    stack[-1].remove(elem)
+                elem.clear()
+
+    for chunk in chunks:
+        if chunk:
+            parser.feed(chunk)
+            yield from drain()
+
+    parser.close()
+    yield from drain()
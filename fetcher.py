@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Асинхронный движок загрузки RSS-лент FL.ru
+
+Категории загружаются параллельно с ограничением частоты запросов
+на каждый хост (token bucket + случайный джиттер), а разбор, сохранение
+в БД и уведомления выполняются конвейером по мере поступления ответов.
+"""
+
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from config import (
+    FETCH_MAX_CONCURRENCY, FETCH_RATE_PER_MINUTE, FETCH_BURST,
+    FETCH_JITTER_MIN, FETCH_JITTER_MAX
+)
+
+
+class TokenBucket:
+    """Ограничитель частоты запросов по алгоритму token bucket"""
+
+    def __init__(self, rate_per_minute: float, capacity: int = 1,
+                 jitter: Tuple[float, float] = (0.0, 0.0),
+                 clock: Callable[[], float] = time.monotonic):
+        """Инициализация: скорость пополнения, ёмкость и диапазон джиттера (сек)"""
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, capacity)
+        self.jitter = jitter
+        self.clock = clock
+        self.tokens = float(self.capacity)
+        self.updated_at = clock()
+        self._lock = None
+
+    def _refill(self):
+        """Пополняет корзину токенов за прошедшее время"""
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        """Ожидает свободный токен (запросы обслуживаются по очереди)"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    break
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+            low, high = self.jitter
+            if high > 0:
+                await asyncio.sleep(random.uniform(low, high))
+
+
+class HostRateLimiter:
+    """Набор token bucket'ов - по одному на каждый хост"""
+
+    def __init__(self, rate_per_minute: float = FETCH_RATE_PER_MINUTE, burst: int = FETCH_BURST,
+                 jitter: Tuple[float, float] = (FETCH_JITTER_MIN, FETCH_JITTER_MAX)):
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self.jitter = jitter
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    def bucket_for(self, url: str) -> TokenBucket:
+        """Возвращает ограничитель для хоста из URL"""
+        host = urlparse(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate_per_minute, self.burst, self.jitter)
+        return self.buckets[host]
+
+    async def acquire(self, url: str):
+        """Ожидает разрешения на запрос к хосту"""
+        await self.bucket_for(url).acquire()
+
+
+class AsyncFeedFetcher:
+    """Параллельная загрузка категорий с конвейерной обработкой ответов"""
+
+    def __init__(self, fetch: Callable, process: Callable,
+                 rate_limiter: Optional[HostRateLimiter] = None,
+                 max_concurrency: int = FETCH_MAX_CONCURRENCY):
+        """
+        fetch(url) - блокирующая загрузка ленты (выполняется в пуле потоков)
+        process(category, response) - разбор, сохранение и уведомления;
+        вызывается строго последовательно в отдельном потоке
+        """
+        self.fetch = fetch
+        self.process = process
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.max_concurrency = max(1, max_concurrency)
+
+    async def _fetch_category(self, category: int, url: str, semaphore: asyncio.Semaphore,
+                              pool: ThreadPoolExecutor, queue: asyncio.Queue):
+        """Загружает одну категорию и передаёт ответ в очередь обработки"""
+        loop = asyncio.get_running_loop()
+        async with semaphore:
+            await self.rate_limiter.acquire(url)
+            try:
+                response = await loop.run_in_executor(pool, self.fetch, url)
+            except Exception as e:
+                print(f"Ошибка при загрузке категории {category}: {e}")
+                response = None
+        await queue.put((category, response))
+
+    async def _consume(self, queue: asyncio.Queue, total: int, pool: ThreadPoolExecutor) -> List:
+        """Обрабатывает ответы в порядке поступления"""
+        loop = asyncio.get_running_loop()
+        results = []
+        for _ in range(total):
+            category, response = await queue.get()
+            try:
+                result = await loop.run_in_executor(pool, self.process, category, response)
+                results.append(result)
+            except Exception as e:
+                print(f"Ошибка при обработке категории {category}: {e}")
+        return results
+
+    async def run(self, categories: Iterable[int], base_url: str) -> List:
+        """Выполняет полный проход по категориям, возвращает результаты обработки"""
+        categories = list(categories)
+        if not categories:
+            return []
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        queue: asyncio.Queue = asyncio.Queue()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as fetch_pool, \
+                ThreadPoolExecutor(max_workers=1) as process_pool:
+            consumer = asyncio.ensure_future(self._consume(queue, len(categories), process_pool))
+            await asyncio.gather(*(
+                self._fetch_category(category, f"{base_url}{category}", semaphore, fetch_pool, queue)
+                for category in categories
+            ))
+            return await consumer
+
+
+def run_sweep(categories: Iterable[int], fetch: Callable, process: Callable, base_url: str,
+              rate_limiter: Optional[HostRateLimiter] = None,
+              max_concurrency: int = FETCH_MAX_CONCURRENCY) -> List:
+    """Синхронная обёртка: полный проход по категориям через AsyncFeedFetcher"""
+    fetcher = AsyncFeedFetcher(fetch, process, rate_limiter, max_concurrency)
+    return asyncio.run(fetcher.run(categories, base_url))
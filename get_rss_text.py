@@ -5,100 +5,113 @@ FL.ru RSS Parser
 Парсер RSS-ленты с сайта FL.ru для получения информации о заказах.
 Сохраняет в базу данных SQLite и отправляет уведомления в Telegram.
 
-Расписание: запуск сразу при включении, затем в 9:00, 11:00, 13:00, 15:00, 17:00 ежедневно
+Расписание: запуск сразу при включении, затем адаптивный опрос категорий
+в окне SCHEDULER_ACTIVE_HOURS (по умолчанию 9:00-17:30)
 """
 
+import hashlib
+from collections import Counter
 import requests
 import xml.etree.ElementTree as ET
-from datetime import datetime, time
+from datetime import datetime
 import sys
-import os
 import time as time_module
-import random
-import schedule
 import signal
 
 # Импортируем конфигурацию
 from config import (
-    USER_AGENT, COOKIES, REQUEST_TIMEOUT,
-    DISPLAY_DATE_FORMAT
+    REQUEST_TIMEOUT,
+    DISPLAY_DATE_FORMAT, FETCH_MAX_CONCURRENCY, FETCH_RATE_PER_MINUTE, METRICS_HOST, METRICS_PORT,
+    EARLY_STOP_AFTER_KNOWN, ITEM_BATCH_SIZE, NOTIFY_FLUSH_TIMEOUT, SCHEDULER_ACTIVE_HOURS, RETENTION_INTERVAL
 )
 
 # Импортируем модуль для работы с базой данных
-from database import RSSDatabase
+from database import RSSDatabase, ItemStatus
+
+# Импортируем потоковый разбор лент
+from feed_parser import iter_rss_items, parse_pub_date, FEED_CHUNK_SIZE
+
+# Импортируем общую HTTP-сессию с пулом соединений
+from http_session import get_http_session
+
+# Импортируем асинхронный движок загрузки лент
+from fetcher import run_sweep
+
+# Импортируем наблюдатель за файлами фильтров и категорий
+from config_watcher import get_config_watcher, load_categories
 
 # Импортируем Telegram уведомления
-from telegram_bot import send_telegram_notification
+from telegram_bot import get_telegram_notifier
+
+# Импортируем отправку уведомлений из outbox
+from outbox import get_outbox_sender
+
+# Импортируем адаптивный планировщик
+from scheduler import AdaptiveScheduler
+
+# Импортируем архивирование и сжатие базы
+from retention import RetentionWorker
+
+# Импортируем метрики Prometheus
+from metrics import FETCH_SECONDS, FETCH_TOTAL, PARSE_SECONDS, ITEMS_PARSED, start_metrics_server
 
 # Базовый URL RSS-ленты
 RSS_BASE_URL = "https://www.fl.ru/rss/all.xml?category="
 
-# Заголовки для HTTP-запросов
-headers = {
-    "User-Agent": USER_AGENT,
-    "Cookie": COOKIES
-}
-
 # Флаг для остановки планировщика
 running = True
 
+# Работающий планировщик (останавливается по сигналу)
+scheduler = None
+
 
 def signal_handler(signum, frame):
     """Обработчик сигнала для корректного завершения"""
     global running
     print("\nПолучен сигнал завершения. Останавливаем планировщик...")
     running = False
-
-
-def get_rss_data(url):
-    """Получает данные RSS-ленты"""
+    if scheduler is not None:
+        scheduler.stop()
+
+
+def get_rss_data(url, database=None):
+    """Получает данные RSS-ленты (условный GET, если передана база с кэшем валидаторов)"""
+    request_headers = {}
+    if database is not None:
+        cached = database.get_feed_cache(url)
+        if cached:
+            if cached['etag']:
+                request_headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                request_headers['If-Modified-Since'] = cached['last_modified']
+    
+    started = time_module.perf_counter()
     try:
-        response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        response = get_http_session().get(url, headers=request_headers, timeout=REQUEST_TIMEOUT, stream=True)
+        FETCH_SECONDS.observe(time_module.perf_counter() - started)
+        FETCH_TOTAL.labels(response.status_code).inc()
         return response
     except requests.exceptions.RequestException as e:
+        FETCH_TOTAL.labels('error').inc()
         print(f"Ошибка при получении данных: {e}")
         return None
 
 
+def get_feed_url(response):
+    """Возвращает исходный URL запроса (до редиректов) - ключ кэша ленты"""
+    if response.history:
+        return response.history[0].url
+    return response.url
+
+
 def load_included_categories(file_path="included_categories.txt"):
     """Загружает список категорий для опроса из файла"""
-    included = set()
-    
-    if not os.path.exists(file_path):
-        print(f"Файл {file_path} не найден. Будут опрошены все категории.")
-        return set(range(1, 11))  # Все категории по умолчанию
-    
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                # Пропускаем пустые строки и комментарии
-                if line and not line.startswith('#'):
-                    try:
-                        category = int(line)
-                        included.add(category)
-                    except ValueError:
-                        print(f"Предупреждение: некорректный номер категории '{line}' в файле {file_path}")
-    except Exception as e:
-        print(f"Ошибка при чтении файла {file_path}: {e}")
-    
-    return included
+    return load_categories(file_path)
 
 
-def process_rss_item(item, category, database):
-    """Обрабатывает один элемент RSS и сохраняет его в базу данных"""
-    title_elem = item.find('title')
-    description_elem = item.find('description')
-    link_elem = item.find('link')
-    pub_date_elem = item.find('pubDate')
-    
-    # Извлекаем текст или используем пустую строку
-    title = title_elem.text if title_elem is not None else ""
-    description = description_elem.text if description_elem is not None else ""
-    link = link_elem.text if link_elem is not None else ""
-    pub_date = pub_date_elem.text if pub_date_elem is not None else ""
-    
-    # Выводим информацию в консоль
+def print_rss_item(item):
+    """Выводит информацию об элементе RSS в консоль"""
+    title, description, link, pub_date = item
     print(f"Заголовок: {title}")
     if description:
         print(f"Описание: {description[:100]}{'...' if len(description) > 100 else ''}")
@@ -106,54 +119,369 @@ def process_rss_item(item, category, database):
     if pub_date:
         print(f"Дата: {pub_date}")
     print('-' * 40)
+
+
+def notify_new_item(item, category, routed=False):
+    """
+    Итог уведомления о новой записи: NOTIFIED (уведомление записано в outbox вместе с проектом),
+    BLOCKED (заблокировано стоп-словами) или INSERTED
+    """
+    title, description, link, pub_date = item
+    print(f"✓ Сохранено в БД: {title[:50]}{'...' if len(title) > 50 else ''}")
     
-    telegram_sent = False  # Флаг отправки в Telegram
+    if routed:
+        print(f"📱 Уведомление поставлено в очередь Telegram")
+        return ItemStatus.NOTIFIED
     
-    # Сохраняем в базу данных
-    if link:  # Ссылка обязательна для сохранения
-        success = database.add_item(title, description, link, pub_date, category)
-        if success:
-            print(f"✓ Сохранено в БД: {title[:50]}{'...' if len(title) > 50 else ''}")
-            
-            # Отправляем Telegram уведомление для новых записей
-            try:
-                telegram_sent = send_telegram_notification(title, description, link, pub_date, category)
-                if telegram_sent:
-                    print(f"📱 Уведомление отправлено в Telegram")
-                else:
-                    # Проверяем, было ли заблокировано стоп-словами
-                    from telegram_bot import get_telegram_notifier
-                    notifier = get_telegram_notifier()
-                    if notifier and (notifier.check_stopwords_in_text(title) or notifier.check_stopwords_in_text(description)):
-                        print(f"🚫 Уведомление заблокировано стоп-словами")
-            except Exception as e:
-                print(f"Ошибка при отправке Telegram уведомления: {e}")
-                
-        else:
-            print(f"⚠ Уже существует в БД: {title[:50]}{'...' if len(title) > 50 else ''}")
+    # Проверяем, было ли заблокировано стоп-словами
+    try:
+        notifier = get_telegram_notifier()
+        if notifier and notifier.check_stopwords_in_text(f"{title}\n{description}"):
+            print(f"🚫 Уведомление заблокировано стоп-словами")
+            return ItemStatus.BLOCKED
+    except Exception as e:
+        print(f"Ошибка при проверке стоп-слов: {e}")
     
-    return telegram_sent
+    return ItemStatus.INSERTED
 
 
-def parse_rss():
-    """Основная функция парсинга RSS"""
-    print(f"\n{'='*80}")
-    print(f"🚀 ЗАПУСК ПАРСЕРА FL.ru - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"{'='*80}")
+def outbox_route(sender, routed):
+    """Маршрут уведомлений для записи в outbox; ссылки с получателями добавляются в routed"""
+    if sender is None:
+        return None
     
-    # Инициализируем базу данных
-    db = RSSDatabase()
+    def route(title, description, link, pub_date, category):
+        try:
+            chat_ids = sender.route(title, description, link, pub_date, category)
+        except Exception as e:
+            # Ошибка фильтров не должна мешать сохранению проекта
+            print(f"Ошибка при проверке фильтров уведомлений: {e}")
+            return []
+        if chat_ids:
+            routed.add(link)
+        return chat_ids
+    
+    return route
+
+
+def process_rss_item(item, category, database):
+    """Обрабатывает один элемент RSS (RSSItem), сохраняет его в базу данных и возвращает ItemStatus"""
+    print_rss_item(item)
+    
+    # Ссылка обязательна для сохранения
+    if not item.link:
+        return ItemStatus.FAILED
+    
+    # Сохраняем в базу данных вместе с уведомлением в outbox
+    sender = get_outbox_sender(database)
+    routed = set()
+    status = database.add_item(item.title, item.description, item.link, item.pub_date, category,
+                               route=outbox_route(sender, routed))
+    if status is ItemStatus.DUPLICATE:
+        print(f"⚠ Уже существует в БД: {item.title[:50]}{'...' if len(item.title) > 50 else ''}")
+        return status
+    if status is not ItemStatus.INSERTED:
+        return status
+    
+    if routed:
+        sender.drain()
+    return notify_new_item(item, category, item.link in routed)
+
+
+def process_rss_batch(items, category, database):
+    """Сохраняет пачку элементов одной транзакцией и уведомляет о новых, возвращает список ItemStatus"""
+    sender = get_outbox_sender(database)
+    routed = set()
+    new_links = database.add_items_bulk(
+        [(item.title, item.description, item.link, item.pub_date, category) for item in items if item.link],
+        route=outbox_route(sender, routed)
+    )
+    if new_links is None:
+        return [ItemStatus.FAILED] * len(items)
+    new_links = set(new_links)
+    
+    # Уведомления уже зафиксированы в outbox вместе с проектами - передаём их на отправку
+    if routed:
+        sender.drain()
+    
+    statuses = []
+    for item in items:
+        print_rss_item(item)
+        if not item.link:
+            statuses.append(ItemStatus.FAILED)
+        elif item.link in new_links:
+            new_links.discard(item.link)
+            statuses.append(notify_new_item(item, category, item.link in routed))
+        else:
+            print(f"⚠ Уже существует в БД: {item.title[:50]}{'...' if len(item.title) > 50 else ''}")
+            statuses.append(ItemStatus.DUPLICATE)
+    return statuses
+
+
+def hashed_chunks(chunks, digest, received):
+    """Пропускает фрагменты ответа, обновляя хэш содержимого и счётчик байт"""
+    for chunk in chunks:
+        digest.update(chunk)
+        received['bytes'] += len(chunk)
+        yield chunk
+
+
+def reached_watermark(item, pub_ts, watermark, position):
+    """
+    Проверяет, дошёл ли разбор до самого нового (по дате) элемента прошлого запуска.
+    Закреплённые проекты стоят вверху ленты вне порядка дат, поэтому первый элемент
+    ленты отметкой не считается, а по одной дате без совпадения ссылки разбор не
+    останавливается - ниже закреплённого старого проекта могут быть новые
+    """
+    if position == 0 or item.link != watermark['link']:
+        return False
+    # Та же ссылка с более новой датой - проект опубликован заново
+    return pub_ts is None or watermark['pub_ts'] is None or pub_ts <= watermark['pub_ts']
+
+
+def newer_item(pub_ts, newest_ts):
+    """Новее ли элемент с датой pub_ts текущего кандидата в отметку (без даты - не новее)"""
+    return pub_ts is not None and (newest_ts is None or pub_ts > newest_ts)
+
+
+def process_category_response(category, response, database, known_links=None):
+    """
+    Обрабатывает ответ RSS-ленты одной категории и возвращает счётчики.
+    known_links - множество уже сохранённых ссылок (загружается один раз за запуск)
+    """
+    try:
+        result = _process_category_response(category, response, database, known_links)
+    finally:
+        # Ответ читается потоково - возвращаем соединение в пул
+        if response is not None:
+            response.close()
+    
+    # Итоги загрузки сохраняются в журнал опросов (fetch_runs)
+    fetch_seconds = result['fetch_seconds'] or 0.0
+    database.record_fetch_run(category, result['status'], result['bytes'], result['fetch_seconds'],
+                              result['parse_seconds'], result['items_seen'], result['new_items'],
+                              result['telegram_sent'], result['error'], time_module.time() - fetch_seconds)
+    return result
+
+
+def _process_category_response(category, response, database, known_links):
+    """Разбор ответа категории (соединение закрывает вызывающая функция)"""
+    result = {'category': category, 'status': None, 'bytes': 0, 'fetch_seconds': None, 'parse_seconds': 0.0,
+              'items_seen': 0, 'error': None, 'items': 0, 'new_items': 0, 'telegram_sent': 0,
+              'blocked': 0, 'duplicates': 0, 'skipped_known': 0, 'early_stop': False, 'bytes_saved': 0, 'parse_time_saved': 0.0}
+    
+    print(f"\n{'='*60}")
+    print(f"Обработка категории {category} - {datetime.now().strftime(DISPLAY_DATE_FORMAT)}")
+    print(f"URL: {RSS_BASE_URL}{category}")
+    print('='*60)
+    
+    if response is None:
+        print(f"Не удалось получить данные для категории {category}")
+        result['error'] = "ответ не получен"
+        return result
+    
+    print(f"HTTP статус: {response.status_code}")
+    result['status'] = response.status_code
+    # Время до получения заголовков ответа (тело читается потоково вместе с разбором)
+    elapsed = getattr(response, 'elapsed', None)
+    if elapsed is not None:
+        result['fetch_seconds'] = elapsed.total_seconds()
+    
+    feed_url = get_feed_url(response)
+    cached = database.get_feed_cache(feed_url)
+    
+    if response.status_code == 304:
+        # Лента не изменилась с прошлого запроса - тело не загружалось, разбор не нужен
+        if cached:
+            result.update(bytes_saved=cached['wire_length'] or cached['content_length'],
+                          parse_time_saved=cached['parse_seconds'])
+        print(f"Лента не изменилась (304), разбор пропущен")
+        return result
+    
+    if response.status_code == 200:
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        wire_length = response.headers.get('Content-Length')
+        wire_length = int(wire_length) if wire_length and wire_length.isdigit() else None
+        chunks = response.iter_content(FEED_CHUNK_SIZE)
+        
+        if cached and cached['content_hash'] and wire_length is not None and wire_length == cached['wire_length']:
+            # Тело того же размера, что и в прошлый раз: читаем его целиком
+            # (размер известен заранее) и сравниваем хэш до разбора
+            content = response.content
+            if hashlib.sha256(content).hexdigest() == cached['content_hash']:
+                result['parse_time_saved'] = cached['parse_seconds']
+                database.save_feed_cache(feed_url, etag, last_modified, cached['content_hash'],
+                                         len(content), wire_length, cached['parse_seconds'])
+                result['bytes'] = len(content)
+                print(f"Содержимое ленты не изменилось, разбор пропущен")
+                return result
+            chunks = [content]
+        
+        digest = hashlib.sha256()
+        received = {'bytes': 0}
+        watermark = database.get_watermark(category) if EARLY_STOP_AFTER_KNOWN > 0 else None
+        try:
+            parse_started = time_module.perf_counter()
+            items_count = 0
+            statuses = Counter()  # Результаты обработки элементов текущей категории
+            skipped_count = 0
+            consecutive_known = 0
+            # Отметка - элемент с самой поздней датой (первый элемент может быть закреплённым старым)
+            newest_link = newest_ts = None
+            position = 0
+            stop_reason = None
+            batch = []
+            
+            # Элементы разбираются по мере загрузки ответа
+            body = hashed_chunks(chunks, digest, received)
+            for item in iter_rss_items(body):
+                pub_ts = parse_pub_date(item.pub_date)
+                if item.link and (newest_link is None or newer_item(pub_ts, newest_ts)):
+                    newest_link, newest_ts = item.link, pub_ts
+                
+                is_known = known_links is not None and item.link in known_links
+                
+                # Лента упорядочена от новых к старым: всё после отметки уже обработано
+                if watermark and reached_watermark(item, pub_ts, watermark, position):
+                    stop_reason = "достигнута отметка прошлого запуска"
+                    break
+                position += 1
+                
+                if is_known:
+                    skipped_count += 1
+                    consecutive_known += 1
+                    if EARLY_STOP_AFTER_KNOWN > 0 and consecutive_known >= EARLY_STOP_AFTER_KNOWN:
+                        stop_reason = f"{consecutive_known} известных ссылок подряд"
+                        break
+                    continue
+                consecutive_known = 0
+                
+                # Новые элементы сохраняются пачками, по одной транзакции на пачку
+                batch.append(item)
+                if known_links is not None and item.link:
+                    known_links.add(item.link)
+                items_count += 1
+                
+                if len(batch) >= ITEM_BATCH_SIZE:
+                    statuses.update(process_rss_batch(batch, category, database))
+                    batch = []
+            
+            if batch:
+                statuses.update(process_rss_batch(batch, category, database))
+            
+            if stop_reason:
+                print(f"⏹ Ранняя остановка: {stop_reason}")
+                # Дочитываем тело только для хэша кэша ленты, без разбора элементов
+                for _ in body:
+                    pass
+            
+            # При ранней остановке самый новый элемент мог остаться прежней отметкой
+            if newest_link is not None and (watermark is None or watermark['pub_ts'] is None
+                                            or newer_item(newest_ts, watermark['pub_ts'])):
+                database.set_watermark(category, newest_link, newest_ts)
+            
+            parse_seconds = time_module.perf_counter() - parse_started
+            PARSE_SECONDS.observe(parse_seconds)
+            ITEMS_PARSED.inc(items_count + skipped_count)
+            database.save_feed_cache(feed_url, etag, last_modified, digest.hexdigest(), received['bytes'],
+                                     wire_length, parse_seconds)
+            
+            new_items_count = sum(count for status, count in statuses.items() if status.is_new)
+            telegram_sent_count = statuses[ItemStatus.NOTIFIED]
+            
+            print(f"\n{'='*40}")
+            print(f"Обработано элементов: {items_count}")
+            print(f"Новых элементов в БД: {new_items_count}")
+            print(f"Пропущено известных: {skipped_count}")
+            print(f"Уже были в БД: {statuses[ItemStatus.DUPLICATE]}")
+            print(f"Отправлено в Telegram: {telegram_sent_count}")
+            print(f"Заблокировано стоп-словами: {statuses[ItemStatus.BLOCKED]}")
+            print(f"{'='*40}")
+            
+            result.update(bytes=received['bytes'], parse_seconds=parse_seconds, items_seen=items_count + skipped_count,
+                          items=items_count, new_items=new_items_count, telegram_sent=telegram_sent_count,
+                          blocked=statuses[ItemStatus.BLOCKED], duplicates=statuses[ItemStatus.DUPLICATE],
+                          skipped_known=skipped_count, early_stop=stop_reason is not None)
+            print(f"Категория {category}: обработано {items_count} элементов, новых в БД: {new_items_count}, отправлено в Telegram: {telegram_sent_count}")
+            
+        except ET.ParseError as e:
+            error_msg = f"Ошибка парсинга XML: {e}"
+            print(error_msg)
+            result.update(error=error_msg, bytes=received['bytes'])
+        except requests.exceptions.RequestException as e:
+            print(f"Ошибка при чтении ответа: {e}")
+            result.update(error=f"Ошибка при чтении ответа: {e}", bytes=received['bytes'])
+            
+    else:
+        error_msg = f"Ошибка доступа (HTTP {response.status_code}). Возможно, требуется авторизация или сайт блокирует ботов."
+        print(error_msg)
+        result['error'] = f"HTTP {response.status_code}"
     
-    # Загружаем включённые категории
-    included_categories = load_included_categories()
+    return result
+
+
+def get_poll_categories(verbose=False):
+    """
+    Категории для опроса из текущего снимка наблюдателя: правки included_categories.txt,
+    filterList.ini и stopwords.ini применяются без перезапуска
+    """
+    watcher = get_config_watcher()
+    watcher.check()
+    included_categories = set(watcher.current.categories)
+    if verbose:
+        print(f"Поколение фильтров: {watcher.generation}")
     
     # Показываем информацию о включённых категориях
     if included_categories:
-        print(f"Включённые категории: {sorted(included_categories)}")
+        if verbose:
+            print(f"Включённые категории: {sorted(included_categories)}")
     else:
-        print("Включённые категории не найдены. Будут опрошены все категории.")
+        if verbose:
+            print("Включённые категории не найдены. Будут опрошены все категории.")
         included_categories = set(range(1, 11))  # Все категории по умолчанию
     
+    # Проверяем, что категории в допустимом диапазоне
+    categories = []
+    for category in sorted(included_categories):
+        if category < 0 or category > 42:
+            if verbose:
+                print(f"Предупреждение: категория {category} вне допустимого диапазона (1-42)")
+            continue
+        categories.append(category)
+    return categories
+
+
+def parse_rss(categories=None, known_links=None, database=None):
+    """
+    Основная функция парсинга RSS; возвращает результаты по категориям.
+    categories - категории прохода (по умолчанию все включённые),
+    known_links - множество известных ссылок, общее для нескольких проходов,
+    database - открытая база планировщика (по умолчанию открывается на проход и закрывается)
+    """
+    if database is not None:
+        return _parse_rss(database, categories, known_links)
+    
+    db = RSSDatabase()
+    try:
+        return _parse_rss(db, categories, known_links)
+    finally:
+        db.close()
+
+
+def _parse_rss(db, categories, known_links):
+    """Проход по категориям через открытую базу db"""
+    print(f"\n{'='*80}")
+    print(f"🚀 ЗАПУСК ПАРСЕРА FL.ru - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'='*80}")
+    
+    included = get_poll_categories(verbose=True)
+    if categories is None:
+        categories = included
+    else:
+        categories = [category for category in categories if category in included]
+        print(f"Категории прохода: {categories}")
+    
     # Показываем статистику базы данных
     stats = db.get_statistics()
     if stats:
@@ -161,189 +489,168 @@ def parse_rss():
         print(f"Всего записей: {stats.get('total_items', 0)}")
         print(f"Последнее обновление: {stats.get('last_update', 'Никогда')}")
     
-    total_new_items = 0
-    total_telegram_sent = 0  # Счетчик отправленных в Telegram
-    
-    # Выполняем запросы для выбранных категорий
-    for category in sorted(included_categories):
-        # Проверяем, что категория в допустимом диапазоне
-        if category < 0 or category > 42:
-            print(f"Предупреждение: категория {category} вне допустимого диапазона (1-42)")
-            continue
-        
-        print(f"\n{'='*60}")
-        print(f"Обработка категории {category} - {datetime.now().strftime(DISPLAY_DATE_FORMAT)}")
-        print(f"URL: {RSS_BASE_URL}{category}")
-        print('='*60)
-        
-        # Получаем данные RSS-ленты
-        response = get_rss_data(f"{RSS_BASE_URL}{category}")
-        
-        if response is None:
-            print(f"Не удалось получить данные для категории {category}")
-            continue
-        
-        print(f"HTTP статус: {response.status_code}")
-        
-        if response.status_code == 200:
-            try:
-                root = ET.fromstring(response.content)
-                items_count = 0
-                new_items_count = 0
-                telegram_sent_count = 0  # Счетчик для текущей категории
-                
-                for item in root.findall('.//item'):
-                    # Обрабатываем элемент
-                    old_total = db.get_statistics().get('total_items', 0)
-                    telegram_sent = process_rss_item(item, category, db)
-                    new_total = db.get_statistics().get('total_items', 0)
-                    
-                    if new_total > old_total:
-                        new_items_count += 1
-                    
-                    if telegram_sent:
-                        telegram_sent_count += 1
-                    
-                    items_count += 1
-                
-                print(f"\n{'='*40}")
-                print(f"Обработано элементов: {items_count}")
-                print(f"Новых элементов в БД: {new_items_count}")
-                print(f"Отправлено в Telegram: {telegram_sent_count}")
-                print(f"{'='*40}")
-                
-                total_new_items += new_items_count
-                total_telegram_sent += telegram_sent_count
-                print(f"Категория {category}: обработано {items_count} элементов, новых в БД: {new_items_count}, отправлено в Telegram: {telegram_sent_count}")
-                
-            except ET.ParseError as e:
-                error_msg = f"Ошибка парсинга XML: {e}"
-                print(error_msg)
-                
-        else:
-            error_msg = f"Ошибка доступа (HTTP {response.status_code}). Возможно, требуется авторизация или сайт блокирует ботов."
-            print(error_msg)
-        
-        # Добавляем задержку между запросами (от 60 до 360 секунд)
-        if category != max(included_categories):  # Не делаем задержку после последнего запроса
-            delay = random.uniform(60, 360) 
-            print(f"Ожидание {delay:.2f} секунд перед следующим запросом...")
-            time_module.sleep(delay)
-    
-    # Показываем финальную статистику
-    final_stats = db.get_statistics()
+    # Отправляем уведомления, оставшиеся в outbox с прошлых запусков (в том числе после сбоя)
+    outbox_sender = get_outbox_sender(db)
+    if outbox_sender:
+        resumed = outbox_sender.drain()
+        if resumed:
+            print(f"Возобновлена отправка уведомлений из outbox: {resumed}")
+    
+    # Ссылки, уже сохранённые в БД, загружаются один раз за запуск
+    # (планировщик передаёт своё множество, которое пополняется от прохода к проходу)
+    if known_links is None:
+        known_links = db.get_known_links()
+    print(f"Известных ссылок в БД: {len(known_links)}")
+    
+    # Загружаем категории параллельно с ограничением частоты запросов к fl.ru,
+    # обработка ответов идёт конвейером по мере их поступления
+    print(f"\nПараллельная загрузка: до {FETCH_MAX_CONCURRENCY} запросов, "
+          f"не более {FETCH_RATE_PER_MINUTE:g} запросов в минуту")
+    sweep_started = time_module.monotonic()
+    results = run_sweep(
+        categories,
+        fetch=lambda url: get_rss_data(url, db),
+        process=lambda category, response: process_category_response(category, response, db, known_links),
+        base_url=RSS_BASE_URL
+    )
+    sweep_duration = time_module.monotonic() - sweep_started
+    
+    # Дожидаемся доставки уведомлений, поставленных в очередь во время прохода
+    notify_stats = outbox_sender.flush() if outbox_sender else None
+    
+    total_new_items = sum(result['new_items'] for result in results)
+    total_telegram_sent = sum(result['telegram_sent'] for result in results)
+    total_blocked = sum(result['blocked'] for result in results)
+    total_bytes_saved = sum(result['bytes_saved'] for result in results)
+    total_parse_time_saved = sum(result['parse_time_saved'] for result in results)
+    
+    # Показываем финальную статистику (итоги считаются по результатам обработки, без повторных агрегатов по БД)
     print(f"\n{'='*60}")
     print("✅ ПАРСИНГ ЗАВЕРШЕН!")
     print(f"Всего новых записей добавлено в БД: {total_new_items}")
-    print(f"Всего отправлено в Telegram: {total_telegram_sent}")
-    print(f"Общее количество записей в БД: {final_stats.get('total_items', 0)}")
+    print(f"Всего поставлено в очередь Telegram: {total_telegram_sent}")
+    print(f"Заблокировано стоп-словами: {total_blocked}")
+    if notify_stats:
+        latency = notify_stats['latency_p95']
+        print(f"Telegram-очередь: доставлено {notify_stats['sent']} сообщений "
+              f"({notify_stats['items_sent']} проектов за {notify_stats['api_calls']} вызовов API), ошибок {notify_stats['failed']}, "
+              f"не доставлено за {NOTIFY_FLUSH_TIMEOUT:g} сек {notify_stats['pending']}, "
+              f"пауз RetryAfter {notify_stats['retry_after_waits']}"
+              + (f", задержка p95 {latency:.2f} сек" if latency is not None else ""))
+        outbox = notify_stats['outbox']
+        print(f"Outbox: ожидают отправки {outbox.get('pending', 0) + outbox.get('sending', 0)}, "
+              f"не доставлено после всех попыток {outbox.get('failed', 0)}")
+    print(f"Время прохода по категориям: {sweep_duration:.1f} сек")
+    print(f"Сэкономлено кэшем лент: {total_bytes_saved / 1024:.1f} КБ трафика, "
+          f"{total_parse_time_saved:.2f} сек разбора")
+    http_stats = get_http_session().stats()
+    print(f"HTTP-сессия с момента запуска: запросов {http_stats['requests']}, новых соединений {http_stats['new_connections']}, "
+          f"переиспользовано {http_stats['reused_connections']}, повторов {http_stats['retries']}")
+    print(f"Общее количество записей в БД: {stats.get('total_items', 0) + total_new_items}")
     print(f"База данных: {db.db_path}")
-    
-    # Показываем следующий запуск только если планировщик работает
-    next_run = schedule.next_run()
-    if next_run:
-        print(f"Следующий запуск: {next_run}")
-    
     print(f"{'='*60}")
-
-
-def setup_schedule():
-    """Настройка расписания запуска парсера"""
-    # Расписание: 9:00, 11:00, 13:00, 15:00, 17:00
-    schedule.every().day.at("09:00").do(parse_rss)
-    schedule.every().day.at("11:00").do(parse_rss)
-    schedule.every().day.at("13:00").do(parse_rss)
-    schedule.every().day.at("15:00").do(parse_rss)
-    schedule.every().day.at("17:00").do(parse_rss)
-    
-    print("\n📅 Расписание настроено:")
-    print("   - 09:00 (утренний запуск)")
-    print("   - 11:00 (через 2 часа)")
-    print("   - 13:00 (через 2 часа)")
-    print("   - 15:00 (через 2 часа)")
-    print("   - 17:00 (вечерний запуск)")
-    
-    next_run = schedule.next_run()
-    if next_run:
-        print(f"Следующий запуск: {next_run}")
-    else:
-        print("Следующий запуск: завтра в 09:00")
-
-
-def run_scheduler():
-    """Запуск планировщика с немедленным первым запуском"""
-    global running
+    
+    return results
+
+
+def create_scheduler(database):
+    """Адаптивный планировщик проходов по включённым категориям (все проходы - через database)"""
+    known_links = {}
+    
+    def run(categories):
+        # Известные ссылки загружаются при первом проходе и затем только пополняются
+        if 'links' not in known_links:
+            known_links['links'] = database.get_known_links()
+        results = parse_rss(categories, known_links['links'], database)
+        return {
+            result['category']: result['new_items'] if result['status'] in (200, 304) else None
+            for result in results
+        }
+    
+    # Начальные интервалы - по частоте публикаций за последнюю неделю (created_at)
+    rates = {
+        category: rate['per_hour'] / 3600
+        for category, rate in database.get_posting_rates().items()
+    }
+    return AdaptiveScheduler(run, get_poll_categories, rates=rates)
+
+
+def print_schedule_preview(scheduler, hours=24):
+    """Показывает ближайшие проходы планировщика"""
+    planned = scheduler.preview(hours * 3600)
+    print(f"\n📅 Прогноз опроса на {hours} ч (окно опроса: {SCHEDULER_ACTIVE_HOURS or 'круглосуточно'}):")
+    for moment, categories in planned[:20]:
+        print(f"   - {datetime.fromtimestamp(moment).strftime(DISPLAY_DATE_FORMAT)}: категории {categories}")
+    if len(planned) > 20:
+        print(f"   ... всего проходов: {len(planned)}")
+    print("Интервалы по категориям:")
+    for job in scheduler.stats():
+        rate = f", {job['rate_per_hour']:.1f} проектов/ч" if job['rate_per_hour'] is not None else ""
+        print(f"   - категория {job['category']}: каждые {job['interval'] / 60:.0f} мин{rate}")
+
+
+def serve_scheduler(immediate):
+    """Запуск адаптивного планировщика до сигнала остановки"""
+    global running, scheduler
     
     # Настраиваем обработчики сигналов
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
+    # Экспортёр метрик Prometheus для работающего планировщика
+    if METRICS_PORT:
+        try:
+            start_metrics_server(METRICS_PORT, METRICS_HOST)
+            print(f"📈 Метрики Prometheus: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+        except OSError as e:
+            print(f"Не удалось запустить экспортёр метрик на {METRICS_HOST}:{METRICS_PORT}: {e}")
+    
+    # Одно соединение с базой на всё время работы планировщика
+    db = RSSDatabase()
+    scheduler = create_scheduler(db)
+    scheduler.sync_categories(immediate=immediate)
+    print_schedule_preview(scheduler)
+    
+    # Архивирование старых проектов и сжатие базы - фоновым потоком, пачками между записями парсера
+    retention = None
+    if RETENTION_INTERVAL > 0:
+        retention = RetentionWorker(interval=RETENTION_INTERVAL)
+        retention.start()
+        print(f"🗄️ Архивирование и сжатие базы: каждые {RETENTION_INTERVAL / 3600:g} ч")
+    
+    # Планировщик спит до ближайшего срока опроса; проходы не пересекаются
+    print(f"\n⏰ Переход в режим ожидания расписания...")
+    try:
+        scheduler.serve(immediate=immediate)
+    except KeyboardInterrupt:
+        running = False
+    finally:
+        if retention is not None:
+            retention.stop(timeout=30)
+        db.close()
+    
+    print("\n👋 Планировщик остановлен")
+
+
+def run_scheduler():
+    """Запуск планировщика с немедленным первым запуском"""
     print(f"\n🤖 FL.ru RSS Parser запущен - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print("Режим: автоматический запуск при включении + расписание")
+    print("Режим: автоматический запуск при включении + адаптивное расписание")
     print("Для остановки нажмите Ctrl+C")
     
     # НЕМЕДЛЕННЫЙ ЗАПУСК при включении (в любое время)
     print("\n🚀 НЕМЕДЛЕННЫЙ ЗАПУСК ПАРСЕРА...")
-    parse_rss()
-    
-    # Настраиваем расписание после первого запуска
-    setup_schedule()
-    
-    # Основной цикл планировщика
-    print(f"\n⏰ Переход в режим ожидания расписания...")
-    while running:
-        try:
-            schedule.run_pending()
-            time_module.sleep(60)  # Проверяем каждую минуту
-        except KeyboardInterrupt:
-            running = False
-            break
-        except Exception as e:
-            print(f"Ошибка в планировщике: {e}")
-            time_module.sleep(60)
-    
-    print("\n👋 Планировщик остановлен")
+    serve_scheduler(immediate=True)
 
 
 def run_scheduler_no_immediate():
     """Запуск планировщика только по расписанию (без немедленного запуска)"""
-    global running
-    
-    # Настраиваем обработчики сигналов
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    
-    # Настраиваем расписание
-    setup_schedule()
-    
     print(f"\n🤖 FL.ru RSS Parser запущен - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("Режим: только по расписанию")
     print("Для остановки нажмите Ctrl+C")
     
-    # Проверяем, нужно ли запустить в рабочее время
-    current_time = datetime.now().time()
-    work_start = time(9, 0)
-    work_end = time(17, 30)
-    
-    if work_start <= current_time <= work_end:
-        print("\n⏰ Рабочее время! Запускаем парсер...")
-        parse_rss()
-    else:
-        print(f"\n💤 Не рабочее время ({current_time.strftime('%H:%M')}). Ожидание расписания...")
-    
-    # Основной цикл планировщика
-    while running:
-        try:
-            schedule.run_pending()
-            time_module.sleep(60)  # Проверяем каждую минуту
-        except KeyboardInterrupt:
-            running = False
-            break
-        except Exception as e:
-            print(f"Ошибка в планировщике: {e}")
-            time_module.sleep(60)
-    
-    print("\n👋 Планировщик остановлен")
+    # В окне опроса первый проход выполняется сразу, вне окна - в начале окна
+    serve_scheduler(immediate=False)
 
 
 def main():
@@ -357,6 +664,14 @@ def main():
             # Только по расписанию (без немедленного запуска)
             print("⏰ Режим планировщика (только по расписанию)")
             run_scheduler_no_immediate()
+        elif sys.argv[1] == "--preview":
+            # Прогноз расписания без запуска парсера
+            hours = int(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[2].isdigit() else 24
+            db = RSSDatabase()
+            try:
+                print_schedule_preview(create_scheduler(db), hours)
+            finally:
+                db.close()
         elif sys.argv[1] == "--help":
             print_help()
         else:
@@ -377,18 +692,17 @@ FL.ru RSS Parser - Справка по использованию
     python get_rss_text.py              - Запуск сразу + по расписанию (по умолчанию)
     python get_rss_text.py --once       - Однократный запуск
     python get_rss_text.py --schedule-only  - Только по расписанию без немедленного запуска
+    python get_rss_text.py --preview [часы] - Прогноз расписания (по умолчанию на 24 часа)
     python get_rss_text.py --help       - Эта справка
 
 Режим по умолчанию:
     - Парсер запускается СРАЗУ при включении (в любое время)
-    - Затем работает по расписанию: 9:00, 11:00, 13:00, 15:00, 17:00
+    - Затем опрашивает категории по адаптивному расписанию в окне SCHEDULER_ACTIVE_HOURS
 
 Расписание:
-    09:00 - утренний запуск
-    11:00 - через 2 часа
-    13:00 - через 2 часа
-    15:00 - через 2 часа
-    17:00 - вечерний запуск
+    У каждой категории свой интервал опроса (SCHEDULER_MIN_INTERVAL..SCHEDULER_MAX_INTERVAL):
+    активные категории опрашиваются чаще, редкие - реже.
+    Проходы не пересекаются: сроки, наступившие во время прохода, выполняются следующим
 
 Для остановки используйте Ctrl+C
     """)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Общая HTTP-сессия для загрузки RSS-лент
+
+Пул постоянных соединений (keep-alive), сжатие ответов, повторы
+с экспоненциальной задержкой на 429/5xx с учётом Retry-After
+и счётчики переиспользования соединений и повторов.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    USER_AGENT, COOKIES, REQUEST_TIMEOUT,
+    HTTP_POOL_SIZE, HTTP_MAX_RETRIES, HTTP_BACKOFF_FACTOR, HTTP_MAX_BACKOFF
+)
+
+# brotli декодируется urllib3 только при установленном пакете brotli/brotlicffi
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+# Коды ответов, после которых запрос повторяется
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Разбирает заголовок Retry-After (секунды или HTTP-дата)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class FeedSession:
+    """Потокобезопасная обёртка над requests.Session с повторами и счётчиками"""
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, max_retries: int = HTTP_MAX_RETRIES,
+                 backoff_factor: float = HTTP_BACKOFF_FACTOR, max_backoff: float = HTTP_MAX_BACKOFF,
+                 timeout: float = REQUEST_TIMEOUT, sleep=time.sleep):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.sleep = sleep
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept-Encoding": ACCEPT_ENCODING,
+            "Connection": "keep-alive"
+        })
+        if COOKIES:
+            self.session.headers["Cookie"] = COOKIES
+
+        # Повторы выполняются вручную (ниже), чтобы вести счётчики
+        self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                                   max_retries=0, pool_block=True)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+        self.retries = 0
+        self.retry_after_waits = 0
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Задержка перед повтором: Retry-After или экспонента от номера попытки"""
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                with self._lock:
+                    self.retry_after_waits += 1
+                return min(retry_after, self.max_backoff)
+        return min(self.backoff_factor * (2 ** attempt), self.max_backoff)
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> requests.Response:
+        """GET-запрос через пул соединений с повторами на 429/5xx и сетевых ошибках"""
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            with self._lock:
+                self.requests_sent += 1
+            try:
+                response = self.session.get(url, headers=headers, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+                delay = self._backoff(attempt, response)
+                response.close()
+
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+            self.sleep(delay)
+
+    def stats(self) -> dict:
+        """Счётчики запросов, новых и переиспользованных соединений, повторов"""
+        new_connections = 0
+        pool_requests = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                new_connections += pool.num_connections
+                pool_requests += pool.num_requests
+
+        with self._lock:
+            return {
+                'requests': self.requests_sent,
+                'new_connections': new_connections,
+                'reused_connections': max(0, pool_requests - new_connections),
+                'retries': self.retries,
+                'retry_after_waits': self.retry_after_waits
+            }
+
+    def close(self):
+        """Закрывает все соединения пула"""
+        self.session.close()
+
+
+# Глобальная сессия, общая для всех запросов планировщика
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session() -> FeedSession:
+    """Получает общий экземпляр HTTP-сессии"""
+    global _http_session
+
+    with _http_session_lock:
+        if _http_session is None:
+            _http_session = FeedSession()
+    return _http_session
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Компилируемый сопоставитель ключевых слов и стоп-слов
+
+Все термины собираются в одно регулярное выражение в виде префиксного
+дерева (trie), поэтому текст просматривается один раз независимо
+от количества терминов. Регистр не учитывается: текст один раз
+приводится к нижнему регистру и сопоставляется без флага IGNORECASE.
+
+Режимы:
+    substring - вхождение в любом месте текста (как прежняя проверка `in`)
+    word      - только целые слова (границы слова с обеих сторон)
+    phrase    - как word, но слова многословного термина могут разделяться
+                любыми пробельными символами
+"""
+
+import re
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Set
+
+MATCH_MODES = ('substring', 'word', 'phrase')
+
+# Найденный термин и его позиция в исходном тексте
+KeywordMatch = namedtuple('KeywordMatch', ['term', 'start', 'end'])
+
+_END = ''  # маркер конца термина в узле trie
+
+
+def _normalize(term: str) -> str:
+    """Приводит термин к нижнему регистру и схлопывает пробелы"""
+    return ' '.join(term.lower().split())
+
+
+def _build_trie(terms: Iterable[str]) -> Dict:
+    """Строит префиксное дерево терминов"""
+    trie: Dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[_END] = {}
+    return trie
+
+
+def _trie_pattern(node: Dict, flexible_spaces: bool) -> str:
+    """Строит регулярное выражение из trie; более длинные совпадения пробуются первыми"""
+    alternatives = []
+    for char in sorted(key for key in node if key != _END):
+        token = r'\s+' if flexible_spaces and char == ' ' else re.escape(char)
+        alternatives.append(token + _trie_pattern(node[char], flexible_spaces))
+
+    if not alternatives:
+        return ''
+    pattern = alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+    if _END in node:
+        pattern = '(?:' + pattern + ')?'
+    return pattern
+
+
+class KeywordMatcher:
+    """Набор терминов, скомпилированный в одно регулярное выражение"""
+
+    def __init__(self, terms: Iterable[str], mode: str = 'substring'):
+        if mode not in MATCH_MODES:
+            raise ValueError(f"Неизвестный режим сопоставления: {mode} (допустимо: {', '.join(MATCH_MODES)})")
+
+        self.mode = mode
+        self.terms: Set[str] = {_normalize(term) for term in terms if term and term.strip()}
+        self._regex: Optional[re.Pattern] = None
+        self._regex_ignorecase: Optional[re.Pattern] = None
+        self._prefix_terms: Dict[str, List[str]] = {}
+
+        if not self.terms:
+            return
+
+        trie = _build_trie(self.terms)
+        trie_pattern = _trie_pattern(trie, flexible_spaces=(mode == 'phrase'))
+        if mode == 'substring':
+            # Просмотр вперёд позволяет находить перекрывающиеся вхождения
+            pattern = '(?=(' + trie_pattern + '))'
+        else:
+            pattern = r'(?<!\w)(?=(' + trie_pattern + r')(?!\w))'
+        self._regex = re.compile(pattern)
+        self._regex_ignorecase = re.compile(pattern, re.IGNORECASE)
+
+        # Для каждого термина - более короткие термины, являющиеся его префиксом:
+        # в одной позиции выражение захватывает только самое длинное совпадение
+        for term in self.terms:
+            node = trie
+            prefixes = []
+            for index, char in enumerate(term[:-1]):
+                node = node[char]
+                if _END in node:
+                    prefixes.append(term[:index + 1])
+            if prefixes:
+                self._prefix_terms[term] = prefixes[::-1]
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __bool__(self) -> bool:
+        return self._regex is not None
+
+    def _is_boundary(self, text: str, index: int) -> bool:
+        """Проходит ли в позиции index граница слова (конец текста или не-\\w символ)"""
+        return index >= len(text) or not (text[index].isalnum() or text[index] == '_')
+
+    def _prepare(self, text: str):
+        """Текст для просмотра и подходящее выражение (позиции совпадают с исходным текстом)"""
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            return lowered, self._regex
+        # Редкие символы меняют длину при lower() - сопоставляем исходный текст с IGNORECASE
+        return text, self._regex_ignorecase
+
+    def search(self, text: str) -> Optional[KeywordMatch]:
+        """Первое совпадение в тексте или None"""
+        if not text or self._regex is None:
+            return None
+        text, regex = self._prepare(text)
+        found = regex.search(text)
+        if found is None:
+            return None
+        return KeywordMatch(_normalize(found.group(1)), found.start(1), found.end(1))
+
+    def matches(self, text: str) -> bool:
+        """Есть ли в тексте хотя бы один термин"""
+        return self.search(text) is not None
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """Все найденные термины с позициями, включая перекрывающиеся"""
+        if not text or self._regex is None:
+            return []
+
+        text, regex = self._prepare(text)
+        result = []
+        for found in regex.finditer(text):
+            start, end = found.start(1), found.end(1)
+            term = _normalize(found.group(1))
+            result.append(KeywordMatch(term, start, end))
+
+            for shorter in self._prefix_terms.get(term, ()):
+                if self.mode == 'phrase' and ' ' in shorter:
+                    # Длину с учётом произвольных пробелов проще получить повторным сопоставлением
+                    shorter_match = re.match(_trie_pattern(_build_trie([shorter]), True),
+                                             text[start:end], re.IGNORECASE)
+                    if shorter_match is None:
+                        continue
+                    shorter_end = start + shorter_match.end()
+                else:
+                    shorter_end = start + len(shorter)
+                if self.mode == 'substring' or self._is_boundary(text, shorter_end):
+                    result.append(KeywordMatch(shorter, start, shorter_end))
+
+        return result
+
+    def matched_terms(self, text: str) -> Set[str]:
+        """Множество найденных терминов"""
+        return {match.term for match in self.find_all(text)}
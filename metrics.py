@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Метрики в формате Prometheus: счётчики и гистограммы горячих участков
+
+Без внешних зависимостей: метрики регистрируются в REGISTRY и отдаются
+в текстовом формате экспозиции Prometheus - маршрутом /metrics веб-интерфейса
+или небольшим HTTP-экспортёром в процессе парсера (METRICS_PORT).
+Наблюдение - это поиск корзины и пара сложений под блокировкой,
+а при METRICS_ENABLED=false вызовы сразу возвращаются.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config import METRICS_ENABLED
+
+# Границы корзин по умолчанию, секунды: от долей миллисекунды (сопоставление) до минут (доставка)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Registry:
+    """Набор метрик процесса (enabled=False отключает наблюдения всех его метрик)"""
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self._metrics: Dict[str, 'Metric'] = {}
+        self._lock = threading.Lock()
+        self.enabled = enabled
+
+    def register(self, metric: 'Metric') -> 'Metric':
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional['Metric']:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате экспозиции Prometheus"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    """Метрика с необязательными метками; значения по наборам меток хранятся в дочерних объектах"""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[Registry] = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Метрика вне общего реестра получает собственный, всегда включённый
+        self.registry = registry if registry is not None else Registry(enabled=True)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._by_values: Dict[tuple, object] = {}  # кэш дочерних объектов по исходным значениям меток
+        self._lock = threading.Lock()
+        # У метрики без меток единственный дочерний объект создаётся сразу
+        self._unlabeled = self.labels() if not self.labelnames else None
+        self.registry.register(self)
+
+    @property
+    def enabled(self) -> bool:
+        return self.registry.enabled
+
+    def labels(self, *values, **kwargs):
+        """Дочерняя метрика для набора меток (по позиции или по имени)"""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        child = self._by_values.get(values)
+        if child is None:
+            key = tuple(str(value) for value in values)
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"Метрика {self.name} ожидает метки {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+                self._by_values[values] = child
+        return child
+
+    def _default(self):
+        """Метрика без меток"""
+        if self._unlabeled is None:
+            raise ValueError(f"Метрика {self.name} ожидает метки {self.labelnames}")
+        return self._unlabeled
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock', '_registry')
+
+    def __init__(self, metric: 'Counter'):
+        self.value = 0.0
+        self._lock = threading.Lock()
+        self._registry = metric.registry
+
+    def inc(self, amount: float = 1.0):
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик"""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild(self)
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def samples(self) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}'
+                for key, child in sorted(self._children.items())]
+
+
+class _HistogramChild:
+    __slots__ = ('counts', 'sum', '_bounds', '_lock', '_registry')
+
+    def __init__(self, metric: 'Histogram'):
+        self._registry = metric.registry
+        self._bounds = metric.buckets
+        self.counts = [0] * (len(self._bounds) + 1)  # последняя корзина - +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        if not self._registry.enabled:
+            return
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Замеряет длительность блока with"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(Metric):
+    """Распределение значений по корзинам (le - включительная верхняя граница)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional[Registry] = REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, child in sorted(self._children.items()):
+            with child._lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+
+# Метрики парсера
+
+FETCH_SECONDS = Histogram('flrss_fetch_seconds', 'Время получения ответа RSS-ленты (до заголовков), сек')
+FETCH_TOTAL = Counter('flrss_fetch_total', 'Запросы RSS-лент по HTTP статусу (error - ответ не получен)', ['status'])
+PARSE_SECONDS = Histogram('flrss_parse_seconds', 'Потоковое чтение, разбор и сохранение ленты категории, сек')
+ITEMS_PARSED = Counter('flrss_items_parsed_total', 'Разобрано элементов лент')
+DB_INSERT_SECONDS = Histogram('flrss_db_insert_seconds', 'Сохранение проектов в БД (одна транзакция), сек', ['op'])
+ITEMS_INSERTED = Counter('flrss_items_inserted_total', 'Новых проектов сохранено в БД')
+MATCH_SECONDS = Histogram('flrss_match_seconds', 'Проверка проекта фильтрами уведомлений, сек')
+TELEGRAM_SEND_SECONDS = Histogram('flrss_telegram_send_seconds', 'Вызов sendMessage Telegram Bot API, сек')
+TELEGRAM_SENDS = Counter('flrss_telegram_sends_total', 'Вызовы sendMessage по результату', ['result'])
+WEB_REQUEST_SECONDS = Histogram('flrss_web_request_seconds', 'Обработка запросов веб-интерфейса, сек', ['endpoint'])
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = '127.0.0.1', registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """Запускает экспортёр /metrics в фоновом потоке"""
+    handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-exporter', daemon=True).start()
+    return server
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Фоновая очередь доставки Telegram уведомлений
+
+Сообщения ставятся в очередь из любого потока и сразу возвращают
+управление парсеру. Доставкой занимается отдельный поток с долгоживущим
+event loop: у каждого чата своя очередь (порядок сообщений сохраняется),
+соблюдаются общий лимит бота и лимит на чат, а ответ 429 (RetryAfter)
+приостанавливает отправку на указанное Telegram время.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, wait
+from datetime import timedelta
+from typing import Dict, Optional
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+from config import (
+    TELEGRAM_GLOBAL_RATE_PER_SECOND, TELEGRAM_CHAT_RATE_PER_MINUTE,
+    TELEGRAM_CHAT_BURST, TELEGRAM_SEND_RETRIES
+)
+from fetcher import TokenBucket
+from metrics import TELEGRAM_SEND_SECONDS, TELEGRAM_SENDS
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних задержек доставки хранить для перцентилей
+LATENCY_WINDOW = 1000
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    """Время ожидания из RetryAfter (секунды или timedelta - зависит от версии библиотеки)"""
+    retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class NotificationJob:
+    """Сообщение в очереди доставки"""
+
+    __slots__ = ('chat_id', 'text', 'kwargs', 'items', 'enqueued_at', 'future', 'attempts')
+
+    def __init__(self, chat_id, text: str, kwargs: dict, items: int = 1):
+        self.chat_id = chat_id
+        self.text = text
+        self.kwargs = kwargs
+        self.items = items  # сколько проектов в сообщении (больше 1 - дайджест)
+        self.enqueued_at = time.monotonic()
+        self.future: Future = Future()
+        self.attempts = 0
+
+
+class NotificationQueue:
+    """Очередь отправки сообщений через telegram.Bot в отдельном потоке"""
+
+    def __init__(self, bot, global_rate_per_second: float = TELEGRAM_GLOBAL_RATE_PER_SECOND,
+                 chat_rate_per_minute: float = TELEGRAM_CHAT_RATE_PER_MINUTE,
+                 chat_burst: int = TELEGRAM_CHAT_BURST, max_retries: int = TELEGRAM_SEND_RETRIES):
+        self.bot = bot
+        self.chat_rate_per_minute = chat_rate_per_minute
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.global_bucket = TokenBucket(global_rate_per_second * 60, max(1, int(global_rate_per_second)))
+        self.chat_buckets: Dict[object, TokenBucket] = {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._chat_queues: Dict[object, asyncio.Queue] = {}
+        self._workers = []
+        self._resume_at = 0.0  # момент окончания паузы после RetryAfter (loop.time())
+
+        self._lock = threading.Lock()
+        self._pending = set()
+        self.enqueued = 0
+        self.sent = 0
+        self.items_sent = 0
+        self.api_calls = 0
+        self.failed = 0
+        self.retry_after_waits = 0
+        self.retries = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def start(self):
+        """Запускает поток доставки с собственным event loop"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._started.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="telegram-notify", daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._loop.call_soon(self._started.set)
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+
+    def submit(self, chat_id, text: str, items: int = 1, **kwargs) -> Future:
+        """
+        Ставит сообщение в очередь и сразу возвращается.
+        Future завершается отправленным Message или исключением после исчерпания повторов
+        """
+        self.start()
+        job = NotificationJob(chat_id, text, kwargs, items)
+        with self._lock:
+            self.enqueued += 1
+            self._pending.add(job.future)
+        job.future.add_done_callback(self._discard_pending)
+        self._loop.call_soon_threadsafe(self._dispatch, job)
+        return job.future
+
+    def _discard_pending(self, future: Future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def _dispatch(self, job: NotificationJob):
+        """Передаёт сообщение в очередь его чата (выполняется в потоке доставки)"""
+        queue = self._chat_queues.get(job.chat_id)
+        if queue is None:
+            queue = self._chat_queues[job.chat_id] = asyncio.Queue()
+            self.chat_buckets[job.chat_id] = TokenBucket(self.chat_rate_per_minute, self.chat_burst)
+            self._workers.append(self._loop.create_task(self._chat_worker(job.chat_id, queue)))
+        queue.put_nowait(job)
+
+    async def _chat_worker(self, chat_id, queue: asyncio.Queue):
+        """Отправляет сообщения одного чата строго по порядку"""
+        while True:
+            job = await queue.get()
+            try:
+                message = await self._send(job)
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                logger.error(f"Ошибка при отправке уведомления в чат {chat_id}: {e}")
+                job.future.set_exception(e)
+            else:
+                with self._lock:
+                    self.sent += 1
+                    self.items_sent += job.items
+                    self.latencies.append(time.monotonic() - job.enqueued_at)
+                job.future.set_result(message)
+
+    async def _wait_flood_pause(self):
+        """Ожидает окончания паузы, назначенной Telegram через RetryAfter"""
+        while True:
+            delay = self._resume_at - self._loop.time()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    async def _send(self, job: NotificationJob):
+        """Отправка с соблюдением лимитов и повторами на RetryAfter и сетевых ошибках"""
+        while True:
+            await self._wait_flood_pause()
+            await self.chat_buckets[job.chat_id].acquire()
+            await self.global_bucket.acquire()
+            await self._wait_flood_pause()
+
+            job.attempts += 1
+            with self._lock:
+                self.api_calls += 1
+            started = time.perf_counter()
+            try:
+                message = await self.bot.send_message(chat_id=job.chat_id, text=job.text, **job.kwargs)
+                TELEGRAM_SEND_SECONDS.observe(time.perf_counter() - started)
+                TELEGRAM_SENDS.labels('ok').inc()
+                return message
+            except RetryAfter as e:
+                TELEGRAM_SENDS.labels('retry_after').inc()
+                delay = retry_after_seconds(e)
+                with self._lock:
+                    self.retry_after_waits += 1
+                logger.warning(f"Telegram ограничил частоту отправки, пауза {delay:g} сек")
+                # Лимит превышен для бота целиком - приостанавливаем все чаты
+                self._resume_at = max(self._resume_at, self._loop.time() + delay)
+            except (BadRequest, Forbidden) as e:
+                # Подклассы NetworkError, но повтор не поможет (ошибка разметки, чат недоступен,
+                # нет исходного сообщения для ответа) - задание завершается сразу, очередь чата не ждёт
+                TELEGRAM_SENDS.labels('error').inc()
+                logger.error(f"Telegram отклонил уведомление для чата {job.chat_id}: {e}")
+                raise
+            except (TimedOut, NetworkError) as e:
+                TELEGRAM_SENDS.labels('network_error').inc()
+                logger.warning(f"Сетевая ошибка при отправке уведомления (попытка {job.attempts}): {e}")
+                if job.attempts <= self.max_retries:
+                    await asyncio.sleep(min(2 ** job.attempts, 60))
+            except Exception:
+                TELEGRAM_SENDS.labels('error').inc()
+                raise
+
+            if job.attempts > self.max_retries:
+                raise RuntimeError(f"Сообщение не доставлено после {job.attempts} попыток")
+            with self._lock:
+                self.retries += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Ожидает доставки всех поставленных сообщений; False - если не успели за timeout"""
+        with self._lock:
+            pending = set(self._pending)
+        if not pending:
+            return True
+        _, not_done = wait(pending, timeout=timeout)
+        return not not_done
+
+    def stats(self) -> dict:
+        """Счётчики очереди и задержка доставки (от постановки в очередь до ответа API)"""
+        with self._lock:
+            latencies = sorted(self.latencies)
+            result = {
+                'enqueued': self.enqueued,
+                'sent': self.sent,
+                'items_sent': self.items_sent,
+                'api_calls': self.api_calls,
+                'failed': self.failed,
+                'pending': len(self._pending),
+                'retries': self.retries,
+                'retry_after_waits': self.retry_after_waits,
+                'latency_p50': None,
+                'latency_p95': None
+            }
+        if latencies:
+            result['latency_p50'] = latencies[len(latencies) // 2]
+            result['latency_p95'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return result
+
+    async def _shutdown(self):
+        """Останавливает обработчики чатов и закрывает HTTP-клиент бота"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        self._chat_queues.clear()
+        shutdown = getattr(self.bot, 'shutdown', None)
+        if shutdown is not None:
+            await shutdown()
+
+    def close(self, timeout: Optional[float] = None):
+        """Доставляет оставшиеся сообщения и останавливает поток"""
+        if self._thread is None:
+            return
+        self.flush(timeout)
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Отправка уведомлений из таблицы outbox
+
+Уведомление записывается в outbox в той же транзакции, что и новый проект,
+поэтому сбой между сохранением и отправкой его не теряет. Отправитель
+забирает готовые записи, передаёт их в NotificationQueue (или в дайджест)
+и по результату отмечает доставку с id сообщения либо назначает повтор
+с экспоненциальной задержкой. После перезапуска записи, переданные
+отправителю, но не подтверждённые, возвращаются в очередь.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from config import (
+    NOTIFY_DIGEST, NOTIFY_URGENT_CATEGORIES, NOTIFY_FLUSH_TIMEOUT,
+    OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_BASE, OUTBOX_RETRY_MAX
+)
+from database import RSSDatabase
+from digest import DigestBuffer
+from subscriptions import SubscriptionRouter
+from telegram_bot import TelegramNotifier, get_telegram_notifier
+
+logger = logging.getLogger(__name__)
+
+# Заголовок уведомления о повторно опубликованном проекте
+REPOST_PREFIX = "🔁 <b>Повтор проекта</b>\n\n"
+
+
+class OutboxSender:
+    """Возобновляемая отправка уведомлений из outbox через TelegramNotifier"""
+
+    def __init__(self, notifier: TelegramNotifier, database: RSSDatabase, digest: bool = NOTIFY_DIGEST,
+                 batch_size: int = OUTBOX_BATCH_SIZE, max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+                 retry_base: float = OUTBOX_RETRY_BASE, retry_max: float = OUTBOX_RETRY_MAX):
+        self.notifier = notifier
+        self.database = database
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.digest = DigestBuffer(self._deliver) if digest else None
+        # Получатели - чат из .env и подписки из реестра, одним просмотром текста
+        self.router = SubscriptionRouter(database, notifier.watcher, notifier.chat_id)
+        self._recovered = False
+        self._lock = threading.Lock()
+
+    def route(self, title: str, description: str, link: str, pub_date: str, category: int) -> List[str]:
+        """Получатели уведомления (вызывается внутри транзакции добавления проекта)"""
+        return self.router.route(title, description, link, pub_date, category)
+
+    def recover(self) -> int:
+        """Возвращает в очередь уведомления, не подтверждённые до перезапуска"""
+        recovered = self.database.recover_outbox()
+        if recovered:
+            # Ответ Telegram на них не получен - отправляем повторно, потеря хуже дубля
+            logger.warning(f"Возвращено в очередь неподтверждённых уведомлений: {recovered}")
+        self._recovered = True
+        return recovered
+
+    def drain(self) -> int:
+        """Передаёт на отправку все уведомления, срок которых наступил; возвращает их число"""
+        with self._lock:
+            if not self._recovered:
+                self.recover()
+
+            total = 0
+            while True:
+                rows = self.database.claim_outbox(self.batch_size)
+                if not rows:
+                    return total
+                for row in rows:
+                    self._submit(row)
+                total += len(rows)
+
+    def _submit(self, row: dict):
+        """Ставит одно уведомление в дайджест или сразу в очередь доставки"""
+        fields = (row['title'], row['description'], row['link'], row['pub_date'], row['category'])
+        if row.get('reply_to'):
+            # Почти дубликат уведомлённого проекта - ответом на то сообщение, мимо дайджеста
+            self._deliver(row['chat_id'], REPOST_PREFIX + self.notifier.format_message(*fields), [row],
+                          reply_to_message_id=row['reply_to'], allow_sending_without_reply=True)
+        elif self.digest is not None and row['category'] not in NOTIFY_URGENT_CATEGORIES:
+            self.digest.add(row['chat_id'], self.notifier.format_digest_entry(*fields), row)
+        else:
+            self._deliver(row['chat_id'], self.notifier.format_message(*fields), [row])
+
+    def _deliver(self, chat_id, text: str, rows: List[dict], **kwargs):
+        """Отправляет сообщение и по результату обновляет записи outbox"""
+        future = self.notifier.queue.submit(chat_id, text, items=len(rows),
+                                            parse_mode='HTML', disable_web_page_preview=True, **kwargs)
+        future.add_done_callback(lambda done: self._on_delivered(rows, done))
+
+    def retry_delay(self, attempts: int) -> float:
+        """Задержка перед повтором после attempts неудачных попыток"""
+        return min(self.retry_base * (2 ** max(0, attempts - 1)), self.retry_max)
+
+    def _on_delivered(self, rows: List[dict], future: Future):
+        ids = [row['id'] for row in rows]
+        error = future.exception()
+        if error is None:
+            self.database.mark_outbox_sent(ids, getattr(future.result(), 'message_id', None))
+            return
+
+        attempts = max(row['attempts'] for row in rows)
+        if attempts >= self.max_attempts:
+            logger.error(f"Уведомления {ids} не доставлены после {attempts} попыток: {error}")
+            self.database.mark_outbox_failed(ids, str(error), None)
+        else:
+            delay = self.retry_delay(attempts)
+            logger.warning(f"Уведомления {ids} не доставлены, повтор через {delay:g} сек: {error}")
+            self.database.mark_outbox_failed(ids, str(error), time.time() + delay)
+
+    def flush(self, timeout: Optional[float] = NOTIFY_FLUSH_TIMEOUT) -> dict:
+        """Отправляет накопленный дайджест, ожидает доставки и возвращает счётчики очереди и outbox"""
+        if self.digest is not None:
+            self.digest.flush()
+        stats = self.notifier.flush(timeout)
+        stats['outbox'] = self.database.get_outbox_stats()
+        return stats
+
+
+# Отправители по пути к БД: записи outbox одной базы обслуживает один отправитель
+_outbox_senders: Dict[str, OutboxSender] = {}
+_outbox_senders_lock = threading.Lock()
+
+
+def get_outbox_sender(database: RSSDatabase) -> Optional[OutboxSender]:
+    """Получает отправитель outbox для базы данных (None - Telegram бот не настроен)"""
+    notifier = get_telegram_notifier()
+    if notifier is None:
+        return None
+
+    with _outbox_senders_lock:
+        sender = _outbox_senders.get(database.db_path)
+        if sender is None:
+            sender = _outbox_senders[database.db_path] = OutboxSender(notifier, database)
+        elif sender.database is not database:
+            # Прежнее соединение закрыто вместе с проходом (parse_rss) - работаем через новое
+            sender.database = sender.router.database = database
+    return sender
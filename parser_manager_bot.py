@@ -16,6 +16,8 @@ from telegram.ext import Application, CommandHandler, CallbackQueryHandler, Cont
 import schedule
 from dotenv import load_dotenv
 
+from database import RSSDatabase
+
 # Загружаем переменные окружения
 load_dotenv()
 
@@ -39,6 +41,9 @@ authorized_users = set()  # Авторизованные пользовател
 PID_FILE = "parser.pid"
 STATUS_FILE = "parser_status.txt"
 
+# Реестр подписок (та же база, что у парсера)
+subscriptions_db = None
+
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /start"""
     await update.message.reply_text("Привет! Я бот для управления FL.ru RSS Parser планировщиком.\n"
@@ -71,6 +76,128 @@ async def auth_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     else:
         await update.message.reply_text("Вы уже авторизованы.")
 
+def get_subscriptions_db() -> RSSDatabase:
+    """База данных с реестром подписок"""
+    global subscriptions_db
+    if subscriptions_db is None:
+        subscriptions_db = RSSDatabase()
+    return subscriptions_db
+
+def find_subscription(chat_id):
+    """Подписка чата из реестра или None"""
+    chat_id = str(chat_id)
+    for subscription in get_subscriptions_db().get_subscriptions(active_only=False):
+        if subscription['chat_id'] == chat_id:
+            return subscription
+    return None
+
+async def require_auth(update: Update) -> bool:
+    """Изменять подписки могут только авторизованные пользователи"""
+    if update.message.from_user.id in authorized_users:
+        return True
+    await update.message.reply_text("Сначала авторизуйтесь: /auth")
+    return False
+
+async def subscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /subscribe - подписка чата на уведомления"""
+    if not await require_auth(update):
+        return
+    chat = update.effective_chat
+    title = chat.title or chat.full_name
+    if get_subscriptions_db().add_subscription(chat.id, title):
+        await update.message.reply_text("Чат подписан на уведомления.\n"
+                                        "Добавьте ключевые слова: /keywords add python, django")
+    else:
+        await update.message.reply_text("Не удалось сохранить подписку.")
+
+async def unsubscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /unsubscribe - удаление подписки чата с фильтрами"""
+    if not await require_auth(update):
+        return
+    if get_subscriptions_db().remove_subscription(update.effective_chat.id):
+        await update.message.reply_text("Подписка удалена.")
+    else:
+        await update.message.reply_text("Чат не подписан.")
+
+def parse_filter_values(args, kind):
+    """Значения фильтров из аргументов команды (через пробел или запятую)"""
+    text = " ".join(args)
+    separator = "," if kind in ('keyword', 'stopword') and "," in text else None
+    values = [value.strip() for value in text.split(separator) if value.strip()]
+    if kind in ('category', 'urgent'):
+        if not all(value.isdigit() for value in values):
+            raise ValueError("категории задаются номерами")
+    return values
+
+async def filter_command(update: Update, context: ContextTypes.DEFAULT_TYPE, command: str, kind: str, name: str):
+    """Общий обработчик команд фильтров: /<name> add|remove|list|clear значения"""
+    chat_id = update.effective_chat.id
+    action = context.args[0].lower() if context.args else "list"
+
+    if action == "list":
+        subscription = find_subscription(chat_id)
+        values = sorted(subscription[kind], key=str) if subscription else []
+        text = ", ".join(str(value) for value in values) if values else "не заданы"
+        await update.message.reply_text(f"{name}: {text}")
+        return
+
+    if not await require_auth(update):
+        return
+    db = get_subscriptions_db()
+    try:
+        values = parse_filter_values(context.args[1:], kind)
+    except ValueError as e:
+        await update.message.reply_text(f"Ошибка: {e}")
+        return
+
+    if action == "add" and values:
+        # Фильтры ссылаются на подписку - создаём её при первом фильтре
+        db.add_subscription(chat_id, update.effective_chat.title or update.effective_chat.full_name)
+        added = db.add_subscription_filters(chat_id, kind, values)
+        await update.message.reply_text(f"{name}: добавлено {added}")
+    elif action == "remove" and values:
+        removed = db.remove_subscription_filters(chat_id, kind, values)
+        await update.message.reply_text(f"{name}: удалено {removed}")
+    elif action == "clear":
+        removed = db.remove_subscription_filters(chat_id, kind)
+        await update.message.reply_text(f"{name}: удалено {removed}")
+    else:
+        await update.message.reply_text(f"Использование: /{command} add|remove|list|clear значения")
+
+async def keywords_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /keywords"""
+    await filter_command(update, context, 'keywords', 'keyword', "Ключевые слова")
+
+async def stopwords_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /stopwords"""
+    await filter_command(update, context, 'stopwords', 'stopword', "Стоп-слова")
+
+async def categories_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /categories (clear - все категории)"""
+    await filter_command(update, context, 'categories', 'category', "Категории")
+
+async def urgent_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /urgent - категории, о которых уведомлять без ключевых слов"""
+    await filter_command(update, context, 'urgent', 'urgent', "Срочные категории")
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /profile - фильтры подписки чата"""
+    subscription = find_subscription(update.effective_chat.id)
+    if subscription is None:
+        await update.message.reply_text("Чат не подписан. Используйте /subscribe")
+        return
+
+    def listed(values):
+        return ", ".join(str(value) for value in sorted(values, key=str)) or "—"
+
+    await update.message.reply_text(
+        f"Подписка: {'активна' if subscription['active'] else 'отключена'}\n"
+        f"Ключевые слова: {listed(subscription['keyword'])}\n"
+        f"Стоп-слова: {listed(subscription['stopword'])}\n"
+        f"Категории: {listed(subscription['category']) if subscription['category'] else 'все'}\n"
+        f"Срочные категории: {listed(subscription['urgent'])}"
+    )
+
 async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик нажатий на кнопки"""
     query = update.callback_query
@@ -147,6 +274,13 @@ def main():
     application.add_handler(CommandHandler("status", status_command))
     application.add_handler(CommandHandler("logs", logs_command))
     application.add_handler(CommandHandler("auth", auth_command))
+    application.add_handler(CommandHandler("subscribe", subscribe_command))
+    application.add_handler(CommandHandler("unsubscribe", unsubscribe_command))
+    application.add_handler(CommandHandler("keywords", keywords_command))
+    application.add_handler(CommandHandler("stopwords", stopwords_command))
+    application.add_handler(CommandHandler("categories", categories_command))
+    application.add_handler(CommandHandler("urgent", urgent_command))
+    application.add_handler(CommandHandler("profile", profile_command))
     application.add_handler(CallbackQueryHandler(button_handler))
     
     # Обработчик ошибок
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Хранение рабочей базы: перенос старых проектов в помесячные архивы и сжатие файла
+
+Проекты старше RETENTION_MAX_AGE_DAYS дней и сверх RETENTION_MAX_ROWS_PER_CATEGORY самых
+новых в категории переносятся в archive/<база>_ГГГГ-ММ.db (схема как у рабочей базы,
+поиск по архиву работает) пачками по RETENTION_BATCH_SIZE, затем свободные страницы
+возвращаются файлу шагами incremental_vacuum и выполняется PRAGMA optimize. Рабочая
+таблица остаётся ограниченного размера, и запросы к ней не замедляются с ростом истории.
+
+В планировщике (get_rss_text.py) проход раз в RETENTION_INTERVAL секунд выполняет
+фоновый поток со своим соединением: каждая пачка - короткие транзакции, так что
+запись парсера ждёт не дольше одной пачки.
+
+Запуск: python retention.py --max-age-days 180 --dry-run
+"""
+
+import argparse
+import logging
+import sqlite3
+import threading
+from typing import Optional
+
+from config import (
+    RETENTION_ARCHIVE_DIR, RETENTION_BATCH_PAUSE, RETENTION_BATCH_SIZE, RETENTION_INTERVAL,
+    RETENTION_MAX_AGE_DAYS, RETENTION_MAX_ROWS_PER_CATEGORY
+)
+from database import RSSDatabase
+
+logger = logging.getLogger(__name__)
+
+
+def run_retention(db: RSSDatabase, max_age_days: float = RETENTION_MAX_AGE_DAYS,
+                  max_rows_per_category: int = RETENTION_MAX_ROWS_PER_CATEGORY,
+                  archive_dir: str = RETENTION_ARCHIVE_DIR, batch_size: int = RETENTION_BATCH_SIZE,
+                  pause: float = RETENTION_BATCH_PAUSE, stop: Optional[threading.Event] = None) -> dict:
+    """
+    Один проход: перенос в архивы по политике и сжатие; возвращает {'archived': {месяц: записей}, 'compact': ...}.
+    stop прерывает проход между пачками
+    """
+    condition = db.retention_condition(max_age_days, max_rows_per_category)
+    archived = db.archive_items(condition, archive_dir, batch_size, pause, stop=stop) if condition is not None else {}
+    compact = db.compact(pause=pause, stop=stop)
+    return {'archived': archived, 'compact': compact}
+
+
+class RetentionWorker:
+    """Фоновый поток: run_retention раз в interval секунд через отдельное соединение с базой"""
+
+    def __init__(self, db_path: str = "rss_data.db", interval: float = RETENTION_INTERVAL, **policy):
+        self.db_path = db_path
+        self.interval = interval
+        self.policy = policy
+        self.runs = 0
+        self.last_result: Optional[dict] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._serve, name='retention', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Останавливает поток после текущей пачки"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self) -> Optional[dict]:
+        db = RSSDatabase(self.db_path)
+        try:
+            result = run_retention(db, stop=self._stop, **self.policy)
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Ошибка архивирования базы {self.db_path}: {e}")
+            return None
+        finally:
+            db.close()
+        self.runs += 1
+        self.last_result = result
+        archived = sum(result['archived'].values())
+        compact = result['compact']
+        if archived or compact['freed_pages']:
+            logger.info(f"Архивировано проектов: {archived}, освобождено "
+                        f"{compact['freed_pages'] * compact['page_size'] / 1024 / 1024:.1f} МБ")
+        return result
+
+    def _serve(self):
+        while not self._stop.is_set():
+            self.run_once()
+            if self._stop.wait(self.interval):
+                break
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default='rss_data.db', help='рабочая база данных')
+    parser.add_argument('--max-age-days', type=float, default=RETENTION_MAX_AGE_DAYS,
+                        help='переносить проекты старше N дней (0 - без ограничения)')
+    parser.add_argument('--max-rows', type=int, default=RETENTION_MAX_ROWS_PER_CATEGORY,
+                        help='оставлять в категории не больше N самых новых (0 - без ограничения)')
+    parser.add_argument('--archive-dir', default=RETENTION_ARCHIVE_DIR, help='каталог помесячных архивов')
+    parser.add_argument('--batch-size', type=int, default=RETENTION_BATCH_SIZE, help='записей в одной пачке')
+    parser.add_argument('--dry-run', action='store_true', help='только показать, сколько записей будет перенесено')
+    parser.add_argument('--vacuum', action='store_true',
+                        help='однократно перевести старую базу в auto_vacuum=INCREMENTAL (полный VACUUM, '
+                             'запись блокируется - остановите парсер)')
+    args = parser.parse_args()
+
+    db = RSSDatabase(args.db)
+    try:
+        condition = db.retention_condition(args.max_age_days, args.max_rows)
+        if args.dry_run:
+            by_month = db.count_by_month(condition) if condition is not None else {}
+            for month, count in by_month.items():
+                print(f"   - {month}: {count}")
+            print(f"Будет перенесено в архив проектов: {sum(by_month.values())}")
+            return
+        if args.vacuum:
+            print("Полный VACUUM с переводом в auto_vacuum=INCREMENTAL...")
+            if not db.enable_incremental_vacuum():
+                raise SystemExit(1)
+        result = run_retention(db, args.max_age_days, args.max_rows, args.archive_dir, args.batch_size, pause=0)
+    except (sqlite3.Error, OSError) as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    finally:
+        db.close()
+
+    for month, count in sorted(result['archived'].items()):
+        print(f"   - {month}: {count}")
+    compact = result['compact']
+    print(f"✓ Перенесено в архив {args.archive_dir}: {sum(result['archived'].values())} проектов")
+    if compact['auto_vacuum'] == 2:
+        print(f"✓ Освобождено {compact['freed_pages'] * compact['page_size'] / 1024 / 1024:.1f} МБ")
+    else:
+        print("Свободные страницы остаются в файле: для сжатия шагами запустите один раз с --vacuum")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Адаптивный планировщик опроса категорий
+
+У каждой категории свой интервал опроса, который подстраивается под
+наблюдаемую частоту новых проектов: за один опрос ожидается около
+SCHEDULER_TARGET_NEW новых проектов, поэтому активные категории опрашиваются
+часто, а редкие - всё реже (в пределах SCHEDULER_MIN_INTERVAL..SCHEDULER_MAX_INTERVAL).
+
+Планировщик спит ровно до ближайшего срока, а не проверяет расписание
+раз в минуту. Запуски не пересекаются: категории, срок которых наступил
+во время прохода, объединяются в следующий проход, а не копятся.
+Время берётся из clock, ожидание - через wait, поэтому планировщик
+можно прогнать на имитированных часах (см. benchmarks/bench_scheduler.py).
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import (
+    SCHEDULER_MIN_INTERVAL, SCHEDULER_MAX_INTERVAL, SCHEDULER_INITIAL_INTERVAL,
+    SCHEDULER_TARGET_NEW, SCHEDULER_RATE_SMOOTHING, SCHEDULER_COALESCE, SCHEDULER_ACTIVE_HOURS
+)
+
+logger = logging.getLogger(__name__)
+
+# Во сколько раз интервал может вырасти за один опрос без новых проектов
+MAX_INTERVAL_GROWTH = 2.0
+
+
+def parse_active_hours(value: str) -> Optional[Tuple[int, int]]:
+    """Окно опроса 'ЧЧ:ММ-ЧЧ:ММ' в минутах от полуночи (None - круглосуточно)"""
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        start, end = (part.strip() for part in value.split('-'))
+        bounds = []
+        for part in (start, end):
+            hours, minutes = part.split(':')
+            bounds.append(int(hours) * 60 + int(minutes))
+    except ValueError:
+        raise ValueError(f"Неверное окно опроса '{value}', ожидается ЧЧ:ММ-ЧЧ:ММ")
+    if bounds[0] == bounds[1]:
+        return None
+    return bounds[0], bounds[1]
+
+
+class CategoryJob:
+    """Состояние опроса одной категории"""
+
+    __slots__ = ('category', 'interval', 'next_due', 'last_polled', 'rate', 'polls', 'new_items', 'failures')
+
+    def __init__(self, category: int, interval: float, next_due: float, rate: Optional[float] = None):
+        self.category = category
+        self.interval = interval
+        self.next_due = next_due
+        self.last_polled: Optional[float] = None
+        self.rate = rate  # Сглаженная частота новых проектов, в секунду
+        self.polls = 0
+        self.new_items = 0
+        self.failures = 0
+
+
+class AdaptiveScheduler:
+    """Планировщик с интервалами опроса по категориям, подстраивающимися под частоту публикаций"""
+
+    def __init__(self, run: Callable[[List[int]], Dict[int, Optional[int]]],
+                 categories: Callable[[], Iterable[int]], clock: Callable[[], float] = time.time,
+                 min_interval: float = SCHEDULER_MIN_INTERVAL, max_interval: float = SCHEDULER_MAX_INTERVAL,
+                 initial_interval: float = SCHEDULER_INITIAL_INTERVAL, target_new: float = SCHEDULER_TARGET_NEW,
+                 smoothing: float = SCHEDULER_RATE_SMOOTHING, coalesce: float = SCHEDULER_COALESCE,
+                 active_hours: Optional[str] = SCHEDULER_ACTIVE_HOURS, rates: Optional[Dict[int, float]] = None):
+        """
+        run(categories) - проход по категориям; возвращает число новых проектов
+        по каждой категории (None - лента не получена).
+        categories() - текущий список категорий (перечитывается перед каждым проходом).
+        rates - начальные частоты публикаций по категориям, проектов в секунду
+        """
+        self.run = run
+        self.categories = categories
+        self.clock = clock
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.initial_interval = min(max(initial_interval, min_interval), self.max_interval)
+        self.target_new = target_new
+        self.smoothing = smoothing
+        self.coalesce = coalesce
+        self.active_hours = parse_active_hours(active_hours) if isinstance(active_hours, str) else active_hours
+        self.rates = dict(rates or {})
+        self.jobs: Dict[int, CategoryJob] = {}
+        self.runs = 0
+        self.coalesced = 0  # Сроков, наступивших во время прохода и объединённых в следующий
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    # Окно опроса
+
+    def in_active_hours(self, timestamp: float) -> bool:
+        if self.active_hours is None:
+            return True
+        moment = datetime.fromtimestamp(timestamp)
+        minute = moment.hour * 60 + moment.minute
+        start, end = self.active_hours
+        if start < end:
+            return start <= minute < end
+        return minute >= start or minute < end  # Окно через полночь
+
+    def align(self, timestamp: float) -> float:
+        """Ближайший момент не раньше timestamp внутри окна опроса"""
+        if self.in_active_hours(timestamp):
+            return timestamp
+        moment = datetime.fromtimestamp(timestamp)
+        start = moment.replace(hour=self.active_hours[0] // 60, minute=self.active_hours[0] % 60,
+                               second=0, microsecond=0)
+        if start <= moment:
+            start += timedelta(days=1)
+        return start.timestamp()
+
+    # Категории и интервалы
+
+    def interval_for_rate(self, rate: Optional[float]) -> float:
+        if not rate:
+            return self.initial_interval
+        return min(max(self.target_new / rate, self.min_interval), self.max_interval)
+
+    def sync_categories(self, now: Optional[float] = None, immediate: bool = False):
+        """Добавляет новые категории (первый опрос - сразу) и убирает исключённые"""
+        now = self.clock() if now is None else now
+        current = set(self.categories())
+        for category in list(self.jobs):
+            if category not in current:
+                del self.jobs[category]
+        for category in sorted(current - set(self.jobs)):
+            rate = self.rates.get(category)
+            due = now if immediate else self.align(now)
+            self.jobs[category] = CategoryJob(category, self.interval_for_rate(rate), due, rate)
+
+    def adapt(self, job: CategoryJob, new_items: Optional[int], now: float):
+        """Обновляет частоту публикаций и интервал категории по итогам опроса"""
+        job.polls += 1
+        if new_items is None:
+            # Лента не получена: частоту не трогаем, повторяем через прежний интервал
+            job.failures += 1
+            job.next_due = self.align(now + job.interval)
+            return
+
+        job.new_items += new_items
+        if job.last_polled is not None and now > job.last_polled:
+            observed = new_items / (now - job.last_polled)
+            job.rate = observed if job.rate is None else \
+                self.smoothing * observed + (1 - self.smoothing) * job.rate
+        job.last_polled = now
+
+        if job.rate:
+            interval = self.target_new / job.rate
+        else:
+            interval = job.interval * MAX_INTERVAL_GROWTH
+        # Сокращается интервал сразу, а растёт не быстрее MAX_INTERVAL_GROWTH за опрос
+        interval = min(interval, job.interval * MAX_INTERVAL_GROWTH)
+        job.interval = min(max(interval, self.min_interval), self.max_interval)
+        job.next_due = self.align(now + job.interval)
+
+    # Выполнение
+
+    def next_due(self) -> Optional[float]:
+        """Ближайший срок опроса (None - категорий нет)"""
+        return min((job.next_due for job in self.jobs.values()), default=None)
+
+    def due_categories(self, now: float) -> List[int]:
+        """Категории, срок которых наступил (или наступит в пределах coalesce секунд)"""
+        return sorted(job.category for job in self.jobs.values() if job.next_due <= now + self.coalesce)
+
+    def run_pending(self, now: Optional[float] = None) -> List[int]:
+        """Выполняет один проход по наступившим категориям; возвращает опрошенные категории"""
+        if not self._run_lock.acquire(blocking=False):
+            # Предыдущий проход ещё идёт - наступившие сроки войдут в следующий
+            return []
+        try:
+            now = self.clock() if now is None else now
+            self.sync_categories(now)
+            due = self.due_categories(now)
+            if not due:
+                return []
+
+            self.runs += 1
+            results = {}
+            try:
+                results = self.run(due) or {}
+            except Exception as e:
+                logger.error(f"Ошибка прохода по категориям {due}: {e}")
+
+            finished = self.clock()
+            for category in due:
+                job = self.jobs.get(category)
+                if job is not None:
+                    self.adapt(job, results.get(category), finished)
+            # Сроки, наступившие за время прохода, выполнит следующий проход
+            self.coalesced += sum(1 for job in self.jobs.values()
+                                  if job.category not in due and job.next_due < finished)
+            return due
+        finally:
+            self._run_lock.release()
+
+    def serve(self, immediate: bool = True, wait: Optional[Callable[[float], bool]] = None):
+        """
+        Основной цикл: проход по наступившим категориям и сон ровно до следующего срока.
+        immediate - первый проход сразу, независимо от окна опроса.
+        wait(seconds) возвращает True, если планировщик нужно остановить
+        """
+        wait = wait or self._stop.wait
+        self._stop.clear()
+        self.sync_categories(immediate=immediate)
+        while not self._stop.is_set():
+            self.run_pending()
+            due = self.next_due()
+            if due is None:
+                # Категорий нет - ждём изменения included_categories.txt
+                delay = self.min_interval
+            else:
+                delay = max(0.0, due - self.clock())
+                logger.info(f"Следующий опрос: {datetime.fromtimestamp(due).strftime('%Y-%m-%d %H:%M:%S')}")
+            if wait(delay):
+                break
+
+    def stop(self):
+        """Останавливает serve() (безопасно вызывать из обработчика сигнала)"""
+        self._stop.set()
+
+    # Прогноз и статистика
+
+    def preview(self, horizon: float, now: Optional[float] = None) -> List[Tuple[float, List[int]]]:
+        """
+        Прогноз проходов на horizon секунд вперёд при текущих интервалах:
+        список (время прохода, категории)
+        """
+        now = self.clock() if now is None else now
+        if not self.jobs:
+            self.sync_categories(now)
+        due = {category: max(job.next_due, now) for category, job in self.jobs.items()}
+        planned = []
+        while due:
+            moment = min(due.values())
+            if moment > now + horizon:
+                break
+            categories = sorted(category for category, at in due.items() if at <= moment + self.coalesce)
+            planned.append((moment, categories))
+            for category in categories:
+                due[category] = self.align(moment + self.jobs[category].interval)
+        return planned
+
+    def stats(self) -> List[dict]:
+        """Состояние опроса по категориям"""
+        return [
+            {
+                'category': job.category,
+                'interval': job.interval,
+                'next_due': job.next_due,
+                'rate_per_hour': job.rate * 3600 if job.rate is not None else None,
+                'polls': job.polls,
+                'new_items': job.new_items,
+                'failures': job.failures,
+            }
+            for job in sorted(self.jobs.values(), key=lambda job: job.category)
+        ]
@@ -39,6 +39,7 @@ setup(
     entry_points={
         "console_scripts": [
             "fl-rss-parser=get_rss_text:main",
+            "fl-rss-web=wsgi:main",
         ],
     },
 )
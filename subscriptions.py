@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Маршрутизация уведомлений по подпискам чатов
+
+Термины всех подписок (ключевые слова и стоп-слова) собираются в один
+KeywordMatcher, а инвертированный индекс сопоставляет каждому термину
+подписчиков. Текст проекта просматривается один раз, после чего по
+найденным терминам набирается множество получателей - стоимость зависит
+от длины текста и числа совпадений, а не от числа подписок.
+
+Подписка из .env (TELEGRAM_CHAT_ID) использует filterList.ini, stopwords.ini
+и NOTIFY_URGENT_CATEGORIES; остальные хранятся в таблицах subscriptions
+и subscription_filters и управляются из бота.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from config import FILTER_MATCH_MODE, FILTER_RELOAD_INTERVAL, NOTIFY_URGENT_CATEGORIES
+from config_watcher import ConfigWatcher
+from database import RSSDatabase
+from matcher import KeywordMatcher
+from metrics import MATCH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Профиль фильтров одного чата"""
+
+    __slots__ = ('chat_id', 'keywords', 'stopwords', 'categories', 'urgent')
+
+    def __init__(self, chat_id, keywords: Iterable[str] = (), stopwords: Iterable[str] = (),
+                 categories: Iterable[int] = (), urgent: Iterable[int] = ()):
+        """categories - разрешённые категории (пусто - все), urgent - категории без проверки ключевых слов"""
+        self.chat_id = str(chat_id)
+        self.keywords: FrozenSet[str] = frozenset(keywords)
+        self.stopwords: FrozenSet[str] = frozenset(stopwords)
+        self.categories: FrozenSet[int] = frozenset(categories)
+        self.urgent: FrozenSet[int] = frozenset(urgent)
+
+    @classmethod
+    def from_row(cls, row: dict) -> 'Subscription':
+        """Подписка из записи RSSDatabase.get_subscriptions()"""
+        return cls(row['chat_id'], row['keyword'], row['stopword'], row['category'], row['urgent'])
+
+    def allows_category(self, category: int) -> bool:
+        return not self.categories or category in self.categories
+
+
+class SubscriptionMatcher:
+    """Все подписки, скомпилированные в один сопоставитель с инвертированным индексом"""
+
+    def __init__(self, subscriptions: Iterable[Subscription], mode: str = FILTER_MATCH_MODE):
+        self.subscriptions: List[Subscription] = list(subscriptions)
+        self._keyword_index: Dict[str, List[int]] = defaultdict(list)
+        self._stopword_index: Dict[str, List[int]] = defaultdict(list)
+        self._urgent_index: Dict[int, List[int]] = defaultdict(list)
+
+        for index, subscription in enumerate(self.subscriptions):
+            for term in subscription.keywords:
+                self._keyword_index[term].append(index)
+            for term in subscription.stopwords:
+                self._stopword_index[term].append(index)
+            for category in subscription.urgent:
+                self._urgent_index[category].append(index)
+
+        # Термины нормализуются так же, как в KeywordMatcher, поэтому индекс совпадает с результатами
+        self.matcher = KeywordMatcher(set(self._keyword_index) | set(self._stopword_index), mode)
+        self._keyword_index = self._normalized(self._keyword_index)
+        self._stopword_index = self._normalized(self._stopword_index)
+
+    @staticmethod
+    def _normalized(index: Dict[str, List[int]]) -> Dict[str, List[int]]:
+        normalized: Dict[str, List[int]] = defaultdict(list)
+        for term, subscribers in index.items():
+            normalized[' '.join(term.lower().split())].extend(subscribers)
+        return dict(normalized)
+
+    def __len__(self) -> int:
+        return len(self.subscriptions)
+
+    def route(self, text: str, category: int) -> List[str]:
+        """chat_id подписчиков, которым нужно уведомление о проекте"""
+        matched = self.matcher.matched_terms(text)
+        blocked = set()
+        candidates = set(self._urgent_index.get(category, ()))
+        for term in matched:
+            blocked.update(self._stopword_index.get(term, ()))
+            candidates.update(self._keyword_index.get(term, ()))
+
+        return [
+            self.subscriptions[index].chat_id
+            for index in sorted(candidates - blocked)
+            if self.subscriptions[index].allows_category(category)
+        ]
+
+
+class SubscriptionRouter:
+    """Актуальный SubscriptionMatcher: пересобирается при изменении подписок или файлов фильтров"""
+
+    def __init__(self, database: RSSDatabase, watcher: Optional[ConfigWatcher] = None,
+                 default_chat_id: Optional[str] = None, check_interval: float = FILTER_RELOAD_INTERVAL,
+                 mode: str = FILTER_MATCH_MODE):
+        self.database = database
+        self.watcher = watcher
+        self.default_chat_id = str(default_chat_id) if default_chat_id else None
+        self.check_interval = check_interval
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._matcher: Optional[SubscriptionMatcher] = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def _current_version(self):
+        generation = self.watcher.generation if self.watcher is not None else 0
+        return self.database.get_subscriptions_version(), generation
+
+    def _build(self) -> SubscriptionMatcher:
+        """Собирает подписки из БД и подписку по умолчанию из .env и файлов фильтров"""
+        subscriptions = [Subscription.from_row(row) for row in self.database.get_subscriptions()]
+        # Подписка чата из .env, если он не настроен в реестре отдельно
+        if self.default_chat_id and self.watcher is not None and \
+                all(subscription.chat_id != self.default_chat_id for subscription in subscriptions):
+            filters = self.watcher.current
+            subscriptions.insert(0, Subscription(self.default_chat_id, filters.keywords, filters.stopwords,
+                                                 urgent=NOTIFY_URGENT_CATEGORIES))
+        return SubscriptionMatcher(subscriptions, self.mode)
+
+    @property
+    def matcher(self) -> SubscriptionMatcher:
+        """Текущий сопоставитель (версия подписок проверяется не чаще check_interval)"""
+        with self._lock:
+            now = time.monotonic()
+            if self._matcher is None or now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                version = self._current_version()
+                if version != self._version:
+                    self._matcher = self._build()
+                    if self._version is not None:
+                        logger.info(f"Подписки перезагружены: {len(self._matcher)} чатов")
+                    self._version = version
+            return self._matcher
+
+    def route(self, title: str, description: str, link: str, pub_date: str, category: int) -> List[str]:
+        """Получатели уведомления о проекте (сигнатура маршрута RSSDatabase)"""
+        started = time.perf_counter()
+        try:
+            return self.matcher.route(f"{title or ''}\n{description or ''}", category)
+        finally:
+            MATCH_SECONDS.observe(time.perf_counter() - started)
@@ -3,14 +3,20 @@
 Telegram Bot для уведомлений о новых проектах FL.ru
 """
 
-import configparser
 import os
 import logging
-from typing import Set
+import time
+from typing import FrozenSet, List, Optional, Set
 import asyncio
 from telegram import Bot
 from dotenv import load_dotenv
 
+from config import TELEGRAM_API_URL, NOTIFY_FLUSH_TIMEOUT, NOTIFY_URGENT_CATEGORIES
+from config_watcher import ConfigWatcher, FilterSnapshot, get_config_watcher, load_terms
+from matcher import KeywordMatcher
+from metrics import MATCH_SECONDS
+from notification_queue import NotificationQueue
+
 # Загружаем переменные окружения
 load_dotenv()
 
@@ -23,115 +29,89 @@ logger = logging.getLogger(__name__)
 
 
 class TelegramNotifier:
-    """Класс для отправки уведомлений в Telegram"""
+    """
+    Фильтры, форматирование и очередь доставки уведомлений в Telegram.
+    Уведомления отправляет OutboxSender (outbox.py): записи outbox, дайджест, повторы
+    """
     
-    def __init__(self, token: str, chat_id: str):
+    def __init__(self, token: str, chat_id: str, watcher: Optional[ConfigWatcher] = None,
+                 base_url: str = TELEGRAM_API_URL):
         """Инициализация бота"""
-        self.bot = Bot(token=token)
+        self.bot = Bot(token=token, base_url=base_url)
         self.chat_id = chat_id
-        self.keywords = self.load_keywords()
-        self.stopwords = self.load_stopwords()
+        # Отправка идёт в фоновом потоке, парсер не ждёт ответа Telegram
+        self.queue = NotificationQueue(self.bot)
+        # Ключевые слова и стоп-слова перечитываются при изменении файлов без перезапуска
+        self.watcher = watcher or get_config_watcher()
+    
+    @property
+    def filters(self) -> FilterSnapshot:
+        """Текущий снимок фильтров (скомпилированные термины)"""
+        return self.watcher.current
+    
+    @property
+    def keywords(self) -> FrozenSet[str]:
+        return self.filters.keywords
+    
+    @property
+    def stopwords(self) -> FrozenSet[str]:
+        return self.filters.stopwords
+    
+    @property
+    def keyword_matcher(self) -> KeywordMatcher:
+        return self.filters.keyword_matcher
+    
+    @property
+    def stopword_matcher(self) -> KeywordMatcher:
+        return self.filters.stopword_matcher
     
     def load_keywords(self, file_path: str = "filterList.ini") -> Set[str]:
         """Загрузка ключевых слов из файла"""
-        keywords = set()
-        
-        if not os.path.exists(file_path):
-            logger.warning(f"Файл {file_path} не найден")
-            return keywords
-        
-        try:
-            config = configparser.ConfigParser()
-            config.read(file_path, encoding='utf-8')
-            
-            if 'keywords' in config:
-                for key, value in config['keywords'].items():
-                    if value.strip():
-                        keywords.add(value.strip().lower())
-            
-            # Если секция [keywords] не найдена, читаем как обычный текстовый файл
-            if not keywords:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith('#') and not line.startswith('['):
-                            keywords.add(line.lower())
-                            
-        except Exception as e:
-            logger.error(f"Ошибка при загрузке ключевых слов: {e}")
-        
-        logger.info(f"Загружено {len(keywords)} ключевых слов")
-        return keywords
+        return load_terms(file_path, 'keywords')
     
     def load_stopwords(self, file_path: str = "stopwords.ini") -> Set[str]:
         """Загрузка стоп-слов из файла"""
-        stopwords = set()
-        
-        if not os.path.exists(file_path):
-            logger.warning(f"Файл стоп-слов {file_path} не найден")
-            return stopwords
-        
-        try:
-            config = configparser.ConfigParser()
-            config.read(file_path, encoding='utf-8')
-            
-            if 'stopwords' in config:
-                for key, value in config['stopwords'].items():
-                    if value.strip():
-                        stopwords.add(value.strip().lower())
-            
-            # Если секция [stopwords] не найдена, читаем как обычный текстовый файл
-            if not stopwords:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith('#') and not line.startswith('['):
-                            stopwords.add(line.lower())
-                            
-        except Exception as e:
-            logger.error(f"Ошибка при загрузке стоп-слов: {e}")
-        
-        logger.info(f"Загружено {len(stopwords)} стоп-слов")
-        return stopwords
+        return load_terms(file_path, 'stopwords')
     
-    def check_keywords_in_text(self, text: str) -> bool:
+    def check_keywords_in_text(self, text: str, filters: Optional[FilterSnapshot] = None) -> bool:
         """Проверка наличия ключевых слов в тексте"""
-        if not text or not self.keywords:
-            return False
-        
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in self.keywords)
+        return (filters or self.filters).keyword_matcher.matches(text)
     
-    def check_stopwords_in_text(self, text: str) -> bool:
+    def check_stopwords_in_text(self, text: str, filters: Optional[FilterSnapshot] = None) -> bool:
         """Проверка наличия стоп-слов в тексте"""
-        if not text or not self.stopwords:
-            return False
-        
-        text_lower = text.lower()
-        found_stopwords = [word for word in self.stopwords if word in text_lower]
+        found_stopwords = (filters or self.filters).stopword_matcher.matched_terms(text)
         
         if found_stopwords:
-            logger.info(f"Найдены стоп-слова: {found_stopwords}")
+            logger.info(f"Найдены стоп-слова: {sorted(found_stopwords)}")
             return True
         
         return False
     
     def should_notify(self, title: str, description: str, category: int) -> bool:
         """Определяет, нужно ли отправлять уведомление"""
+        # Заголовок и описание просматриваются одним текстом за один проход на каждый набор терминов
+        text = f"{title or ''}\n{description or ''}"
+        # Один снимок на элемент: перезагрузка фильтров вступает в силу со следующего элемента
+        filters = self.filters
+        
         # Сначала проверяем стоп-слова
-        if self.check_stopwords_in_text(title) or self.check_stopwords_in_text(description):
+        if self.check_stopwords_in_text(text, filters):
             logger.info(f"Уведомление заблокировано стоп-словами: {title[:50]}")
             return False
         
-        # Проверяем категорию 5
-        if category == 5:
+        # Срочные категории (по умолчанию 5) - уведомляем всегда
+        if category in NOTIFY_URGENT_CATEGORIES:
             return True
         
         # Проверяем ключевые слова в заголовке и описании
-        if self.check_keywords_in_text(title) or self.check_keywords_in_text(description):
-            return True
-        
-        return False
+        return self.check_keywords_in_text(text, filters)
+    
+    def route(self, title: str, description: str, link: str, pub_date: str, category: int) -> List[str]:
+        """Получатели уведомления о проекте (для записи в outbox вместе с проектом)"""
+        started = time.perf_counter()
+        notify = self.should_notify(title, description, category)
+        MATCH_SECONDS.observe(time.perf_counter() - started)
+        return [self.chat_id] if notify else []
     
     def format_message(self, title: str, description: str, link: str, pub_date: str, category: int) -> str:
         """Форматирует сообщение для отправки"""
@@ -155,37 +135,26 @@ class TelegramNotifier:
         
         return message
     
-    async def send_notification(self, title: str, description: str, link: str, pub_date: str, category: int):
-        """Отправляет уведомление о проекте"""
-        try:
-            message = self.format_message(title, description, link, pub_date, category)
-            
-            await self.bot.send_message(
-                chat_id=self.chat_id,
-                text=message,
-                parse_mode='HTML',
-                disable_web_page_preview=True
-            )
-            
-            logger.info(f"Уведомление отправлено: {title[:50]}...")
-            
-        except Exception as e:
-            logger.error(f"Ошибка при отправке уведомления: {e}")
-    
-    def notify_if_needed(self, title: str, description: str, link: str, pub_date: str, category: int) -> bool:
-        """Проверяет и отправляет уведомление если нужно (синхронная версия)"""
-        if self.should_notify(title, description, category):
-            try:
-                # Запускаем асинхронную функцию в новом event loop
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(self.send_notification(title, description, link, pub_date, category))
-                loop.close()
-                return True  # Уведомление отправлено
-            except Exception as e:
-                logger.error(f"Ошибка при отправке уведомления: {e}")
-                return False
-        return False  # Уведомление не требовалось
+    def format_digest_entry(self, title: str, description: str, link: str, pub_date: str, category: int) -> str:
+        """Форматирует проект для дайджеста (компактнее, чем format_message)"""
+        max_desc_length = 150
+        if description and len(description) > max_desc_length:
+            description = description[:max_desc_length] + "..."
+        
+        entry = f"📝 <b>{title}</b>\n"
+        if description:
+            entry += f"📄 {description}\n"
+        entry += f"🏷 {category}"
+        if pub_date:
+            entry += f" · 📅 {pub_date}"
+        entry += f"\n🔗 {link}"
+        
+        return entry
+    
+    def flush(self, timeout: Optional[float] = NOTIFY_FLUSH_TIMEOUT) -> dict:
+        """Ожидает доставки очереди и возвращает её счётчики"""
+        self.queue.flush(timeout)
+        return self.queue.stats()
 
 
 # Глобальная переменная для хранения экземпляра бота
@@ -212,14 +181,6 @@ def get_telegram_notifier():
     return _telegram_notifier
 
 
-def send_telegram_notification(title: str, description: str, link: str, pub_date: str, category: int) -> bool:
-    """Отправляет уведомление в Telegram если нужно"""
-    notifier = get_telegram_notifier()
-    if notifier:
-        return notifier.notify_if_needed(title, description, link, pub_date, category)
-    return False
-
-
 async def test_bot():
     """Тестирует работу бота"""
     notifier = get_telegram_notifier()
@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+"""
+Тесты FL.ru RSS Parser: разбор лент, отправка и хранение уведомлений
+
+Запуск: make test (python3 -m unittest test_rss_parser.py -v)
+"""
+
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+from types import SimpleNamespace
+from email.utils import formatdate
+from unittest import mock
+
+from telegram.error import BadRequest, NetworkError
+
+import get_rss_text
+from config_watcher import FilterSnapshot
+from database import ItemStatus, RSSDatabase
+from matcher import KeywordMatch, KeywordMatcher
+from notification_queue import NotificationQueue
+from outbox import OutboxSender
+from subscriptions import Subscription, SubscriptionMatcher, SubscriptionRouter
+from telegram_bot import TelegramNotifier
+from viewdatabase import WebInterface
+
+CATEGORY = 5
+NOW = 1760000000
+
+
+class FakeResponse:
+    """Ответ ленты без сети: тело отдаётся фрагментами, как у requests"""
+
+    def __init__(self, body):
+        self.body = body.encode()
+        self.status_code = 200
+        self.headers = {}
+        self.url = f"{get_rss_text.RSS_BASE_URL}{CATEGORY}"
+        self.history = []
+        self.elapsed = None
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+def feed(*items):
+    """Лента из элементов (номер проекта, возраст в часах) в порядке выдачи"""
+    entries = ''.join(
+        f'<item><title>Проект {number}</title><description>Описание проекта {number}</description>'
+        f'<link>https://www.fl.ru/projects/{number}/</link>'
+        f'<pubDate>{formatdate(NOW - hours * 3600)}</pubDate></item>'
+        for number, hours in items
+    )
+    return f'<?xml version="1.0" encoding="utf-8"?><rss><channel>{entries}</channel></rss>'
+
+
+class WatermarkTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = RSSDatabase(os.path.join(self.tmp.name, 'rss_data.db'))
+        patcher = mock.patch.object(get_rss_text, 'get_outbox_sender', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(self.db.close)
+
+    def run_feed(self, *items):
+        with mock.patch('builtins.print'):
+            return get_rss_text.process_category_response(CATEGORY, FakeResponse(feed(*items)), self.db,
+                                                          self.db.get_known_links())
+
+    def test_pinned_first_item(self):
+        """Закреплённый старый проект вверху ленты не скрывает новые под ним"""
+        self.run_feed((1, 100), (4, 3), (3, 4), (2, 5))
+        self.assertEqual(self.db.get_watermark(CATEGORY)['link'], 'https://www.fl.ru/projects/4/')
+
+        result = self.run_feed((1, 100), (5, 1), (4, 3), (3, 4), (2, 5))
+        self.assertEqual(result['new_items'], 1)
+        self.assertIn('https://www.fl.ru/projects/5/', self.db.get_known_links())
+        self.assertEqual(self.db.get_watermark(CATEGORY)['link'], 'https://www.fl.ru/projects/5/')
+
+    def test_pinned_newest_item(self):
+        """Закреплённый самый новый проект - отметка, но новые проекты под ним сохраняются"""
+        self.run_feed((3, 1), (2, 5), (1, 6))
+        result = self.run_feed((3, 1), (4, 2), (2, 5), (1, 6))
+        self.assertEqual(result['new_items'], 1)
+        self.assertIn('https://www.fl.ru/projects/4/', self.db.get_known_links())
+        self.assertEqual(self.db.get_watermark(CATEGORY)['link'], 'https://www.fl.ru/projects/3/')
+
+    def test_stop_at_watermark(self):
+        """Разбор останавливается на отметке прошлого запуска"""
+        self.run_feed((3, 3), (2, 4), (1, 5))
+        result = self.run_feed((5, 1), (4, 2), (3, 3), (2, 4), (1, 5))
+        self.assertEqual(result['new_items'], 2)
+        self.assertTrue(result['early_stop'])
+        self.assertEqual(result['items_seen'], 2)
+
+
+class FailingBot:
+    """Bot, у которого каждая отправка завершается ошибкой error"""
+
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.calls += 1
+        raise self.error
+
+
+class NotificationQueueTest(unittest.TestCase):
+    def send(self, bot, max_retries):
+        queue = NotificationQueue(bot, max_retries=max_retries)
+        self.addCleanup(queue.close)
+        started = time.monotonic()
+        future = queue.submit('1', 'текст')
+        with mock.patch('notification_queue.logger'):
+            error = future.exception(timeout=10)
+        return error, time.monotonic() - started
+
+    def test_bad_request_fails_without_retries(self):
+        """Отказ Telegram (BadRequest) не повторяется и не задерживает очередь чата"""
+        bot = FailingBot(BadRequest("Can't parse entities"))
+        error, elapsed = self.send(bot, max_retries=5)
+        self.assertIsInstance(error, BadRequest)
+        self.assertEqual(bot.calls, 1)
+        self.assertLess(elapsed, 1)
+
+    def test_no_sleep_after_last_attempt(self):
+        """После последней попытки при сетевой ошибке задание завершается без паузы"""
+        bot = FailingBot(NetworkError("connection reset"))
+        error, elapsed = self.send(bot, max_retries=0)
+        self.assertIsInstance(error, RuntimeError)
+        self.assertEqual(bot.calls, 1)
+        self.assertLess(elapsed, 1)
+
+
+class KeywordMatcherTest(unittest.TestCase):
+    TEXT = 'Нужен Python-разработчик для бота. Telegram\n  бот на pythonista'
+
+    def terms(self, mode, terms=('python', 'бот', 'telegram бот')):
+        return [(match.term, match.start) for match in KeywordMatcher(terms, mode).find_all(self.TEXT)]
+
+    def test_substring_mode(self):
+        """Подстрока находится и внутри слова, без учёта регистра"""
+        matcher = KeywordMatcher(['python', 'бот'], 'substring')
+        self.assertTrue(matcher.matches('ищем PYTHONISTA'))
+        self.assertEqual(self.terms('substring', ('python', 'бот')),
+                         [('python', 6), ('бот', 18), ('бот', 29), ('бот', 46), ('python', 53)])
+
+    def test_word_mode(self):
+        """Целое слово: термин внутри другого слова не считается совпадением"""
+        matcher = KeywordMatcher(['python'], 'word')
+        self.assertFalse(matcher.matches('ищем pythonista'))
+        self.assertEqual(matcher.search('Знаете Python, Django?'), KeywordMatch('python', 7, 13))
+        self.assertEqual(self.terms('word', ('python', 'бот')), [('python', 6), ('бот', 46)])
+
+    def test_phrase_mode(self):
+        """Фраза совпадает при любых пробелах и переводах строк между словами"""
+        self.assertEqual(self.terms('phrase'), [('python', 6), ('telegram бот', 35), ('бот', 46)])
+        self.assertFalse(KeywordMatcher(['telegram бот'], 'phrase').matches('telegram-бот'))
+
+    def test_overlapping_terms(self):
+        """find_all в режиме подстроки возвращает пересекающиеся вхождения"""
+        matches = KeywordMatcher(['abab', 'ba'], 'substring').find_all('ababab')
+        self.assertEqual([(match.term, match.start, match.end) for match in matches],
+                         [('abab', 0, 4), ('ba', 1, 3), ('abab', 2, 6), ('ba', 3, 5)])
+
+    def test_prefix_sharing_terms(self):
+        """Термины с общим началом находятся все, включая более короткие"""
+        matcher = KeywordMatcher(['бот', 'бота', 'ботан'], 'substring')
+        self.assertEqual([(match.term, match.start) for match in matcher.find_all('ботаник бота')],
+                         [('ботан', 0), ('бота', 0), ('бот', 0), ('бота', 8), ('бот', 8)])
+        self.assertEqual(matcher.matched_terms('ботаник'), {'бот', 'бота', 'ботан'})
+        word = KeywordMatcher(['бот', 'бота', 'ботан'], 'word')
+        self.assertEqual([match.term for match in word.find_all('ботаник бота бот')], ['бота', 'бот'])
+
+    def test_empty_and_invalid(self):
+        self.assertFalse(KeywordMatcher([]).matches('python'))
+        with self.assertRaises(ValueError):
+            KeywordMatcher(['python'], 'regex')
+
+
+class StopwordPrecedenceTest(unittest.TestCase):
+    URGENT = 5
+    REGULAR = 37
+
+    def setUp(self):
+        watcher = SimpleNamespace(current=FilterSnapshot(1, {'python'}, {'wordpress'}, set(), 'word'))
+        self.notifier = TelegramNotifier('123456:test', '1', watcher=watcher)
+        self.addCleanup(self.notifier.queue.close)
+        patcher = mock.patch('telegram_bot.NOTIFY_URGENT_CATEGORIES', {self.URGENT})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def should_notify(self, title, category):
+        with mock.patch('telegram_bot.logger'):
+            return self.notifier.should_notify(title, 'описание', category)
+
+    def test_stopword_blocks_keyword(self):
+        """Стоп-слово блокирует проект даже при совпадении ключевого слова"""
+        self.assertTrue(self.should_notify('Python скрипт', self.REGULAR))
+        self.assertFalse(self.should_notify('Python плагин для WordPress', self.REGULAR))
+
+    def test_stopword_blocks_urgent_category(self):
+        """Стоп-слова проверяются раньше срочных категорий"""
+        self.assertTrue(self.should_notify('Вёрстка лендинга', self.URGENT))
+        self.assertFalse(self.should_notify('Тема для WordPress', self.URGENT))
+        self.assertFalse(self.should_notify('Вёрстка лендинга', self.REGULAR))
+
+
+class FakeQueue:
+    """Очередь доставки без сети: каждая отправка сразу завершается ответом или ошибкой error"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.sent = []
+
+    def submit(self, chat_id, text, items=1, **kwargs):
+        self.sent.append(chat_id)
+        future = Future()
+        if self.error is None:
+            future.set_result(SimpleNamespace(message_id=100 + len(self.sent)))
+        else:
+            future.set_exception(self.error)
+        return future
+
+
+class OutboxTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = RSSDatabase(os.path.join(self.tmp.name, 'rss_data.db'))
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(lambda: self.db.close())
+
+    def add(self, number, chats=('1', '2')):
+        return self.db.add_item(f'Проект {number}', 'Описание', f'https://www.fl.ru/projects/{number}/',
+                                formatdate(NOW), CATEGORY, route=lambda *item: chats)
+
+    def outbox(self):
+        return self.db.conn.execute(
+            'SELECT chat_id, status, attempts, next_attempt_at, message_id, last_error FROM outbox ORDER BY id'
+        ).fetchall()
+
+    def sender(self, queue, **kwargs):
+        watcher = SimpleNamespace(current=FilterSnapshot(1, set(), set(), set()), generation=1)
+        notifier = TelegramNotifier('123456:test', '1', watcher=watcher)
+        notifier.queue = queue
+        return OutboxSender(notifier, self.db, digest=False, **kwargs)
+
+    def test_claim_and_mark(self):
+        """pending -> sending при выдаче, затем sent с id сообщения или failed"""
+        self.add(1)
+        claimed = self.db.claim_outbox(10)
+        self.assertEqual([(row['chat_id'], row['attempts']) for row in claimed], [('1', 1), ('2', 1)])
+        self.assertEqual([row[1] for row in self.outbox()], ['sending', 'sending'])
+        self.assertEqual(self.db.claim_outbox(10), [])
+
+        self.db.mark_outbox_sent([claimed[0]['id']], 42)
+        self.db.mark_outbox_failed([claimed[1]['id']], 'chat not found', None)
+        self.assertEqual([row[:2] + row[4:] for row in self.outbox()],
+                         [('1', 'sent', 42, None), ('2', 'failed', None, 'chat not found')])
+        self.assertEqual(self.db.get_outbox_stats(), {'pending': 0, 'sending': 0, 'sent': 1, 'failed': 1})
+
+    def test_recover_after_restart(self):
+        """Записи sending после перезапуска возвращаются в pending с прежним числом попыток"""
+        self.add(1)
+        self.db.claim_outbox(1)
+        self.db.close()
+        self.db = RSSDatabase(self.db.db_path)
+        self.assertEqual(self.db.recover_outbox(), 1)
+        self.assertEqual([row[:3] for row in self.outbox()], [('1', 'pending', 1), ('2', 'pending', 0)])
+
+        queue = FakeQueue()
+        # Отправитель при первом запуске тоже возвращает в очередь выданное до него
+        self.db.claim_outbox(1)
+        self.assertEqual(self.sender(queue).drain(), 2)
+        self.assertEqual(queue.sent, ['1', '2'])
+        self.assertEqual([row[1:3] for row in self.outbox()], [('sent', 3), ('sent', 1)])
+
+    def test_retry_backoff(self):
+        """Ошибка отправки назначает повтор с растущей задержкой, после max_attempts - failed"""
+        self.add(1, chats=('1',))
+        queue = FakeQueue(NetworkError('connection reset'))
+        sender = self.sender(queue, max_attempts=3, retry_base=10, retry_max=15)
+        clock = [1000.0]
+        with mock.patch('time.time', lambda: clock[0]), mock.patch('outbox.logger'):
+            self.assertEqual(sender.drain(), 1)
+            self.assertEqual(self.outbox()[0][1:4], ('pending', 1, 1010.0))
+            self.assertEqual(sender.drain(), 0)
+
+            clock[0] = 1010.0
+            self.assertEqual(sender.drain(), 1)
+            self.assertEqual(self.outbox()[0][1:4], ('pending', 2, 1025.0))
+
+            clock[0] = 1025.0
+            self.assertEqual(sender.drain(), 1)
+            self.assertEqual(self.outbox()[0][1:3], ('failed', 3))
+            clock[0] = 10 ** 9
+            self.assertEqual(sender.drain(), 0)
+        self.assertEqual(len(queue.sent), 3)
+        self.assertEqual([sender.retry_delay(attempts) for attempts in (1, 2, 3)], [10, 15, 15])
+
+    def test_dedup_item_and_chat(self):
+        """Одно уведомление на пару (проект, чат) - при повторе чата и повторном сохранении проекта"""
+        self.assertEqual(self.add(1, chats=('1', 1, '2')), ItemStatus.INSERTED)
+        self.assertEqual(self.add(1), ItemStatus.DUPLICATE)
+        self.db.add_items_bulk([('Проект 1', 'Описание', 'https://www.fl.ru/projects/1/', formatdate(NOW), CATEGORY)],
+                               route=lambda *item: ['1', '2', '3'])
+        self.assertEqual([row[0] for row in self.outbox()], ['1', '2'])
+
+
+def route_each(subscriptions, text, category, mode='word'):
+    """Получатели перебором подписок по одной - эталон для инвертированного индекса"""
+    chats = []
+    for subscription in subscriptions:
+        if KeywordMatcher(subscription.stopwords, mode).matches(text) or not subscription.allows_category(category):
+            continue
+        if category in subscription.urgent or KeywordMatcher(subscription.keywords, mode).matches(text):
+            chats.append(subscription.chat_id)
+    return chats
+
+
+class SubscriptionMatcherTest(unittest.TestCase):
+    SUBSCRIPTIONS = [
+        Subscription('1', keywords={'python', 'telegram бот'}, stopwords={'wordpress'}),
+        Subscription('2', keywords={'Python'}, categories={CATEGORY}),
+        Subscription('3', keywords={'вёрстка'}, stopwords={'python'}, urgent={CATEGORY}),
+        Subscription('4', urgent={CATEGORY}, categories={CATEGORY}),
+    ]
+
+    def route(self, text, category):
+        return SubscriptionMatcher(self.SUBSCRIPTIONS, 'phrase').route(text, category)
+
+    def test_keywords_and_stopwords(self):
+        """Ключевые слова и стоп-слова действуют только для своего подписчика"""
+        self.assertEqual(self.route('Парсер на Python', 37), ['1'])
+        self.assertEqual(self.route('Парсер на Python', CATEGORY), ['1', '2', '4'])
+        self.assertEqual(self.route('Python плагин для WordPress', CATEGORY), ['2', '4'])
+        self.assertEqual(self.route('Telegram   бот', 37), ['1'])
+
+    def test_categories_and_urgent(self):
+        """Срочная категория без ключевых слов; ограничение категорий подписки"""
+        self.assertEqual(self.route('Логотип', CATEGORY), ['3', '4'])
+        self.assertEqual(self.route('Логотип', 37), [])
+        self.assertEqual(self.route('Вёрстка лендинга', 37), ['3'])
+
+    def test_matches_per_subscriber_loop(self):
+        """Инвертированный индекс даёт тех же получателей, что и проверка каждой подписки"""
+        rng = random.Random(1)
+        words = ['python', 'django', 'бот', 'telegram', 'парсер', 'вёрстка', 'сайт', 'логотип', 'wordpress', 'срочно']
+        subscriptions = [
+            Subscription(str(number), rng.sample(words, rng.randint(0, 3)), rng.sample(words, rng.randint(0, 2)),
+                         rng.sample(range(1, 6), rng.randint(0, 2)), rng.sample(range(1, 6), rng.randint(0, 1)))
+            for number in range(200)
+        ]
+        for mode in ('substring', 'word', 'phrase'):
+            matcher = SubscriptionMatcher(subscriptions, mode)
+            for _ in range(100):
+                text = ' '.join(rng.choices(words + ['нужен', 'проект'], k=rng.randint(1, 8)))
+                category = rng.randint(1, 6)
+                self.assertEqual(matcher.route(text, category), route_each(subscriptions, text, category, mode),
+                                 (mode, text, category))
+
+
+class SubscriptionRouterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = RSSDatabase(os.path.join(self.tmp.name, 'rss_data.db'))
+        self.watcher = SimpleNamespace(current=FilterSnapshot(1, {'python'}, set(), set(), 'word'), generation=1)
+        self.router = SubscriptionRouter(self.db, self.watcher, '1', check_interval=0, mode='word')
+        for patcher in (mock.patch('subscriptions.NOTIFY_URGENT_CATEGORIES', {CATEGORY}),
+                        mock.patch('subscriptions.logger')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(self.db.close)
+
+    def route(self, title, category=37):
+        return self.router.route(title, '', '', '', category)
+
+    def test_rebuild_on_registry_change(self):
+        """Изменение реестра подписок пересобирает сопоставитель, без изменений - тот же объект"""
+        self.assertEqual(self.route('Django и Python'), ['1'])
+        matcher = self.router.matcher
+        self.assertIs(self.router.matcher, matcher)
+
+        self.db.add_subscription('2')
+        self.db.add_subscription_filters('2', 'keyword', ['django'])
+        self.assertEqual(self.route('Django и Python'), ['1', '2'])
+        self.assertIsNot(self.router.matcher, matcher)
+
+        self.db.add_subscription_filters('2', 'stopword', ['python'])
+        self.assertEqual(self.route('Django и Python'), ['1'])
+        self.assertEqual(self.route('Логотип', CATEGORY), ['1'])
+
+    def test_rebuild_on_filter_generation(self):
+        """Новое поколение файлов фильтров меняет подписку чата из .env"""
+        self.assertEqual(self.route('Бот на aiogram'), [])
+        self.watcher.current = FilterSnapshot(2, {'aiogram'}, {'python'}, set(), 'word')
+        self.assertEqual(self.route('Бот на aiogram'), [])
+        self.watcher.generation = 2
+        self.assertEqual(self.route('Бот на aiogram'), ['1'])
+        self.assertEqual(self.route('Бот на aiogram и python', CATEGORY), [])
+
+    def test_registry_overrides_default_chat(self):
+        """Чат из .env, заведённый в реестре, использует фильтры реестра"""
+        self.db.add_subscription('1')
+        self.db.add_subscription_filters('1', 'keyword', ['django'])
+        self.assertEqual(self.route('Python'), [])
+        self.assertEqual(self.route('Django'), ['1'])
+
+
+class ArchiveStopTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = RSSDatabase(os.path.join(self.tmp.name, 'rss_data.db'))
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(self.db.close)
+        self.db.add_items_bulk([(f'Проект {number}', 'Описание', f'https://www.fl.ru/projects/{number}/',
+                                 formatdate(NOW), CATEGORY) for number in range(10)])
+
+    def test_stop_between_batches(self):
+        """Установленный stop завершает перенос в архив после текущей пачки"""
+        stop = threading.Event()
+        move = self.db._move_to_archive
+
+        def move_and_stop(path, ids):
+            move(path, ids)
+            stop.set()
+
+        with mock.patch.object(self.db, '_move_to_archive', side_effect=move_and_stop):
+            moved = self.db.archive_items(('1 = 1', []), os.path.join(self.tmp.name, 'archive'), batch_size=3,
+                                          pause=60, stop=stop)
+        self.assertEqual(sum(moved.values()), 3)
+        self.assertEqual(self.db.conn.execute('SELECT COUNT(*) FROM rss_items').fetchone()[0], 7)
+
+
+class TransactionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = RSSDatabase(os.path.join(self.tmp.name, 'rss_data.db'))
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(self.db.close)
+
+    def test_nested_writes_join_outer_transaction(self):
+        """Запись внутри внешнего connection() не фиксируется раньше него и откатывается вместе с ним"""
+        with self.assertRaises(RuntimeError):
+            with self.db.connection():
+                self.assertEqual(self.db.add_item('Проект 1', 'Описание', 'https://www.fl.ru/projects/1/',
+                                                  formatdate(NOW), CATEGORY), ItemStatus.INSERTED)
+                self.db.set_watermark(CATEGORY, 'https://www.fl.ru/projects/1/', NOW)
+                self.db.save_feed_cache('https://www.fl.ru/rss/', '"etag"', None, 'hash', 10, 10, 0.1)
+                raise RuntimeError
+        self.assertEqual(self.db.get_known_links(), set())
+        self.assertIsNone(self.db.get_watermark(CATEGORY))
+        self.assertIsNone(self.db.get_feed_cache('https://www.fl.ru/rss/'))
+
+
+class SearchPageLimitTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.web = WebInterface(os.path.join(self.tmp.name, 'rss_data.db'))
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(self.web.db.close)
+        self.web.db.add_items_bulk([(f'Сайт {number}', 'Описание', f'https://www.fl.ru/projects/{number}/',
+                                     formatdate(NOW), CATEGORY) for number in range(30)])
+        patcher = mock.patch('viewdatabase.SEARCH_MAX_RESULTS', 12)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_search_depth_is_capped(self):
+        """Поиск листается только по первым SEARCH_MAX_RESULTS результатам"""
+        self.assertEqual(self.web.search_page_limit(5), 3)
+        pages = [self.web.get_page(5, search='сайт', page=page) for page in (1, 2, 3, 50)]
+        self.assertEqual([len(page['items']) for page in pages], [5, 5, 2, 2])
+        self.assertEqual([page['has_next'] for page in pages], [True, True, False, False])
+        self.assertEqual(len({item['id'] for page in pages[:3] for item in page['items']}), 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,219 +3,337 @@
 Веб-интерфейс для просмотра базы данных FL.ru RSS Parser
 """
 
-from flask import Flask, render_template, request, jsonify
-from datetime import datetime
-import sqlite3
+from flask import Flask, Response, g, render_template, request, jsonify
 import os
-from database import RSSDatabase
+import threading
+import time
+from config import SEARCH_MAX_RESULTS, VIEW_CACHE_TTL, WEB_READ_POOL_SIZE
+from database import RSSDatabase, ReadOnlyDatabase, decode_cursor, encode_cursor
+from metrics import REGISTRY, CONTENT_TYPE, WEB_REQUEST_SECONDS
 
 app = Flask(__name__)
 
+# Не больше стольких значений в кэше чтения (счётчики результатов поиска по разным запросам)
+VIEW_CACHE_MAX_ENTRIES = 256
+
 class WebInterface:
     """Класс для веб-интерфейса"""
     
-    def __init__(self):
-        self.db = RSSDatabase()
+    def __init__(self, db_path: str = "rss_data.db", read_only: bool = False,
+                 pool_size: int = WEB_READ_POOL_SIZE):
+        # В рабочем режиме - пул соединений только для чтения, схему обновляет парсер или wsgi.py
+        self.db = ReadOnlyDatabase(db_path, pool_size) if read_only else RSSDatabase(db_path)
+        # Кэш счётчиков, категорий и статистики: действителен, пока не изменилась версия данных
+        # (id последней записи и число записей) и не истёк VIEW_CACHE_TTL
+        self._cache = {}
+        self._cache_version = None
+        self._cache_expires = 0.0
+        self._cache_lock = threading.Lock()
     
-    def get_items(self, page=1, per_page=50, category=None, search=None):
-        """Получает элементы из БД с пагинацией и фильтрацией"""
-        offset = (page - 1) * per_page
-        
-        # Базовый запрос
-        query = """
-        SELECT id, title, description, link, pub_date, category, created_at 
-        FROM rss_items 
-        WHERE 1=1
-        """
-        params = []
-        
-        # Фильтр по категории
+    @staticmethod
+    def _category_filter(category):
+        """Преобразует параметр категории из запроса в номер (None - все категории)"""
         if category and category != 'all':
-            query += " AND category = ?"
-            params.append(category)
-        
-        # Поиск по тексту
-        if search:
-            query += " AND (title LIKE ? OR description LIKE ?)"
-            params.append(f"%{search}%")
-            params.append(f"%{search}%")
+            try:
+                return int(category)
+            except ValueError:
+                return None
+        return None
+    
+    def sync_cache(self):
+        """
+        Сверяет кэш с базой одним запросом (версия данных) и сбрасывает его,
+        если данные изменились. Вызывается в начале обработки запроса; возвращает версию данных
+        """
+        version = self.db.get_data_version()
+        now = time.monotonic()
+        with self._cache_lock:
+            if version != self._cache_version or now >= self._cache_expires:
+                self._cache.clear()
+                self._cache_version = version
+                self._cache_expires = now + VIEW_CACHE_TTL
+        return version
+    
+    def _cached(self, key, compute):
+        """Значение из кэша или результат compute(), сохранённый в кэш"""
+        with self._cache_lock:
+            if key in self._cache:
+                return self._cache[key]
+            version = self._cache_version
+        value = compute()
+        with self._cache_lock:
+            # Пока считали, кэш мог быть сброшен - значение старой версии не сохраняем
+            if version == self._cache_version:
+                if len(self._cache) >= VIEW_CACHE_MAX_ENTRIES:
+                    self._cache.pop(next(iter(self._cache)))
+                self._cache[key] = value
+        return value
+    
+    def get_page(self, per_page=50, category=None, search=None, after=None, before=None, last=False, page=1):
+        """
+        Страница записей (новые сверху). Листание идёт по курсору (created_at, id), а не по OFFSET:
+        after / before - курсоры следующей и предыдущей страниц, last - последняя страница.
+        Результаты полнотекстового поиска ранжированы по bm25 и листаются по номеру страницы
+        не дальше search_page_limit() (первые SEARCH_MAX_RESULTS)
+        """
+        category_id = self._category_filter(category)
         
-        # Сортировка и пагинация
-        query += " ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?"
-        params.extend([per_page, offset])
+        # Поиск по тексту через полнотекстовый индекс (ранжирование bm25 и подсветка совпадений)
+        if search and self.db.fts_enabled:
+            # OFFSET пропускает строки перебором - глубина листания ограничена
+            page = min(page, self.search_page_limit(per_page))
+            offset = (page - 1) * per_page
+            size = min(per_page, SEARCH_MAX_RESULTS - offset)
+            items = self.db.search_items(search, category_id, size + 1, offset)
+            return {
+                'items': items[:size],
+                'has_next': len(items) > size and offset + size < SEARCH_MAX_RESULTS,
+                'has_prev': page > 1,
+                'next_cursor': None,
+                'prev_cursor': None
+            }
         
-        try:
-            conn = sqlite3.connect(self.db.db_path)
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            
-            items = []
-            for row in cursor.fetchall():
-                items.append({
-                    'id': row[0],
-                    'title': row[1],
-                    'description': row[2][:200] + '...' if len(row[2]) > 200 else row[2],
-                    'full_description': row[2],
-                    'link': row[3],
-                    'pub_date': row[4],
-                    'category': row[5],
-                    'created_at': row[6]
-                })
-            
-            conn.close()
-            return items
-            
-        except Exception as e:
-            print(f"Ошибка при получении данных: {e}")
-            return []
+        after_key = decode_cursor(after)
+        before_key = decode_cursor(before) if after_key is None else None
+        last = last and after_key is None and before_key is None
+        items, has_more = self.db.get_items_page(per_page, category_id, search or None,
+                                                 after=after_key, before=before_key, oldest=last)
+        if before_key is not None or last:
+            has_prev, has_next = has_more, not last
+        else:
+            has_prev, has_next = after_key is not None, has_more
+        return {
+            'items': items,
+            'has_next': has_next and bool(items),
+            'has_prev': has_prev and bool(items),
+            'next_cursor': encode_cursor(items[-1]['created_at'], items[-1]['id']) if has_next and items else None,
+            'prev_cursor': encode_cursor(items[0]['created_at'], items[0]['id']) if has_prev and items else None
+        }
+    
+    @staticmethod
+    def search_page_limit(per_page):
+        """Последняя страница результатов полнотекстового поиска, доступная для листания"""
+        return max((SEARCH_MAX_RESULTS + per_page - 1) // per_page, 1)
     
     def get_total_count(self, category=None, search=None):
-        """Получает общее количество записей"""
-        query = "SELECT COUNT(*) FROM rss_items WHERE 1=1"
-        params = []
+        """Получает общее количество записей (из кэша; без поиска - по статистике категорий)"""
+        category_id = self._category_filter(category)
+        if not search:
+            statistics = self.get_statistics()
+            if category_id is None:
+                return statistics.get('total_items', 0)
+            return statistics.get('by_category', {}).get(category_id, 0)
         
-        if category and category != 'all':
+        if self.db.fts_enabled:
+            return self._cached(('search_count', category_id, search),
+                                lambda: self.db.count_search(search, category_id))
+        return self._cached(('like_count', category_id, search),
+                            lambda: self._count_like(category_id, search))
+    
+    def _count_like(self, category_id, search):
+        """Количество записей, найденных LIKE (когда полнотекстовый индекс недоступен)"""
+        query = "SELECT COUNT(*) FROM rss_items WHERE (title LIKE ? OR description LIKE ?)"
+        params = [f"%{search}%", f"%{search}%"]
+        if category_id is not None:
             query += " AND category = ?"
-            params.append(category)
-        
-        if search:
-            query += " AND (title LIKE ? OR description LIKE ?)"
-            params.append(f"%{search}%")
-            params.append(f"%{search}%")
-        
+            params.append(category_id)
         try:
-            conn = sqlite3.connect(self.db.db_path)
-            cursor = conn.cursor()
-            cursor.execute(query, params)
-            count = cursor.fetchone()[0]
-            conn.close()
-            return count
+            with self.db.connection() as conn:
+                return conn.execute(query, params).fetchone()[0]
         except Exception as e:
             print(f"Ошибка при подсчете записей: {e}")
             return 0
     
     def get_categories(self):
-        """Получает список всех категорий"""
-        try:
-            conn = sqlite3.connect(self.db.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT DISTINCT category FROM rss_items ORDER BY category")
-            categories = [row[0] for row in cursor.fetchall()]
-            conn.close()
-            return categories
-        except Exception as e:
-            print(f"Ошибка при получении категорий: {e}")
-            return []
+        """Получает список всех категорий (из кэша статистики)"""
+        return sorted(self.get_statistics().get('by_category', {}), key=lambda c: (c is None, c))
     
     def get_statistics(self):
-        """Получает статистику БД"""
+        """Получает статистику БД (из кэша)"""
+        return self._cached('statistics', self._load_statistics)
+    
+    def _load_statistics(self):
         stats = self.db.get_statistics()
+        if not stats:
+            return stats
         
-        # Дополнительная статистика
-        try:
-            conn = sqlite3.connect(self.db.db_path)
-            cursor = conn.cursor()
-            
-            # Статистика по категориям
-            cursor.execute("""
-                SELECT category, COUNT(*) as count 
-                FROM rss_items 
-                GROUP BY category 
-                ORDER BY count DESC
-            """)
-            category_stats = dict(cursor.fetchall())
-            
-            # Статистика по дням
-            cursor.execute("""
-                SELECT DATE(created_at) as date, COUNT(*) as count 
-                FROM rss_items 
-                WHERE created_at >= datetime('now', '-7 days')
-                GROUP BY DATE(created_at) 
-                ORDER BY date DESC
-            """)
-            daily_stats = dict(cursor.fetchall())
-            
-            conn.close()
-            
-            stats['category_stats'] = category_stats
-            stats['daily_stats'] = daily_stats
-            
-        except Exception as e:
-            print(f"Ошибка при получении статистики: {e}")
+        # Статистика по категориям - те же счётчики, по убыванию
+        stats['category_stats'] = dict(sorted(stats['by_category'].items(), key=lambda pair: pair[1], reverse=True))
+        
+        # Статистика по дням
+        stats['daily_stats'] = self.db.get_daily_statistics(7)
         
         return stats
 
 
-# Создаем экземпляр веб-интерфейса
-web_interface = WebInterface()
+def shorten_descriptions(items, length=200):
+    """Обрезает описания для таблицы; полный текст остаётся в 'full_description'"""
+    for item in items:
+        description = item['description'] or ''
+        item['full_description'] = description
+        item['description'] = description[:length] + '...' if len(description) > length else description
+    return items
+
+
+def page_arguments():
+    """Параметры листания из запроса: (per_page, category, search, after, before, last, page)"""
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 500)
+    page = max(request.args.get('page', 1, type=int), 1)
+    return (per_page,
+            request.args.get('category', 'all'),
+            request.args.get('search', ''),
+            request.args.get('after') or None,
+            request.args.get('before') or None,
+            request.args.get('last') == '1',
+            page)
+
+
+# Экземпляр веб-интерфейса: при запуске viewdatabase.py - с соединением записи,
+# в рабочем режиме (wsgi.py) каждый процесс создаёт свой пул только для чтения
+web_interface = None
+# Повторный вход: ленивое создание в start_request_timer вызывает init_web_interface под той же блокировкой
+_web_interface_lock = threading.RLock()
+
+
+def init_web_interface(db_path="rss_data.db", read_only=False, pool_size=WEB_READ_POOL_SIZE):
+    """Создаёт экземпляр веб-интерфейса процесса"""
+    global web_interface
+    with _web_interface_lock:
+        web_interface = WebInterface(db_path, read_only, pool_size)
+    return web_interface
+
+
+def not_modified_or(etag, build):
+    """
+    JSON-ответ с ETag: 304 без расчёта тела, если версия у клиента совпадает (If-None-Match).
+    Cache-Control: no-cache - браузер хранит ответ, но каждый раз сверяет версию
+    """
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = build()
+        if isinstance(response, tuple):
+            return response  # ошибка - без ETag
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if web_interface is None:
+        # Приложение запущено без init_web_interface() (например, flask run); проверка
+        # повторяется под блокировкой, чтобы параллельные первые запросы не создали два экземпляра
+        with _web_interface_lock:
+            if web_interface is None:
+                init_web_interface()
+
+
+@app.after_request
+def observe_request_time(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        WEB_REQUEST_SECONDS.labels(request.endpoint or 'unknown').observe(time.perf_counter() - started)
+    return response
 
 
 @app.route('/')
 def index():
     """Главная страница"""
-    page = int(request.args.get('page', 1))
-    per_page = int(request.args.get('per_page', 50))
-    category = request.args.get('category', 'all')
-    search = request.args.get('search', '')
+    per_page, category, search, after, before, last, page = page_arguments()
     
-    items = web_interface.get_items(page, per_page, category, search)
+    web_interface.sync_cache()
+    result = web_interface.get_page(per_page, category, search, after, before, last, page)
     total_count = web_interface.get_total_count(category, search)
     categories = web_interface.get_categories()
     statistics = web_interface.get_statistics()
     
-    # Пагинация
-    total_pages = (total_count + per_page - 1) // per_page
+    # Пагинация: номер страницы передаётся в ссылках и служит только для отображения
+    total_pages = max((total_count + per_page - 1) // per_page, 1)
+    search_limited = bool(search) and web_interface.db.fts_enabled and total_count > SEARCH_MAX_RESULTS
+    if search_limited:
+        total_pages = web_interface.search_page_limit(per_page)
+    if not result['has_prev']:
+        page = 1
+    elif last:
+        page = total_pages
+    page = min(page, total_pages)
     
     return render_template('index.html', 
-                         items=items,
+                         items=shorten_descriptions(result['items']),
                          page=page,
                          per_page=per_page,
                          total_pages=total_pages,
                          total_count=total_count,
+                         search_limit=SEARCH_MAX_RESULTS if search_limited else None,
+                         has_next=result['has_next'],
+                         has_prev=result['has_prev'],
+                         next_cursor=result['next_cursor'],
+                         prev_cursor=result['prev_cursor'],
                          category=category,
                          search=search,
                          categories=categories,
                          statistics=statistics)
 
 
+@app.route('/api/items')
+def get_items():
+    """
+    API списка записей с той же пагинацией, что и главная страница
+    (параметры: category, search, per_page, after, before, last, page)
+    """
+    per_page, category, search, after, before, last, page = page_arguments()
+    web_interface.sync_cache()
+    result = web_interface.get_page(per_page, category, search, after, before, last, page)
+    result['total_count'] = web_interface.get_total_count(category, search)
+    return jsonify(result)
+
+
 @app.route('/api/item/<int:item_id>')
 def get_item(item_id):
-    """API для получения полной информации об элементе"""
-    try:
-        conn = sqlite3.connect(web_interface.db.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, title, description, link, pub_date, category, created_at 
-            FROM rss_items 
-            WHERE id = ?
-        """, (item_id,))
-        
-        row = cursor.fetchone()
-        if row:
-            item = {
-                'id': row[0],
-                'title': row[1],
-                'description': row[2],
-                'link': row[3],
-                'pub_date': row[4],
-                'category': row[5],
-                'created_at': row[6]
-            }
-            conn.close()
-            return jsonify(item)
-        else:
-            conn.close()
+    """API для получения полной информации об элементе (ETag - по версии данных)"""
+    version = web_interface.sync_cache()
+    
+    def build():
+        item = web_interface.db.get_item(item_id)
+        if item is None:
             return jsonify({'error': 'Элемент не найден'}), 404
-            
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return jsonify(item)
+    return not_modified_or(f'item-{item_id}-{version}', build)
 
 
 @app.route('/api/stats')
 def get_stats():
-    """API для получения статистики"""
-    stats = web_interface.get_statistics()
-    return jsonify(stats)
+    """API для получения статистики (ETag - по версии данных)"""
+    version = web_interface.sync_cache()
+    return not_modified_or(f'stats-{version}', lambda: jsonify(web_interface.get_statistics()))
+
+
+@app.route('/metrics')
+def metrics():
+    """Метрики процесса веб-интерфейса в формате Prometheus"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+@app.route('/api/fetch_runs')
+def get_fetch_runs():
+    """API журнала опросов лент (параметры: category, limit)"""
+    category = web_interface._category_filter(request.args.get('category'))
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+    return jsonify(web_interface.db.get_fetch_runs(category, limit))
+
+
+@app.route('/api/feeds')
+def get_feeds():
+    """API сводки по категориям: опросы за hours часов и частота публикаций за rate_hours часов"""
+    hours = request.args.get('hours', 24, type=float)
+    rate_hours = request.args.get('rate_hours', 7 * 24, type=float)
+    feeds = {row['category']: row for row in web_interface.db.get_fetch_stats(hours)}
+    for category, rate in web_interface.db.get_posting_rates(rate_hours).items():
+        feeds.setdefault(category, {'category': category})['posting_rate'] = rate
+    return jsonify({'hours': hours, 'rate_hours': rate_hours,
+                    'categories': [feeds[category] for category in sorted(feeds, key=lambda c: (c is None, c))]})
 
 
 if __name__ == '__main__':
@@ -223,8 +341,10 @@ if __name__ == '__main__':
     if not os.path.exists('templates'):
         os.makedirs('templates')
     
-    print("🌐 Запуск веб-интерфейса FL.ru RSS Parser...")
+    init_web_interface()
+    print("🌐 Запуск веб-интерфейса FL.ru RSS Parser (режим разработки)...")
     print("📡 Доступен по адресу: http://localhost:5000")
+    print("Рабочий режим (несколько процессов, чтение без блокировок): python wsgi.py")
     print("Для остановки нажмите Ctrl+C")
     
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Рабочий режим веб-интерфейса: WSGI-приложение и запуск в нескольких процессах
+
+Схема БД создаётся и обновляется один раз соединением записи, затем главный процесс
+открывает слушающий сокет и запускает рабочие процессы, которые принимают соединения
+с общего сокета. Каждый процесс создаёт свой пул соединений SQLite только для чтения
+(mode=ro, query_only) и обслуживает запросы в потоках; в режиме WAL чтение идёт
+по снимку и не ждёт записи парсера. Упавший рабочий процесс перезапускается.
+
+Запуск:            python wsgi.py --workers 4 --port 5000
+Внешний сервер:    gunicorn -w 4 --threads 8 -b 0.0.0.0:5000 'wsgi:create_app()'
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import time
+import traceback
+
+from werkzeug.serving import make_server
+
+from config import WEB_HOST, WEB_PORT, WEB_WORKERS, WEB_READ_POOL_SIZE
+from database import RSSDatabase
+import viewdatabase
+
+# Пауза перед перезапуском упавшего рабочего процесса, сек
+RESTART_DELAY = 1.0
+
+
+def create_app(db_path="rss_data.db", pool_size=WEB_READ_POOL_SIZE):
+    """WSGI-приложение процесса с пулом соединений только для чтения"""
+    viewdatabase.init_web_interface(db_path, read_only=True, pool_size=pool_size)
+    return viewdatabase.app
+
+
+def prepare_database(db_path):
+    """Создаёт и обновляет схему (индексы, сводная статистика) до запуска читателей"""
+    RSSDatabase(db_path).close()
+
+
+def run_worker(sock, host, port, db_path, pool_size, access_log=False):
+    """Обслуживает запросы с общего сокета в потоках текущего процесса"""
+    if not access_log:
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    app = create_app(db_path, pool_size)
+    server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+    server.serve_forever()
+
+
+def serve(host=WEB_HOST, port=WEB_PORT, workers=WEB_WORKERS, db_path="rss_data.db",
+          pool_size=WEB_READ_POOL_SIZE, access_log=False):
+    """Запускает веб-интерфейс в workers процессах (без fork - в одном процессе)"""
+    prepare_database(db_path)
+    sock = socket.create_server((host, port), backlog=1024)
+    sock.set_inheritable(True)
+
+    if workers <= 1 or not hasattr(os, 'fork'):
+        print(f"🌐 Веб-интерфейс: http://{host}:{port} (один процесс, соединений чтения: {pool_size})")
+        try:
+            run_worker(sock, host, port, db_path, pool_size, access_log)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            code = 0
+            try:
+                run_worker(sock, host, port, db_path, pool_size, access_log)
+            except KeyboardInterrupt:
+                pass
+            except Exception:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        children.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    for _ in range(workers):
+        spawn()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f"🌐 Веб-интерфейс: http://{host}:{port} (рабочих процессов: {workers}, соединений чтения на процесс: {pool_size})")
+    print("Для остановки нажмите Ctrl+C")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            # Код выхода или минус номер сигнала (os.waitstatus_to_exitcode - только с Python 3.9)
+            code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+            print(f"⚠️ Рабочий процесс {pid} завершился (код {code}), перезапуск")
+            time.sleep(RESTART_DELAY)
+            if not stopping:
+                spawn()
+    sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=WEB_HOST)
+    parser.add_argument('--port', type=int, default=WEB_PORT)
+    parser.add_argument('--workers', type=int, default=WEB_WORKERS, help='рабочих процессов')
+    parser.add_argument('--pool-size', type=int, default=WEB_READ_POOL_SIZE,
+                        help='соединений SQLite только для чтения на процесс')
+    parser.add_argument('--db', default='rss_data.db', help='путь к базе данных')
+    parser.add_argument('--access-log', action='store_true', help='журнал запросов')
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.db, args.pool_size, args.access_log)
+
+
+if __name__ == '__main__':
+    main()